@@ -1,39 +1,55 @@
 -- BigQuery Standard SQL
--- Rebuilds the daily country risk table from `events_daily_clean`.
--- If you change the risk formula in Python, update this file to match.
+-- Rebuilds the daily country risk table from `events_daily_clean` (baseline variant).
+-- Generated from src/risk_variants.py; do not edit by hand. Regenerate with:
+--   python -m src risk-table --print-sql > docs/sql/refresh_country_risk_daily.sql
 
 CREATE OR REPLACE TABLE `gen-lang-client-0366281238.gdelt_portfolio.country_risk_daily` AS
-WITH base AS (
-  SELECT
-    date,
-    CountryCode,
-    SUM(EventCount) AS total_events,
-    SUM(IF(EventRootCode IN ('18','19','20'), EventCount, 0)) AS conflict_events,
-    SUM(IF(ToneBucket = 'negative', EventCount, 0)) AS negative_events,
-    SAFE_DIVIDE(SUM(IF(EventRootCode IN ('18','19','20'), EventCount, 0)), SUM(EventCount)) AS conflict_share,
-    SAFE_DIVIDE(SUM(IF(ToneBucket = 'negative', EventCount, 0)), SUM(EventCount)) AS negative_share,
-    SAFE_DIVIDE(SUM(AvgTone * EventCount), SUM(EventCount)) AS weighted_avg_tone
-  FROM `gen-lang-client-0366281238.gdelt_portfolio.events_daily_clean`
-  WHERE date IS NOT NULL AND CountryCode IS NOT NULL
-  GROUP BY date, CountryCode
-),
-scored AS (
-  SELECT
-    *,
-    -- A simple interpretable risk score:
-    -- (1) more negative coverage increases risk
-    -- (2) more conflict-coded events increases risk
-    -- (3) high volume slightly increases risk via a log term
-    (10.0 * (0.6 * negative_share + 0.4 * conflict_share)) + (LN(1 + total_events) / 5.5) AS risk_raw
-  FROM base
-)
-SELECT
-  date,
-  CountryCode,
-  total_events,
-  conflict_events,
-  conflict_share,
-  negative_share,
-  weighted_avg_tone,
-  risk_raw
-FROM scored;
+SELECT * EXCEPT(variant) FROM (
+    WITH base AS (
+      SELECT
+        DATE(date) AS date,
+        CountryCode,
+        LPAD(CAST(EventRootCode AS STRING), 2, '0') AS EventRootCode,
+        CAST(EventCount AS INT64) AS EventCount,
+        CAST(AvgTone AS FLOAT64) AS AvgTone,
+        CAST(ToneCount AS INT64) AS ToneCount,
+        CAST(SumTone AS FLOAT64) AS SumTone
+      FROM `gen-lang-client-0366281238.gdelt_portfolio.events_daily_clean`
+      WHERE CountryCode IS NOT NULL
+        AND date IS NOT NULL
+    ),
+    agg AS (
+      SELECT
+        date, CountryCode,
+        SUM(EventCount) AS total_events,
+        SAFE_DIVIDE(SUM(SumTone), SUM(ToneCount)) AS weighted_avg_tone,
+        SUM(IF(EventRootCode IN ('14', '15', '16', '17', '18', '19', '20'), EventCount, 0)) AS conflict_events_0,
+        SUM(IF(AvgTone <= -2.0, EventCount, 0)) AS negative_tone_events_0
+      FROM base
+      GROUP BY date, CountryCode
+    ),
+    long AS (
+      SELECT agg.date, agg.CountryCode, agg.total_events, agg.weighted_avg_tone, v.*
+      FROM agg, UNNEST([
+        STRUCT('baseline' AS variant, conflict_events_0 AS conflict_events, negative_tone_events_0 AS negative_tone_events, 1.5 AS w_conflict, 1.0 AS w_negative, 0.5 AS w_volume)
+      ]) AS v
+    )
+    SELECT
+      date,
+      CountryCode,
+      variant,
+      total_events,
+      conflict_events,
+      negative_tone_events,
+      weighted_avg_tone,
+      SAFE_DIVIDE(conflict_events, total_events) AS conflict_share,
+      SAFE_DIVIDE(negative_tone_events, total_events) AS negative_share,
+      LOG(1 + total_events) AS log_events,
+      (
+        w_conflict * SAFE_DIVIDE(conflict_events, total_events)
+        + w_negative * SAFE_DIVIDE(negative_tone_events, total_events)
+        + w_volume * LOG(1 + total_events)
+      ) AS risk_raw
+    FROM long
+    )
+ORDER BY date, CountryCode;
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from src import sketches
+
+# Extract grain: one row per (SQLDATE, CountryCode, EventRootCode).
+KEYS = ["SQLDATE", "CountryCode", "EventRootCode"]
+
+# Geographic levels and the entity column each one is keyed by. ADM1 rows also carry their
+# CountryCode, so every country-level table can be rolled up from the regional extract.
+LEVELS = {"country": "CountryCode", "adm1": "RegionCode"}
+
+
+def level_keys(level: str) -> list[str]:
+    # Extract grain for a level; ADM1 adds RegionCode under its country.
+    return KEYS if level == "country" else ["SQLDATE", "CountryCode", "RegionCode", "EventRootCode"]
+
+
+# Sufficient statistics: every one of these is a plain sum, so any two partial extracts for
+# the same key (parallel chunks, late-arriving partitions) combine exactly by adding them.
+ADDITIVE_COLS = [
+    "EventCount",
+    "ToneCount",
+    "SumTone",
+    "SumSqTone",
+    "GoldsteinCount",
+    "SumGoldstein",
+    "SumSqGoldstein",
+    "TotalMentions",
+    "TotalArticles",
+    "TotalSources",
+]
+
+# SQL fragment that produces ADDITIVE_COLS from raw event rows.
+PARTIALS_SQL = """
+      COUNT(1) AS EventCount,
+      COUNT(AvgTone) AS ToneCount,
+      SUM(AvgTone) AS SumTone,
+      SUM(AvgTone * AvgTone) AS SumSqTone,
+      COUNT(GoldsteinScale) AS GoldsteinCount,
+      SUM(GoldsteinScale) AS SumGoldstein,
+      SUM(GoldsteinScale * GoldsteinScale) AS SumSqGoldstein,
+      SUM(NumMentions) AS TotalMentions,
+      SUM(NumArticles) AS TotalArticles,
+      SUM(NumSources) AS TotalSources"""
+
+
+def finalize(df: pd.DataFrame) -> pd.DataFrame:
+    # Derived columns are recomputed from the sums, never merged directly.
+    df["AvgTone"] = df["SumTone"] / df["ToneCount"].replace(0, np.nan)
+    df["AvgGoldstein"] = df["SumGoldstein"] / df["GoldsteinCount"].replace(0, np.nan)
+    return df
+
+
+def combine(df: pd.DataFrame, keys: list[str] = KEYS, with_sketches: bool = True) -> pd.DataFrame:
+    # The combine operator: sum partials per key, then re-derive the averages.
+    out = df.groupby(keys, as_index=False, observed=True)[ADDITIVE_COLS].sum(min_count=1)
+
+    # Histogram sketches merge the same way: bin counts add up per key.
+    for name in sketches.HIST_COLS if with_sketches else []:
+        if name in df.columns:
+            hist = sketches.rollup(df, keys, name).reset_index()
+            out = out.merge(hist, on=keys, how="left")
+
+    out = out.sort_values(keys).reset_index(drop=True)
+    return finalize(out)
+
+
+def variance(df: pd.DataFrame, stat: str) -> pd.Series:
+    # Population variance of event-level values from (count, sum, sum of squares).
+    n = df[f"{stat}Count"].replace(0, np.nan)
+    mean = df[f"Sum{stat}"] / n
+    return (df[f"SumSq{stat}"] / n - mean**2).clip(lower=0)
+
+
+def from_averages(df: pd.DataFrame) -> pd.DataFrame:
+    # Legacy extracts only carry AVG columns; rebuild approximate sums so they still combine.
+    # Rows without an average contribute neither events nor sum; sums of squares are unknown.
+    df["ToneCount"] = df["EventCount"].where(df["AvgTone"].notna(), 0)
+    df["SumTone"] = (df["AvgTone"] * df["EventCount"]).fillna(0)
+    df["SumSqTone"] = np.nan
+    df["GoldsteinCount"] = df["EventCount"].where(df["AvgGoldstein"].notna(), 0)
+    df["SumGoldstein"] = (df["AvgGoldstein"] * df["EventCount"]).fillna(0)
+    df["SumSqGoldstein"] = np.nan
+    return df
@@ -0,0 +1,148 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# One snippet per (stage, engine). Each runs in a fresh interpreter so peak RSS belongs to
+# that stage alone; E is the extract, P a clean hand-off directory, OUT a scratch directory.
+TASKS = {
+    "clean": {
+        "pandas": (
+            "from src import clean_events_daily as c, data_quality, schemas\n"
+            "df, _ = c.clean_frame(E)\n"
+            "df.to_parquet(OUT / 'events_daily_clean.parquet', index=False)\n"
+            "schemas.write_feather(df, OUT / 'events_daily_clean.arrow', 'events_daily_clean')\n"
+            "data_quality.evaluate(df)\n"
+            "c.report_frames(df)\n"
+        ),
+        "polars": (
+            "from src import clean_events_daily as c, lazy_engine as le\n"
+            "le.write_clean(le.clean_plan(E, c.ROOT_LABEL, c.TONE_THRESHOLDS), "
+            "OUT / 'events_daily_clean.parquet', OUT / 'events_daily_clean.arrow')\n"
+            "written = le.scan_clean(processed_dir=OUT)\n"
+            "le.qa_stats(written)\n"
+            "le.report_frames(written)\n"
+        ),
+    },
+    "anomalies": {
+        "pandas": (
+            "from src import aggregates, schemas\n"
+            "df = schemas.read_events_daily_clean(processed_dir=P).dropna(subset=['date'])\n"
+            "aggregates.combine(df, keys=['date', 'CountryCode'], with_sketches=False)\n"
+        ),
+        "polars": (
+            "from src import lazy_engine as le\n"
+            "le.panel(le.scan_clean(processed_dir=P), ['date', 'CountryCode'])\n"
+        ),
+    },
+    "viz": {
+        "pandas": (
+            "from src import schemas, viz_overview\n"
+            "viz_overview.overview_frames(schemas.read_events_daily_clean(processed_dir=P))\n"
+        ),
+        "polars": (
+            "from src import lazy_engine as le\n"
+            "le.overview_frames(le.scan_clean(processed_dir=P))\n"
+        ),
+    },
+    "runlog": {
+        "pandas": "from src.write_run_log import extract_summary\nextract_summary(E)\n",
+        "polars": "from src.lazy_engine import extract_summary\nextract_summary(E)\n",
+    },
+}
+
+SCRIPT = """\
+import json, resource, time
+from pathlib import Path
+E, P, OUT = Path({extract!r}), Path({processed!r}), Path({out!r})
+import pandas, pyarrow{preload}
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+{body}
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"seconds": time.perf_counter() - start, "base_kb": base, "peak_kb": peak}}))
+"""
+
+
+def scale_extract(path: Path, copies: int, out: Path, chunksize: int = 500_000) -> Path:
+    # A longer synthetic history: the extract repeated back to back, each copy shifted past
+    # the previous one. Written chunk by chunk, so building it never needs the whole file.
+    days = pd.read_csv(path, usecols=["SQLDATE"], dtype=str)["SQLDATE"]
+    dates = pd.to_datetime(days, format="%Y%m%d")
+    span = (dates.max() - dates.min()).days + 1
+    first = True
+    for k in range(copies):
+        for chunk in pd.read_csv(path, dtype={"SQLDATE": str}, chunksize=chunksize):
+            shifted = pd.to_datetime(chunk["SQLDATE"], format="%Y%m%d") + timedelta(days=span * k)
+            chunk["SQLDATE"] = shifted.dt.strftime("%Y%m%d")
+            chunk.to_csv(out, mode="w" if first else "a", header=first, index=False)
+            first = False
+    return out
+
+
+def run_task(body: str, extract: Path, processed: Path, out: Path) -> dict:
+    out.mkdir(parents=True, exist_ok=True)
+    # The engine library is imported before the baseline, so the delta is the work itself.
+    preload = ", polars" if "lazy_engine" in body else ""
+    code = SCRIPT.format(
+        extract=str(extract), processed=str(processed), out=str(out), preload=preload, body=body
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare wall time and peak memory of the pandas and Polars engines."
+    )
+    parser.add_argument("--extract", type=Path, help="Extract CSV (default: the newest one).")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        default=1,
+        help="Repeat the extract this many times back to back to simulate a longer history.",
+    )
+    parser.add_argument("--tasks", nargs="+", choices=list(TASKS), default=list(TASKS))
+    args = parser.parse_args(argv)
+
+    from src.clean_events_daily import latest_extract_file
+
+    extract = args.extract or latest_extract_file()
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        if args.scale > 1:
+            extract = scale_extract(extract, args.scale, tmp / f"{extract.stem}_x{args.scale}.csv")
+        print(f"Extract: {extract} ({extract.stat().st_size / 2**20:,.0f} MiB)")
+
+        # Downstream stages read the pandas engine's clean output, so both engines get the
+        # same input files.
+        processed = tmp / "pandas" / "clean"
+        run_task(TASKS["clean"]["pandas"], extract, processed, processed)
+        for task in args.tasks:
+            for engine, body in TASKS[task].items():
+                stats = run_task(body, extract, processed, tmp / engine / task)
+                rows.append(
+                    {
+                        "stage": task,
+                        "engine": engine,
+                        "seconds": round(stats["seconds"], 2),
+                        "peak_mib": round(stats["peak_kb"] / 1024),
+                        "over_imports_mib": round((stats["peak_kb"] - stats["base_kb"]) / 1024),
+                    }
+                )
+
+    print(pd.DataFrame(rows).to_markdown(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from src.cli import COMMANDS as CLI_COMMANDS
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Libraries that must never load just because a stage module was imported.
+HEAVY_MODULES = [
+    "matplotlib",
+    "seaborn",
+    "sklearn",
+    "google.cloud.bigquery",
+    "pandas_gbq",
+    "joblib",
+    "tableauhyperapi",
+    "polars",
+]
+
+# Every module the CLI dispatches to; helpers (runs, schemas, ...) load through them.
+STAGE_MODULES = list(dict.fromkeys(target.split(":")[0] for target, _ in CLI_COMMANDS.values()))
+
+# Short commands that should start well under a second.
+COMMANDS = [
+    ["--help"],
+    ["forecast", "--help"],
+    ["serve", "--help"],
+    ["lookup", "--help"],
+]
+
+
+def heavy_modules_loaded_by(modules: list[str]) -> list[str]:
+    # This imports the given modules in a fresh interpreter and lists heavy libraries it pulled in.
+    code = (
+        "import sys\n"
+        + "".join(f"import {m}\n" for m in modules)
+        + f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return [m for m in out.stdout.strip().split(",") if m]
+
+
+def time_command(cmd: list[str], repeats: int) -> float:
+    # Median wall time of a fresh interpreter, so it includes every import the command does.
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=ROOT, capture_output=True, check=True)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark CLI and stage import startup time.")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rows = [
+        ("python -c pass (baseline)", time_command([sys.executable, "-c", "pass"], args.repeats))
+    ]
+    for cmd in COMMANDS:
+        label = "python -m src " + " ".join(cmd)
+        rows.append((label, time_command([sys.executable, "-m", "src", *cmd], args.repeats)))
+    for module in STAGE_MODULES:
+        label = f"import {module}"
+        rows.append((label, time_command([sys.executable, "-c", f"import {module}"], args.repeats)))
+
+    width = max(len(label) for label, _ in rows)
+    print(f"{'command'.ljust(width)}  median_s")
+    for label, seconds in rows:
+        print(f"{label.ljust(width)}  {seconds:8.3f}")
+
+    leaked = heavy_modules_loaded_by(STAGE_MODULES)
+    print(f"\nHeavy modules loaded at import: {', '.join(leaked) or 'none'}")
+    if leaked:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
-from google.cloud import bigquery
-
 BILLING_PROJECT = "gen-lang-client-0366281238"
 
 # Public GDELT table we will query
@@ -7,6 +5,8 @@ TABLE = "gdelt-bq.gdeltv2.events_partitioned"
 
 
 def main() -> None:
+    from google.cloud import bigquery
+
     # BigQuery client uses Application Default Credentials automatically
     client = bigquery.Client(project=BILLING_PROJECT)
 
@@ -1,11 +1,16 @@
+import argparse
+import shutil
+import time
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from src import aggregates, data_quality, lazy_engine, runs, schemas, sketches
+
 ROOT = Path(__file__).resolve().parents[1]
 
 EXTRACT_DIR = ROOT / "data" / "extracts"
-OUT_PARQUET = ROOT / "data" / "processed" / "events_daily_clean.parquet"
 REPORT_PATH = ROOT / "reports" / "data_quality_events_daily.md"
 
 
@@ -34,109 +39,243 @@ ROOT_LABEL = {
 }
 
 
-def latest_extract_file() -> Path:
-    # Grab the newest extract so you never clean the wrong file by accident.
-    files = sorted(EXTRACT_DIR.glob("events_daily_*.csv"))
+# ToneBucket cut-offs on AvgTone (inclusive); the Polars engine is handed the same dict.
+TONE_THRESHOLDS = {"negative": -2.0, "positive": 2.0}
+
+
+def latest_extract_file(level: str = "country") -> Path:
+    # Default when no --extract is given: the most recently written extract.
+    # Country extracts are events_daily_<dates>.csv; ADM1 ones are events_daily_adm1_<dates>.csv.
+    pattern = "events_daily_adm1_*.csv" if level == "adm1" else "events_daily_[0-9]*.csv"
+    files = sorted(EXTRACT_DIR.glob(pattern))
     if not files:
-        raise FileNotFoundError(f"No events_daily_*.csv found in {EXTRACT_DIR}")
+        raise FileNotFoundError(f"No {pattern} found in {EXTRACT_DIR}")
     return max(files, key=lambda p: p.stat().st_mtime)
 
 
-def tone_bucket(avg_tone: float) -> str:
+def tone_buckets(avg_tone: pd.Series) -> np.ndarray:
     # Keep buckets stable and easy to explain to non-technical viewers.
-    if pd.isna(avg_tone):
-        return "unknown"
-    if avg_tone <= -2:
-        return "negative"
-    if avg_tone >= 2:
-        return "positive"
-    return "neutral"
+    return np.select(
+        [
+            avg_tone.isna(),
+            avg_tone <= TONE_THRESHOLDS["negative"],
+            avg_tone >= TONE_THRESHOLDS["positive"],
+        ],
+        ["unknown", "negative", "positive"],
+        "neutral",
+    )
 
 
-def main() -> None:
-    OUT_PARQUET.parent.mkdir(parents=True, exist_ok=True)
-    REPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+def add_labels(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    # SQLDATE is YYYYMMDD (already a string); make it a real date column for Tableau and time-series work.
+    df["date"] = pd.to_datetime(df["SQLDATE"], format="%Y%m%d", errors="coerce")
 
-    in_path = latest_extract_file()
-    print(f"Cleaning extract: {in_path}")
+    # Add readable labels and simple sentiment buckets.
+    df["EventRootLabel"] = df["EventRootCode"].map(ROOT_LABEL).fillna("Unknown")
+    df["ToneBucket"] = tone_buckets(df["AvgTone"])
 
-    # Force types so pandas doesn’t “guess” differently on different runs.
-    df = pd.read_csv(
-        in_path,
-        dtype={
-            "CountryCode": "string",
-            "EventRootCode": "string",
-        },
-        low_memory=False,
-    )
+    # Keep a clean, consistent column order for downstream scripts and Tableau.
+    return schemas.coerce(df, table)[schemas.columns(table)]
 
-    # Normalize codes to 2-digit strings (01..20) so joins and maps behave.
-    df["EventRootCode"] = df["EventRootCode"].astype("string").str.strip().str.zfill(2)
 
-    # SQLDATE is YYYYMMDD; make it a real date column for Tableau and time-series work.
-    df["SQLDATE"] = df["SQLDATE"].astype(str)
-    df["date"] = pd.to_datetime(df["SQLDATE"], format="%Y%m%d", errors="coerce")
+def clean_frame(in_path: Path, level: str = "country") -> tuple[pd.DataFrame, pd.DataFrame | None]:
+    # The pandas engine: the clean country table, plus the regional table at ADM1.
+    # Force types from the schema registry so pandas doesn’t “guess” differently on different runs.
+    extract_table = schemas.table_for("events_daily_extract", level)
+    df = pd.read_csv(in_path, dtype=schemas.csv_dtypes(extract_table), low_memory=False)
 
     # Make numeric columns numeric (bad rows become NaN instead of crashing later).
-    for col in [
-        "EventCount",
-        "AvgTone",
-        "AvgGoldstein",
-        "TotalMentions",
-        "TotalArticles",
-        "TotalSources",
-    ]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+    # Columns that already parsed to the schema type are skipped.
+    df = schemas.coerce(df, extract_table)
 
-    # Add readable labels and simple sentiment buckets.
-    df["EventRootLabel"] = df["EventRootCode"].map(ROOT_LABEL).fillna("Unknown")
-    df["ToneBucket"] = df["AvgTone"].apply(tone_bucket)
+    # Older extracts only have AVG columns; rebuild approximate partial sums for them.
+    if "SumTone" not in df.columns:
+        print("Extract has no partial sums (legacy format); approximating from averages.")
+        df = aggregates.from_averages(df)
+    for col in sketches.HIST_COLS:
+        if col not in df.columns:
+            df[col] = pd.NA
 
-    # Keep a clean, consistent column order for downstream scripts and Tableau.
-    keep_cols = [
-        "SQLDATE",
-        "CountryCode",
-        "EventRootCode",
-        "EventCount",
-        "AvgTone",
-        "AvgGoldstein",
-        "TotalMentions",
-        "TotalArticles",
-        "TotalSources",
-        "date",
-        "EventRootLabel",
-        "ToneBucket",
-    ]
-    df = df[keep_cols]
-
-    df.to_parquet(OUT_PARQUET, index=False)
-    print(f"Saved cleaned dataset to: {OUT_PARQUET}")
+    # Normalize codes to 2-digit strings (01..20) so joins and maps behave.
+    df["EventRootCode"] = df["EventRootCode"].str.strip().str.zfill(2)
+
+    regions = None
+    if level == "adm1":
+        # Only non-empty region-days exist in the extract (sparse long form), sorted so each
+        # region's rows sit together in the Parquet/Arrow files.
+        regions = add_labels(df.copy(), "events_daily_adm1_clean")
+        regions = regions.sort_values(["CountryCode", "RegionCode", "date", "EventRootCode"])
+        regions = regions.reset_index(drop=True)
+
+        # The country table is the exact rollup of the regions (sums + sketches add up),
+        # so nothing is re-queried from GDELT.
+        df = aggregates.combine(df, keys=aggregates.KEYS)
+
+    return add_labels(df, "events_daily_clean"), regions
+
+
+def report_frames(df: pd.DataFrame, regions: pd.DataFrame | None = None) -> dict:
+    # Coverage numbers for the report (lazy_engine.report_frames is the Polars twin).
+    frames = {
+        "rows": len(df),
+        "date_min": df["date"].min(),
+        "date_max": df["date"].max(),
+        "missing": df.isna().sum().rename("missing"),
+        "top_roots": (
+            df.groupby(["EventRootCode", "EventRootLabel"], dropna=False)["EventCount"]
+            .sum()
+            .sort_values(ascending=False)
+            .head(10)
+            .reset_index()
+        ),
+    }
+    if regions is not None:
+        frames["adm1_rows"] = len(regions)
+        frames["adm1_regions"] = regions["RegionCode"].nunique()
+    return frames
 
+
+def write_report(path: Path, in_path: Path, frames: dict, qa: pd.DataFrame, qa_status: str) -> None:
     # Small report so the repo proves data coverage + quality at a glance.
-    with open(REPORT_PATH, "w", encoding="utf-8") as f:
+    with runs.atomic_path(path) as tmp, open(tmp, "w", encoding="utf-8") as f:
         f.write("# Events Daily — Data Quality Report\n\n")
         f.write(f"- Source extract: `{in_path.name}`\n")
-        f.write(f"- Rows: {len(df):,}\n")
-        f.write(f"- Date range: {df['date'].min().date()} → {df['date'].max().date()}\n\n")
+        f.write(f"- Rows: {frames['rows']:,}\n")
+        if "adm1_rows" in frames:
+            f.write(f"- ADM1 rows: {frames['adm1_rows']:,} ({frames['adm1_regions']:,} regions)\n")
+        f.write(f"- Date range: {frames['date_min'].date()} → {frames['date_max'].date()}\n\n")
 
         f.write("## Missing values (by column)\n\n")
-        f.write(df.isna().sum().to_frame("missing").to_markdown())
+        f.write(frames["missing"].to_frame().to_markdown())
         f.write("\n\n")
 
         f.write("## Top EventRootCode by total EventCount\n\n")
-        top_roots = (
-            df.groupby(["EventRootCode", "EventRootLabel"], dropna=False)["EventCount"]
-            .sum()
-            .sort_values(ascending=False)
-            .head(10)
-            .reset_index()
+        f.write(frames["top_roots"].to_markdown(index=False))
+        f.write("\n\n")
+
+        f.write("## Validation rules\n\n")
+        f.write(f"- Overall status: **{qa_status}**\n\n")
+        f.write(data_quality.summary(qa).to_markdown(index=False))
+        f.write("\n\n")
+
+        f.write("## Partitions needing attention\n\n")
+        flagged = qa[qa["status"] != "ok"]
+        if flagged.empty:
+            f.write("None.\n")
+        else:
+            cols = ["date", "status", "rows", "events", "drift_metrics", "volume_collapse"]
+            flagged = flagged[cols].assign(date=flagged["date"].dt.date)
+            f.write(flagged.head(30).to_markdown(index=False))
+            f.write("\n")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Clean the latest extract + write the QA report.")
+    parser.add_argument(
+        "--level",
+        choices=["country", "adm1"],
+        default="country",
+        help="adm1 cleans the regional extract and rolls the country table up from it.",
+    )
+    parser.add_argument(
+        "--extract",
+        type=Path,
+        help="Extract CSV to clean (default: the most recently written one; required with "
+        "--run-id).",
+    )
+    parser.add_argument(
+        "--run-id",
+        nargs="?",
+        const="auto",
+        help="Write to runs/<window>/<run id>/ instead of the shared paths and promote the "
+        "window's CURRENT pointer on success. Without a value a new ID is generated.",
+    )
+    lazy_engine.add_engine_arg(parser)
+    args = parser.parse_args(argv)
+    if args.engine == "polars" and args.level == "adm1":
+        parser.error("--engine polars cleans country-level extracts only")
+    if args.run_id is not None and args.extract is None:
+        # The window (and its CURRENT pointer) is named after the extract, so a run never
+        # guesses it from whichever file was written last.
+        parser.error("--run-id needs --extract")
+
+    in_path = args.extract or latest_extract_file(args.level)
+    print(f"Cleaning extract: {in_path}")
+
+    # Shared paths by default; a run gets its own tree keyed by window (the extract name).
+    window = in_path.stem
+    run_id = runs.new_run_id() if args.run_id == "auto" else args.run_id
+    layout = runs.Layout() if run_id is None else runs.Layout(runs.run_dir(window, run_id))
+    out_feather, out_parquet = schemas.clean_paths("country", layout.processed)
+    report_path = layout.reports / REPORT_PATH.name
+    qa_path = layout.qa_history
+    if run_id is not None:
+        # A run judges its partitions against the shared history (earlier windows), but
+        # appends to its own copy so concurrent backfills never race on one file.
+        if data_quality.HISTORY_PATH.exists() and not qa_path.exists():
+            with runs.atomic_path(qa_path) as tmp:
+                shutil.copyfile(data_quality.HISTORY_PATH, tmp)
+
+    if args.engine == "polars":
+        # Streams extract -> Parquet -> Arrow; QA and report stats are lazy scans of the output.
+        lazy_engine.write_clean(
+            lazy_engine.clean_plan(in_path, ROOT_LABEL, TONE_THRESHOLDS), out_parquet, out_feather
         )
-        f.write(top_roots.to_markdown(index=False))
-        f.write("\n")
+        print(f"Saved cleaned dataset to: {out_parquet}")
+        print(f"Saved Arrow hand-off to: {out_feather}")
+        written = lazy_engine.scan_clean(processed_dir=layout.processed)
+        start = time.perf_counter()
+        stats = lazy_engine.qa_stats(written)
+        frames = lazy_engine.report_frames(written)
+        head = lazy_engine.collect(written.head(5))
+    else:
+        df, regions = clean_frame(in_path, args.level)
+        if regions is not None:
+            adm1_feather, adm1_parquet = schemas.clean_paths("adm1", layout.processed)
+            with runs.atomic_path(adm1_parquet) as tmp:
+                regions.to_parquet(tmp, index=False)
+            schemas.write_feather(regions, adm1_feather, "events_daily_adm1_clean")
+            print(f"Saved ADM1 dataset to: {adm1_parquet} ({len(regions):,} rows)")
 
-    print(f"Saved report to: {REPORT_PATH}")
-    print(df.head(5).to_string(index=False))
+        with runs.atomic_path(out_parquet) as tmp:
+            df.to_parquet(tmp, index=False)
+        print(f"Saved cleaned dataset to: {out_parquet}")
+
+        # Typed Arrow IPC copy for downstream stages (memory-mapped, no re-parsing).
+        schemas.write_feather(df, out_feather, "events_daily_clean")
+        print(f"Saved Arrow hand-off to: {out_feather}")
+        start = time.perf_counter()
+        stats = data_quality.evaluate(df)
+        frames = report_frames(df, regions)
+        head = df.head(5)
+
+    # Validation rules + per-partition drift checks; the history gates publish_tableau_table.
+    qa = data_quality.record(stats, source=in_path.name, path=qa_path)
+    qa_status = next((s for s in ("fail", "warn") if (qa["status"] == s).any()), "ok")
+    print(f"Validation: {qa_status} ({time.perf_counter() - start:.2f}s, {len(qa)} partitions)")
+
+    write_report(report_path, in_path, frames, qa, qa_status)
+    print(f"Saved report to: {report_path}")
+
+    print(head.to_string(index=False))
+
+    # Everything the run wrote is in place; only now does the window point at it. A run that
+    # failed QA is kept for inspection but never becomes current.
+    if run_id is not None:
+        runs.write_manifest(
+            layout,
+            run_id=run_id,
+            window=window,
+            level=args.level,
+            extract=str(in_path.resolve()),
+            qa_status=qa_status,
+        )
+        if qa_status == "fail":
+            raise SystemExit(f"Run {run_id} failed QA; {window} still points at its previous run.")
+        runs.promote(window, run_id)
+        # Later runs and the shared publish gate judge against promoted runs' partitions.
+        data_quality.merge(qa)
+        print(f"Promoted run {run_id} as current for {window}")
 
 
 if __name__ == "__main__":
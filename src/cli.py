@@ -0,0 +1,81 @@
+import argparse
+import importlib
+import inspect
+import sys
+
+# Each subcommand maps to "module:function". Modules are imported only when their command
+# runs, so `--help`, `runlog` or `lookup` never pay for sklearn, matplotlib or BigQuery.
+COMMANDS: dict[str, tuple[str, str]] = {
+    "smoke": ("src.bq_smoke_test:main", "Run a tiny BigQuery query to check auth + access"),
+    "extract": ("src.extract_events_daily:main", "Extract daily event aggregates from GDELT"),
+    "clean": ("src.clean_events_daily:main", "Clean the latest extract + write the QA report"),
+    "publish-events": (
+        "src.publish_tableau_table:main",
+        "Publish the clean dataset to BigQuery for Tableau",
+    ),
+    "publish-extract": (
+        "src.publish_tableau_extract:main",
+        "Write the curated tables to a local Tableau .hyper extract",
+    ),
+    "viz": ("src.viz_overview:main", "Draw the overview figures"),
+    "anomalies": ("src.detect_anomalies:main", "Flag unusual country-days"),
+    "gkg-themes": ("src.create_gkg_theme_daily_table:main", "Build the GKG theme daily table"),
+    "risk-table": ("src.create_country_risk_daily_table:main", "Build country_risk_daily"),
+    "forecast": ("src.publish_risk_forecasts:main", "Train + publish country risk forecasts"),
+    "forecast-report": (
+        "src.forecast_country_risk:main",
+        "Backtest one country + write the forecast report",
+    ),
+    "evaluate-forecasts": (
+        "src.evaluate_forecasts:main",
+        "Score stored forecasts against realized risk + update rolling MAE",
+    ),
+    "spillover": (
+        "src.spillover_lead_lag:main",
+        "Lead-lag analysis of risk_raw across countries",
+    ),
+    "serve": ("src.serve_risk_forecasts:main", "Serve forecasts over local HTTP"),
+    "lookup": ("src.serve_risk_forecasts:lookup_main", "Print the latest forecast for a country"),
+    "runlog": ("src.write_run_log:main", "Write the reproducibility run log"),
+    "bench-startup": ("src.bench_startup:main", "Measure CLI + stage import startup time"),
+    "bench-engines": (
+        "src.bench_engines:main",
+        "Compare time + peak memory of the pandas and Polars engines",
+    ),
+}
+
+
+def resolve(command: str):
+    target, _ = COMMANDS[command]
+    module_name, func_name = target.split(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="GDELT news intelligence pipeline.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True, metavar="command")
+    for name, (_, help_text) in COMMANDS.items():
+        # add_help=False forwards `<command> --help` to the stage's own parser.
+        sub.add_parser(name, help=help_text, add_help=False)
+
+    # Everything after the command name belongs to the stage, so it is left unparsed here.
+    args, rest = parser.parse_known_args(argv)
+    func = resolve(args.command)
+
+    # Stage parsers read their usage line from argv[0].
+    sys.argv[0] = f"{parser.prog} {args.command}"
+
+    # Stages without options keep a zero-argument main().
+    if inspect.signature(func).parameters:
+        func(rest)
+    elif rest:
+        parser.error(f"`{args.command}` takes no options (got: {' '.join(rest)})")
+    else:
+        func()
+
+
+if __name__ == "__main__":
+    main()
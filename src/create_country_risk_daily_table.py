@@ -1,63 +1,143 @@
-from google.cloud import bigquery
+import argparse
+from pathlib import Path
+
+from src import risk_variants, runs, schemas
 
 BILLING_PROJECT = "gen-lang-client-0366281238"
 SOURCE = f"{BILLING_PROJECT}.gdelt_portfolio.events_daily_clean"
 DEST = f"{BILLING_PROJECT}.gdelt_portfolio.country_risk_daily"
+DEST_VARIANTS = f"{BILLING_PROJECT}.gdelt_portfolio.country_risk_daily_variants"
+
+# ADM1 twins: region-days from the regional clean table, partitioned by day so the many
+# regions stay cheap to filter.
+SOURCE_ADM1 = f"{BILLING_PROJECT}.gdelt_portfolio.events_daily_adm1_clean"
+DEST_ADM1 = f"{BILLING_PROJECT}.gdelt_portfolio.region_risk_daily"
+DEST_VARIANTS_ADM1 = f"{BILLING_PROJECT}.gdelt_portfolio.region_risk_daily_variants"
+
+LOCAL_VARIANTS_PATH = schemas.PROCESSED_DIR / "country_risk_daily_variants.parquet"
+LOCAL_VARIANTS_PATH_ADM1 = schemas.PROCESSED_DIR / "region_risk_daily_variants.parquet"
+
+# Checked-in copy of the baseline statement for running by hand in the BigQuery console.
+SQL_DOC_PATH = (
+    Path(__file__).resolve().parents[1] / "docs" / "sql" / "refresh_country_risk_daily.sql"
+)
+SQL_DOC_HEADER = """-- BigQuery Standard SQL
+-- Rebuilds the daily country risk table from `events_daily_clean` (baseline variant).
+-- Generated from src/risk_variants.py; do not edit by hand. Regenerate with:
+--   python -m src risk-table --print-sql > docs/sql/refresh_country_risk_daily.sql
+"""
+
 
+def baseline_statement(adm1: bool = False) -> str:
+    # Baseline only: one scan straight into the published table.
+    source, dest = (SOURCE_ADM1, DEST_ADM1) if adm1 else (SOURCE, DEST)
+    keys = risk_variants.ADM1_KEYS if adm1 else risk_variants.KEYS
+    layout = "PARTITION BY date CLUSTER BY CountryCode, RegionCode" if adm1 else ""
+    order = "" if adm1 else "ORDER BY date, CountryCode"
+    query = risk_variants.build_query(source, [risk_variants.BASELINE], keys=keys)
+    create = " ".join(filter(None, [f"CREATE OR REPLACE TABLE `{dest}`", layout, "AS"]))
+    return f"""
+{create}
+SELECT * EXCEPT(variant) FROM ({query})
+{order};
+"""
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the daily country risk table(s).")
+    parser.add_argument(
+        "--variants",
+        nargs="+",
+        metavar="NAME",
+        help="Also build the long-form variants table for these registry variants ('all' for all).",
+    )
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="Score variants from the local clean dataset instead of BigQuery.",
+    )
+    parser.add_argument(
+        "--level",
+        choices=["country", "adm1"],
+        default="country",
+        help="adm1 builds region_risk_daily from events_daily_adm1_clean.",
+    )
+    parser.add_argument(
+        "--print-sql",
+        action="store_true",
+        help="Print the baseline refresh statement (docs/sql/) instead of running anything.",
+    )
+    runs.add_run_args(parser)
+    args = parser.parse_args(argv)
+    if args.window and not args.local:
+        parser.error("--window needs --local (the BigQuery tables are shared)")
+    paths = runs.layout_for(args.window, args.run_id)
+
+    if args.print_sql:
+        print(SQL_DOC_HEADER + baseline_statement(args.level == "adm1"), end="")
+        return
+
+    # The risk definitions live in src/risk_variants.py; "baseline" is the published one.
+    requested = args.variants or []
+    if requested == ["all"]:
+        requested = list(risk_variants.VARIANTS)
+    names = list(dict.fromkeys([risk_variants.BASELINE, *requested]))
+
+    adm1 = args.level == "adm1"
+    keys = risk_variants.ADM1_KEYS if adm1 else risk_variants.KEYS
+    source, dest, dest_variants = (
+        (SOURCE_ADM1, DEST_ADM1, DEST_VARIANTS_ADM1) if adm1 else (SOURCE, DEST, DEST_VARIANTS)
+    )
+    layout = "PARTITION BY date CLUSTER BY CountryCode, RegionCode" if adm1 else ""
+    order = "" if adm1 else "ORDER BY date, CountryCode"
+
+    if args.local:
+        clean = schemas.read_events_daily_clean(args.level, paths.processed)
+        df = risk_variants.score_variants(clean, names, keys=keys)
+        out_path = (
+            paths.processed / (LOCAL_VARIANTS_PATH_ADM1 if adm1 else LOCAL_VARIANTS_PATH).name
+        )
+        with runs.atomic_path(out_path) as tmp:
+            df.to_parquet(tmp, index=False)
+        print(f"Saved: {out_path} ({len(names)} variants, {len(df):,} rows)")
+        return
+
+    from google.cloud import bigquery
 
-def main() -> None:
     # This builds a stable derived table that Tableau and modeling can reuse without reprocessing raw data.
     client = bigquery.Client(project=BILLING_PROJECT)
+    query = risk_variants.build_query(source, names, keys=keys)
 
-    # This risk table is intentionally simple and transparent:
-    # - Conflict events = selected CAMEO root codes (protest/military/coerce/assault/fight/mass violence).
-    # - Negative tone events = rows with AvgTone <= -2, weighted by EventCount.
-    # - risk_raw blends conflict share, negative share, and overall volume (log-scaled).
-    query = f"""
-    CREATE OR REPLACE TABLE `{DEST}` AS
-    WITH base AS (
-      SELECT
-        DATE(date) AS date,
-        CountryCode,
-        LPAD(CAST(EventRootCode AS STRING), 2, '0') AS EventRootCode,
-        CAST(EventCount AS INT64) AS EventCount,
-        CAST(AvgTone AS FLOAT64) AS AvgTone
-      FROM `{SOURCE}`
-      WHERE CountryCode IS NOT NULL
-        AND date IS NOT NULL
-    ),
-    agg AS (
-      SELECT
-        date,
-        CountryCode,
-        SUM(EventCount) AS total_events,
-        SUM(IF(EventRootCode IN ('14','15','16','17','18','19','20'), EventCount, 0)) AS conflict_events,
-        SUM(IF(AvgTone <= -2, EventCount, 0)) AS negative_tone_events,
-        SAFE_DIVIDE(SUM(AvgTone * EventCount), SUM(EventCount)) AS weighted_avg_tone
-      FROM base
-      GROUP BY date, CountryCode
+    if len(names) == 1:
+        client.query(baseline_statement(adm1)).result()
+        print(f"Created: {dest}")
+        return
+
+    # All variants come from one scan of the source; the baseline table is then cut from the
+    # (much smaller) long table instead of rescanning the clean events table.
+    variants_layout = (
+        "PARTITION BY date CLUSTER BY variant, CountryCode, RegionCode"
+        if adm1
+        else "CLUSTER BY variant, CountryCode"
     )
-    SELECT
-      date,
-      CountryCode,
-      total_events,
-      conflict_events,
-      negative_tone_events,
-      weighted_avg_tone,
-      SAFE_DIVIDE(conflict_events, total_events) AS conflict_share,
-      SAFE_DIVIDE(negative_tone_events, total_events) AS negative_share,
-      LOG(1 + total_events) AS log_events,
-      (
-        1.5 * SAFE_DIVIDE(conflict_events, total_events)
-        + 1.0 * SAFE_DIVIDE(negative_tone_events, total_events)
-        + 0.5 * LOG(1 + total_events)
-      ) AS risk_raw
-    FROM agg
-    ORDER BY date, CountryCode
-    """
-
-    client.query(query).result()
-    print(f"Created: {DEST}")
+    client.query(
+        f"""
+        CREATE OR REPLACE TABLE `{dest_variants}`
+        {variants_layout} AS
+        {query}
+        """
+    ).result()
+    print(f"Created: {dest_variants} ({len(names)} variants)")
+
+    client.query(
+        f"""
+        CREATE OR REPLACE TABLE `{dest}` {layout} AS
+        SELECT * EXCEPT(variant) FROM `{dest_variants}`
+        WHERE variant = '{risk_variants.BASELINE}'
+        {order}
+        """
+    ).result()
+    print(f"Created: {dest}")
 
 
 if __name__ == "__main__":
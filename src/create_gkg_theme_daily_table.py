@@ -1,5 +1,3 @@
-from google.cloud import bigquery
-
 BILLING_PROJECT = "gen-lang-client-0366281238"
 SOURCE_TABLE = "gdelt-bq.gdeltv2.gkg_partitioned"
 DEST_TABLE = f"{BILLING_PROJECT}.gdelt_portfolio.gkg_theme_daily_20251001_20260101"
@@ -17,6 +15,8 @@ def pick_field(fields: set[str], candidates: list[str]) -> str:
 
 
 def main() -> None:
+    from google.cloud import bigquery
+
     client = bigquery.Client(project=BILLING_PROJECT)
 
     table = client.get_table(SOURCE_TABLE)
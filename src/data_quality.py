@@ -0,0 +1,203 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import runs, schemas
+
+HISTORY_PATH = schemas.PROCESSED_DIR / "qa_history.parquet"
+
+# QA stats are kept per daily partition of the clean table.
+PARTITION = "date"
+GRAIN = ["date", "CountryCode", "EventRootCode"]
+
+# Declarative row-level rules. Each rule compiles to one vectorized boolean column, and all
+# of them are counted per partition in a single groupby, so a new rule is a new dict entry,
+# not another pass over the data. Range rules ignore nulls; nulls have their own rules.
+RULES = {
+    "goldstein_out_of_range": {
+        "kind": "range",
+        "column": "AvgGoldstein",
+        "lo": -10.0,
+        "hi": 10.0,
+        "severity": "error",
+    },
+    "tone_out_of_range": {
+        "kind": "range",
+        "column": "AvgTone",
+        "lo": -100.0,
+        "hi": 100.0,
+        "severity": "error",
+    },
+    "non_positive_event_count": {
+        "kind": "range",
+        "column": "EventCount",
+        "lo": 1,
+        "hi": None,
+        "severity": "error",
+    },
+    "missing_country": {"kind": "not_null", "column": "CountryCode", "severity": "error"},
+    "missing_tone": {"kind": "not_null", "column": "AvgTone", "severity": "warn"},
+    "unknown_root_code": {
+        "kind": "in_set",
+        "column": "EventRootCode",
+        "values": [f"{i:02d}" for i in range(1, 21)],
+        "severity": "warn",
+    },
+    "duplicate_key": {"kind": "unique", "columns": GRAIN, "severity": "error"},
+}
+
+# Partition-level checks against trailing history (previous runs included).
+DRIFT_METRICS = ["rows", "events", "avg_tone", "missing_tone_rate"]
+DRIFT_WINDOW = 14
+DRIFT_MIN_HISTORY = 7
+DRIFT_Z = 4.0
+# A partition whose volume drops below this share of the trailing median counts as collapsed.
+COLLAPSE_RATIO = 0.3
+
+
+def violations(df: pd.DataFrame, rules: dict = RULES) -> pd.DataFrame:
+    # One boolean column per rule, True where the row breaks it.
+    out = {}
+    for name, rule in rules.items():
+        kind = rule["kind"]
+        if kind == "range":
+            col = df[rule["column"]]
+            bad = pd.Series(False, index=df.index)
+            if rule["lo"] is not None:
+                bad |= col < rule["lo"]
+            if rule["hi"] is not None:
+                bad |= col > rule["hi"]
+            out[name] = bad.fillna(False).astype(bool)
+        elif kind == "not_null":
+            out[name] = df[rule["column"]].isna()
+        elif kind == "in_set":
+            out[name] = ~df[rule["column"]].isin(rule["values"])
+        elif kind == "unique":
+            out[name] = df.duplicated(rule["columns"], keep=False)
+        else:
+            raise ValueError(f"Unknown rule kind {kind!r} in rule {name!r}")
+    return pd.DataFrame(out, index=df.index)
+
+
+def evaluate(df: pd.DataFrame, rules: dict = RULES) -> pd.DataFrame:
+    # Per-partition stats in one pass. Every column is a count or a sum, so stats for
+    # chunks of the same partition combine by addition.
+    frame = violations(df, rules)
+    frame["rows"] = 1
+    frame["events"] = df["EventCount"]
+    frame["tone_count"] = df["ToneCount"]
+    frame["sum_tone"] = df["SumTone"]
+
+    stats = frame.groupby(df[PARTITION], dropna=False).sum(min_count=1).fillna(0)
+    stats = stats.astype({name: "int64" for name in rules} | {"rows": "int64"})
+    return finalize(stats.reset_index())
+
+
+def finalize(stats: pd.DataFrame) -> pd.DataFrame:
+    # Ratios are re-derived from the counts, never stored and merged directly.
+    stats["avg_tone"] = stats["sum_tone"] / stats["tone_count"].replace(0, np.nan)
+    stats["missing_tone_rate"] = stats["missing_tone"] / stats["rows"].replace(0, np.nan)
+    return stats
+
+
+def drift(stats: pd.DataFrame, history: pd.DataFrame) -> pd.DataFrame:
+    # Scores one source's partitions against the other sources' history. Extract windows
+    # overlap at their edges, so the reference keeps the best-covered earlier row per date;
+    # the source's own rows only fill dates no earlier source covers. A re-extract of covered
+    # dates is therefore judged against what was there before, not against itself.
+    ref = history.dropna(subset=[PARTITION]).sort_values("events")
+    ref = ref.drop_duplicates(PARTITION, keep="last")
+    own = stats.dropna(subset=[PARTITION])
+    ref = pd.concat([ref, own[~own[PARTITION].isin(ref[PARTITION])]], ignore_index=True)
+    ref = ref.sort_values(PARTITION).reset_index(drop=True)
+
+    # Trailing stats over the reference dates strictly before each partition, so a spike
+    # can't hide in its own baseline.
+    past = ref[DRIFT_METRICS].rolling(DRIFT_WINDOW, min_periods=DRIFT_MIN_HISTORY)
+    before = ref[PARTITION].searchsorted(own[PARTITION], side="left") - 1
+    mean = past.mean().reindex(before).set_axis(own.index)
+    std = past.std().reindex(before).set_axis(own.index)
+    median = past.median()["events"].reindex(before).set_axis(own.index)
+
+    z = (own[DRIFT_METRICS] - mean) / std.replace(0, np.nan)
+    flags = z.abs() > DRIFT_Z
+
+    out = own[[PARTITION]].copy()
+    out["drift_metrics"] = flags.dot(pd.Index(DRIFT_METRICS) + ",").str.rstrip(",")
+    out["volume_collapse"] = own["events"] < COLLAPSE_RATIO * median
+    return out
+
+
+def status(stats: pd.DataFrame, rules: dict = RULES) -> pd.Series:
+    # fail = any error-rule violation or a volume collapse; warn = warn rules or drift.
+    errors = [n for n, r in rules.items() if r["severity"] == "error"]
+    warns = [n for n, r in rules.items() if r["severity"] == "warn"]
+    failed = (stats[errors].sum(axis=1) > 0) | stats["volume_collapse"]
+    warned = (stats[warns].sum(axis=1) > 0) | (stats["drift_metrics"] != "")
+    return pd.Series(np.select([failed, warned], ["fail", "warn"], "ok"), index=stats.index)
+
+
+def load_history(path: Path = HISTORY_PATH) -> pd.DataFrame:
+    return pd.read_parquet(path) if path.exists() else pd.DataFrame()
+
+
+def check(df: pd.DataFrame, source: str, path: Path = HISTORY_PATH) -> pd.DataFrame:
+    # Evaluates a clean dataset, scores it against stored history and appends it there.
+    return record(evaluate(df), source, path)
+
+
+def record(stats: pd.DataFrame, source: str, path: Path = HISTORY_PATH) -> pd.DataFrame:
+    # Scores per-partition stats (from evaluate or the lazy engine) against stored history.
+    # Rerunning the same source replaces its earlier rows instead of duplicating them.
+    stats["source"] = source
+    stats["checked_at"] = pd.Timestamp.now(tz="UTC")
+
+    with runs.locked(path):
+        history = load_history(path)
+        if len(history):
+            history = history[history["source"] != source]
+        flags = drift(stats, history if len(history) else stats.iloc[:0])
+        stats = stats.merge(flags, on=PARTITION, how="left")
+        stats["drift_metrics"] = stats["drift_metrics"].fillna("")
+        stats["volume_collapse"] = stats["volume_collapse"].eq(True)
+        stats["status"] = status(stats)
+
+        # Past runs keep the status they were given.
+        _write(pd.concat([history, stats], ignore_index=True), path)
+    return stats
+
+
+def merge(stats: pd.DataFrame, path: Path = HISTORY_PATH) -> None:
+    # Folds a promoted run's scored partitions into the shared history, replacing earlier
+    # rows of the same source, so later runs and the publish gate see them.
+    with runs.locked(path):
+        history = load_history(path)
+        if len(history):
+            history = history[~history["source"].isin(stats["source"].unique())]
+        _write(pd.concat([history, stats], ignore_index=True), path)
+
+
+def _write(history: pd.DataFrame, path: Path) -> None:
+    with runs.atomic_path(path) as tmp:
+        history.sort_values([PARTITION, "checked_at"]).to_parquet(tmp, index=False)
+
+
+def failed_partitions(path: Path = HISTORY_PATH) -> pd.DataFrame:
+    # The publish gate: failing partitions from the most recent QA run.
+    history = load_history(path)
+    if history.empty:
+        raise FileNotFoundError(f"No QA history at {path}. Run clean_events_daily.py first.")
+    latest = history[history["checked_at"] == history["checked_at"].max()]
+    return latest[latest["status"] == "fail"]
+
+
+def summary(stats: pd.DataFrame, rules: dict = RULES) -> pd.DataFrame:
+    # Rule-level totals for the report.
+    return pd.DataFrame(
+        {
+            "rule": list(rules),
+            "severity": [r["severity"] for r in rules.values()],
+            "violations": [int(stats[n].sum()) for n in rules],
+        }
+    )
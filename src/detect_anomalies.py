@@ -1,100 +1,89 @@
+import argparse
 from pathlib import Path
 
-import matplotlib
 import numpy as np
 import pandas as pd
 
-matplotlib.use("Agg")
-
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.ensemble import IsolationForest
-from sklearn.preprocessing import StandardScaler
+from src import aggregates, lazy_engine, runs
+from src.schemas import read_events_daily_clean
 
 ROOT = Path(__file__).resolve().parents[1]
-IN_PARQUET = ROOT / "data" / "processed" / "events_daily_clean.parquet"
-IN_FALLBACK = ROOT / "data" / "processed" / "events_daily_clean.csv.gz"
 
 OUT_REPORTS = ROOT / "reports" / "anomalies"
-OUT_REPORTS.mkdir(parents=True, exist_ok=True)
-
 FIG_DIR = ROOT / "reports" / "figures"
-FIG_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def save_fig(name: str) -> None:
+def save_fig(name: str, fig_dir: Path = FIG_DIR) -> None:
     # This writes a real image file that will render on GitHub.
-    out = FIG_DIR / name
+    import matplotlib.pyplot as plt
+
+    out = fig_dir / name
     plt.tight_layout()
-    plt.savefig(out, dpi=200)
+    with runs.atomic_path(out) as tmp:
+        plt.savefig(tmp, dpi=200)
     plt.close()
     print(f"Saved: {out}")
 
 
-def safe_read_clean() -> pd.DataFrame:
-    # This prefers Parquet for speed, but still works if only the gzipped CSV exists.
-    if IN_PARQUET.exists():
-        return pd.read_parquet(IN_PARQUET)
-    if IN_FALLBACK.exists():
-        return pd.read_csv(IN_FALLBACK)
-    raise FileNotFoundError(
-        "Clean dataset not found in data/processed/. Run clean_events_daily.py first."
-    )
-
+def add_rolling_z(panel: pd.DataFrame, entity: str) -> pd.DataFrame:
+    # This creates rolling baselines per entity so “unusual” means unusual for that country
+    # (or region). Grouped rolling runs in compiled code, so thousands of ADM1 regions cost
+    # about the same per row as a few hundred countries. Sparse regions only have rows for
+    # days with events, so their baseline is their last 7 observed days.
+    panel = panel.sort_values([entity, "date"]).reset_index(drop=True)
+    for col, out in [
+        ("log_events", "z_events_7d"),
+        ("log_mentions", "z_mentions_7d"),
+        ("AvgTone", "z_tone_7d"),
+        ("AvgGoldstein", "z_goldstein_7d"),
+    ]:
+        roll = panel.groupby(entity, sort=False)[col].rolling(window=7, min_periods=3)
+        roll_mean = roll.mean().reset_index(level=0, drop=True)
+        roll_std = roll.std().reset_index(level=0, drop=True)
+
+        z = (panel[col] - roll_mean) / roll_std.replace(0, np.nan)
+        panel[out] = z.fillna(0)
+    return panel
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Flag unusual country-days (or region-days).")
+    parser.add_argument("--level", choices=list(aggregates.LEVELS), default="country")
+    runs.add_run_args(parser)
+    lazy_engine.add_engine_arg(parser)
+    args = parser.parse_args(argv)
+    layout = runs.layout_for(args.window, args.run_id)
+    entity = aggregates.LEVELS[args.level]
+    keys = list(dict.fromkeys(["date", "CountryCode", entity]))
+
+    # Plotting and modeling libraries load only when the stage actually runs.
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
 
-def main() -> None:
     sns.set_theme(style="whitegrid")
 
-    df = safe_read_clean()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
-
-    # These weighted numerators let us recompute country-day averages from root-code rows.
-    df["tone_x_events"] = df["AvgTone"] * df["EventCount"]
-    df["gold_x_events"] = df["AvgGoldstein"] * df["EventCount"]
-
-    # This collapses root-code rows into one row per (date, country).
-    panel = (
-        df.groupby(["date", "CountryCode"], as_index=False)
-        .agg(
-            EventCount=("EventCount", "sum"),
-            TotalMentions=("TotalMentions", "sum"),
-            TotalArticles=("TotalArticles", "sum"),
-            TotalSources=("TotalSources", "sum"),
-            tone_x_events=("tone_x_events", "sum"),
-            gold_x_events=("gold_x_events", "sum"),
-        )
-        .sort_values(["CountryCode", "date"])
-        .reset_index(drop=True)
-    )
-
-    # These are the country-day averages we want to model.
-    panel["AvgTone"] = panel["tone_x_events"] / panel["EventCount"].replace(0, np.nan)
-    panel["AvgGoldstein"] = panel["gold_x_events"] / panel["EventCount"].replace(0, np.nan)
+    # This folds root-code rows into one row per (date, country) by adding their partial sums,
+    # which re-derives exact country-day averages (no multiply-back approximation).
+    if args.engine == "polars":
+        # Only the key and sum columns are scanned; the row-level table is never loaded.
+        panel = lazy_engine.panel(lazy_engine.scan_clean(args.level, layout.processed), keys)
+    else:
+        # The schema registry already hands back a typed datetime column (no re-parsing).
+        df = read_events_daily_clean(args.level, layout.processed)
+        df = df.dropna(subset=["date"])
+        panel = aggregates.combine(df, keys=keys, with_sketches=False)
 
     # These logs tame extreme counts while keeping zero safe.
     panel["log_events"] = np.log1p(panel["EventCount"])
     panel["log_mentions"] = np.log1p(panel["TotalMentions"])
 
-    # This creates rolling baselines per country so “unusual” means unusual for that country.
-    def add_rolling(group: pd.DataFrame) -> pd.DataFrame:
-        group = group.sort_values("date").copy()
-
-        for col, out in [
-            ("log_events", "z_events_7d"),
-            ("log_mentions", "z_mentions_7d"),
-            ("AvgTone", "z_tone_7d"),
-            ("AvgGoldstein", "z_goldstein_7d"),
-        ]:
-            roll_mean = group[col].rolling(window=7, min_periods=3).mean()
-            roll_std = group[col].rolling(window=7, min_periods=3).std()
-
-            z = (group[col] - roll_mean) / roll_std.replace(0, np.nan)
-            group[out] = z.fillna(0)
-
-        return group
-
-    panel = panel.groupby("CountryCode", group_keys=False).apply(add_rolling)
+    panel = add_rolling_z(panel, entity)
 
     # This is the feature set the anomaly model will learn from.
     feature_cols = ["z_events_7d", "z_mentions_7d", "z_tone_7d", "z_goldstein_7d"]
@@ -123,8 +112,7 @@ def main() -> None:
         .loc[
             :,
             [
-                "date",
-                "CountryCode",
+                *keys,
                 "EventCount",
                 "AvgTone",
                 "AvgGoldstein",
@@ -133,13 +121,14 @@ def main() -> None:
             ],
         ]
     )
-    top_path = OUT_REPORTS / "top_50_country_day_anomalies.csv"
-    top.to_csv(top_path, index=False)
+    top_path = layout.reports / OUT_REPORTS.name / f"top_50_{args.level}_day_anomalies.csv"
+    with runs.atomic_path(top_path) as tmp:
+        top.to_csv(tmp, index=False)
     print(f"Saved: {top_path}")
 
-    # This draws a single clear plot for the highest-activity country in the window.
-    top_country = panel.groupby("CountryCode")["EventCount"].sum().idxmax()
-    one = panel[panel["CountryCode"] == top_country].copy()
+    # This draws a single clear plot for the highest-activity country (or region) in the window.
+    top_entity = panel.groupby(entity)["EventCount"].sum().idxmax()
+    one = panel[panel[entity] == top_entity].copy()
     one = one.sort_values("date")
 
     plt.figure(figsize=(11, 4))
@@ -148,11 +137,11 @@ def main() -> None:
     anomalies = one[one["anomaly_label"] == -1]
     plt.scatter(anomalies["date"], anomalies["EventCount"], label="Anomaly", marker="x")
 
-    plt.title(f"Daily EventCount with Detected Anomalies ({top_country})")
+    plt.title(f"Daily EventCount with Detected Anomalies ({top_entity})")
     plt.xlabel("Date")
     plt.ylabel("EventCount")
     plt.legend()
-    save_fig("07_anomalies_top_country_eventcount.png")
+    save_fig(f"07_anomalies_top_{args.level}_eventcount.png", layout.figures)
 
 
 if __name__ == "__main__":
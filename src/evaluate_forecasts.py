@@ -0,0 +1,62 @@
+import argparse
+from datetime import date, timedelta
+
+from src import forecast_history
+from src.forecast_history import PROJECT, TABLES
+
+LOCATION = "US"
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Score stored forecasts against realized risk.")
+    parser.add_argument("--level", choices=list(TABLES), default="country")
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="First rewrite the forecast history (drops same-day reruns, merges small appends).",
+    )
+    args = parser.parse_args(argv)
+    t = TABLES[args.level]
+
+    from google.api_core.exceptions import NotFound
+    from google.cloud import bigquery
+
+    client = bigquery.Client(project=PROJECT, location=LOCATION)
+
+    if args.compact:
+        client.query(forecast_history.compact_sql(args.level)).result()
+        print(f"Compacted: {PROJECT}.{t['history']}")
+
+    # Forecasts without an error row are scored once their day is observed, so one entity's
+    # late actuals don't hold back (or skip) anyone else's.
+    try:
+        client.get_table(f"{PROJECT}.{t['errors']}")
+        errors_exist = True
+    except NotFound:
+        errors_exist = False
+    today = date.today()
+    print(
+        f"Scoring unscored forecasts from runs since {today - timedelta(days=forecast_history.MAX_LOOKBACK_DAYS)}"
+    )
+
+    job_config = bigquery.QueryJobConfig(
+        destination=f"{PROJECT}.{t['errors']}",
+        write_disposition="WRITE_APPEND",
+        time_partitioning=bigquery.TimePartitioning(field="forecast_date"),
+        clustering_fields=t["keys"],
+    )
+    query = forecast_history.evaluate_sql(today, args.level, errors_exist)
+    n_new = client.query(query, job_config=job_config).result().total_rows
+    print(f"Appended {n_new} realized forecast(s) to {PROJECT}.{t['errors']}")
+
+    # Rolling MAE reads only the last MAE_WINDOW_DAYS partitions of the errors table.
+    client.query(forecast_history.mae_sql(args.level)).result()
+    mae = client.query(
+        f"SELECT * FROM `{PROJECT}.{t['mae']}` ORDER BY mae DESC LIMIT 10"
+    ).to_dataframe()
+    print(f"Updated: {PROJECT}.{t['mae']}")
+    print(mae.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
+import argparse
+import random
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
 from pathlib import Path
 
-from google.cloud import bigquery
+import pandas as pd
+
+from src.aggregates import KEYS, PARTIALS_SQL, combine, level_keys
+from src.runs import atomic_path
+from src.sketches import bin_sql, encode_frame, hist_sql
 
 BILLING_PROJECT = "gen-lang-client-0366281238"
 
@@ -11,39 +21,187 @@ TABLE = "gdelt-bq.gdeltv2.events_partitioned"
 START = "2025-10-01"
 END = "2026-01-10"
 
+ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_DIR = ROOT / "data" / "extracts"
+CHUNK_ROOT = EXTRACT_DIR / "chunks"
 
-def main() -> None:
-    client = bigquery.Client(project=BILLING_PROJECT)
 
-    # Save extracts locally (ignored by git)
-    root = Path(__file__).resolve().parents[1]
-    out_dir = root / "data" / "extracts"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / f"events_daily_{START.replace('-', '')}_{END.replace('-', '')}.csv"
+# Events without an ADM1 code stay visible as a country-wide "region" named by the country.
+REGION_SQL = "COALESCE(NULLIF(ActionGeo_ADM1Code, ''), ActionGeo_CountryCode)"
+
 
+def build_query(start: str, end: str, level: str = "country") -> str:
     # Aggregate inside BigQuery (massive tables) and download only the result
     # Partition filter uses constant timestamps for pruning
-    query = f"""
+    # Counts/sums/sums of squares (not just averages) so partial extracts merge exactly
+    # Per-cell fixed-bin histograms of event-level tone/Goldstein come from the same scan
+    # ADM1 level adds the region to the GROUP BY; only non-empty region-days come back
+    region = f"\n      {REGION_SQL} AS RegionCode," if level == "adm1" else ""
+    keys = ", ".join(level_keys(level))
+    return f"""
     SELECT
       SQLDATE,
-      ActionGeo_CountryCode AS CountryCode,
+      ActionGeo_CountryCode AS CountryCode,{region}
       EventRootCode,
-      COUNT(1) AS EventCount,
       AVG(AvgTone) AS AvgTone,
-      AVG(GoldsteinScale) AS AvgGoldstein,
-      SUM(NumMentions) AS TotalMentions,
-      SUM(NumArticles) AS TotalArticles,
-      SUM(NumSources) AS TotalSources
-    FROM `{TABLE}`
-    WHERE _PARTITIONTIME >= TIMESTAMP('{START}')
-      AND _PARTITIONTIME <  TIMESTAMP('{END}')
-      AND ActionGeo_CountryCode IS NOT NULL
-    GROUP BY SQLDATE, CountryCode, EventRootCode
-    ORDER BY SQLDATE, CountryCode, EventRootCode
+      AVG(GoldsteinScale) AS AvgGoldstein,{PARTIALS_SQL},
+      {hist_sql("ToneHist", "ToneBin")},
+      {hist_sql("GoldsteinHist", "GoldsteinBin")}
+    FROM (
+      SELECT
+        *,
+        {bin_sql("ToneHist")} AS ToneBin,
+        {bin_sql("GoldsteinHist")} AS GoldsteinBin
+      FROM `{TABLE}`
+      WHERE _PARTITIONTIME >= TIMESTAMP('{start}')
+        AND _PARTITIONTIME <  TIMESTAMP('{end}')
+        AND ActionGeo_CountryCode IS NOT NULL
+    )
+    GROUP BY {keys}
+    ORDER BY {keys}
     """
 
-    df = client.query(query).to_dataframe()
-    df.to_csv(out_path, index=False)
+
+def window_name(start: str, end: str, level: str = "country") -> str:
+    prefix = "events_daily_adm1" if level == "adm1" else "events_daily"
+    return f"{prefix}_{start.replace('-', '')}_{end.replace('-', '')}"
+
+
+def partition_chunks(start: str, end: str, chunk_days: int) -> list[tuple[str, str]]:
+    # This splits [start, end) on day-partition boundaries so every chunk prunes cleanly.
+    lo, hi = date.fromisoformat(start), date.fromisoformat(end)
+    if chunk_days < 1 or lo >= hi:
+        raise ValueError(f"Need start < end and chunk_days >= 1 (got {start}, {end}, {chunk_days})")
+
+    chunks = []
+    while lo < hi:
+        nxt = min(lo + timedelta(days=chunk_days), hi)
+        chunks.append((lo.isoformat(), nxt.isoformat()))
+        lo = nxt
+    return chunks
+
+
+def with_retry(
+    fn: Callable[[], pd.DataFrame],
+    retries: int = 3,
+    backoff_s: float = 2.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> pd.DataFrame:
+    # Exponential backoff with jitter so concurrent chunks don't retry in lockstep.
+    for attempt in range(retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = backoff_s * 2**attempt * (1 + random.random())
+            print(f"  retry {attempt + 1}/{retries} in {wait:.1f}s after: {e}")
+            sleep(wait)
+    raise AssertionError("unreachable")
+
+
+def write_atomic(df: pd.DataFrame, path: Path) -> None:
+    # Write-then-rename so an interrupted run never leaves a half-written checkpoint behind.
+    with atomic_path(path) as tmp:
+        df.to_parquet(tmp, index=False)
+
+
+def merge_chunks(parts: list[pd.DataFrame], keys: list[str] = KEYS) -> pd.DataFrame:
+    # The same SQLDATE can land in neighbouring _PARTITIONTIME chunks, so fold the partials
+    # for each key together; the sums make this exact.
+    return combine(pd.concat(parts, ignore_index=True), keys=keys)
+
+
+def backfill(
+    start: str,
+    end: str,
+    extract: Callable[[str, str], pd.DataFrame],
+    chunk_days: int = 7,
+    workers: int = 4,
+    retries: int = 3,
+    chunk_dir: Path | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+    level: str = "country",
+) -> pd.DataFrame:
+    # This runs missing chunks concurrently and checkpoints each one as soon as it lands.
+    chunk_dir = chunk_dir or CHUNK_ROOT / window_name(start, end, level)
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+
+    chunks = partition_chunks(start, end, chunk_days)
+    paths = {c: chunk_dir / f"chunk_{c[0]}_{c[1]}.parquet" for c in chunks}
+    todo = [c for c in chunks if not paths[c].exists()]
+    print(f"Chunks: {len(chunks)} total, {len(chunks) - len(todo)} already checkpointed")
+
+    def run(chunk: tuple[str, str]) -> tuple[str, str]:
+        df = with_retry(lambda: extract(*chunk), retries=retries, sleep=sleep)
+        write_atomic(df, paths[chunk])
+        return chunk
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, c): c for c in todo}
+        for fut in as_completed(futures):
+            chunk = futures[fut]
+            try:
+                fut.result()
+                print(f"  done {chunk[0]} → {chunk[1]}")
+            except Exception as e:
+                failed.append(chunk)
+                print(f"  FAILED {chunk[0]} → {chunk[1]}: {e}")
+
+    if failed:
+        # Finished chunks stay checkpointed, so rerunning the same window resumes here.
+        raise RuntimeError(f"{len(failed)} chunk(s) failed; rerun to resume: {sorted(failed)}")
+
+    return merge_chunks([pd.read_parquet(paths[c]) for c in chunks], keys=level_keys(level))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Extract daily event aggregates from GDELT.")
+    parser.add_argument("--start", default=START, help="First partition day (inclusive).")
+    parser.add_argument("--end", default=END, help="Last partition day (exclusive).")
+    parser.add_argument(
+        "--backfill",
+        action="store_true",
+        help="Split the window into chunks, run them concurrently and checkpoint each one.",
+    )
+    parser.add_argument("--chunk-days", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument(
+        "--level",
+        choices=["country", "adm1"],
+        default="country",
+        help="Geographic grain; adm1 adds RegionCode (country tables roll up from it).",
+    )
+    args = parser.parse_args(argv)
+
+    from google.cloud import bigquery
+
+    client = bigquery.Client(project=BILLING_PROJECT)
+
+    def extract(start: str, end: str) -> pd.DataFrame:
+        return encode_frame(client.query(build_query(start, end, args.level)).to_dataframe())
+
+    # Save extracts locally (ignored by git)
+    EXTRACT_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = EXTRACT_DIR / f"{window_name(args.start, args.end, args.level)}.csv"
+
+    if args.backfill:
+        df = backfill(
+            args.start,
+            args.end,
+            extract,
+            chunk_days=args.chunk_days,
+            workers=args.workers,
+            retries=args.retries,
+            level=args.level,
+        )
+    else:
+        df = extract(args.start, args.end)
+
+    with atomic_path(out_path) as tmp:
+        df.to_csv(tmp, index=False)
 
     print(f"Saved: {out_path}")
     print("Rows:", len(df))
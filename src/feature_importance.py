@@ -0,0 +1,141 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import runs
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "models" / "importance_cache"
+
+# Importance engines for tree ensembles, cheapest first:
+# - impurity: the forest's own mean decrease in impurity (free after fit, biased toward
+#   high-cardinality features)
+# - tree_path: Saabas path attributions: each split's change in node mean is credited to the
+#   split feature; one decision_path call for the whole forest. Additive per prediction, but
+#   biased toward features split near the root (an approximation, not TreeSHAP)
+# - permutation: drop in score when a feature is shuffled; repeats run in parallel on a
+#   row subsample (the report's only method before engines were selectable)
+ENGINES = ["impurity", "tree_path", "permutation"]
+DEFAULT_ENGINE = "tree_path"
+
+# One line per engine for the report, so readers know what the numbers measure.
+DESCRIPTIONS = {
+    "impurity": "mean decrease in impurity from training (biased toward high-cardinality features)",
+    "tree_path": "mean |Saabas path attribution| on the last fold (additive per prediction, "
+    "biased toward splits near the root; not TreeSHAP)",
+    "permutation": "mean drop in R² when the feature is shuffled on the last fold",
+}
+
+PERMUTATION_REPEATS = 10
+PERMUTATION_MAX_SAMPLES = 0.5
+
+
+def model_version(model, X_train: np.ndarray, y_train: np.ndarray) -> str:
+    # A fitted forest is fully determined by its params, the sklearn release and the data it
+    # was trained on, so their fingerprint names the model without pickling 500 trees.
+    import sklearn
+
+    h = hashlib.sha256()
+    h.update(repr(sorted(model.get_params().items())).encode())
+    h.update(sklearn.__version__.encode())
+    h.update(np.ascontiguousarray(X_train, dtype="float64").tobytes())
+    h.update(np.ascontiguousarray(y_train, dtype="float64").tobytes())
+    return h.hexdigest()[:16]
+
+
+def tree_path_contributions(model, X: np.ndarray) -> tuple[np.ndarray, float]:
+    # Per-row, per-feature Saabas contributions; bias + contributions.sum(axis=1) equals
+    # model.predict(X), though the split between features is biased (not SHAP values).
+    # Every node except a root carries (its value - its parent's value) on the parent's split
+    # feature, so a row's attributions are its path indicator times that node table.
+    paths, node_ptr = model.decision_path(X)
+    n_features = X.shape[1]
+    rows, cols, vals = [], [], []
+    bias = 0.0
+    for t, est in enumerate(model.estimators_):
+        tree = est.tree_
+        value = tree.value[:, 0, 0]
+        parent = np.full(tree.node_count, -1)
+        for children in (tree.children_left, tree.children_right):
+            inner = children >= 0
+            parent[children[inner]] = np.flatnonzero(inner)
+        child = np.flatnonzero(parent >= 0)
+        rows.append(node_ptr[t] + child)
+        cols.append(tree.feature[parent[child]])
+        vals.append(value[child] - value[parent[child]])
+        bias += value[0]
+
+    n_trees = len(model.estimators_)
+    table = np.zeros((node_ptr[-1], n_features))
+    np.add.at(table, (np.concatenate(rows), np.concatenate(cols)), np.concatenate(vals))
+    contributions = np.asarray(paths @ table) / n_trees
+    return contributions, bias / n_trees
+
+
+def compute(
+    model,
+    X: np.ndarray,
+    y: np.ndarray,
+    engine: str = DEFAULT_ENGINE,
+    n_repeats: int = PERMUTATION_REPEATS,
+    max_samples: float = PERMUTATION_MAX_SAMPLES,
+    n_jobs: int = -1,
+) -> np.ndarray:
+    if engine == "impurity":
+        return model.feature_importances_
+    if engine == "tree_path":
+        contributions, _ = tree_path_contributions(model, X)
+        return np.abs(contributions).mean(axis=0)
+    if engine == "permutation":
+        from sklearn.inspection import permutation_importance
+
+        perm = permutation_importance(
+            model,
+            X,
+            y,
+            n_repeats=n_repeats,
+            max_samples=max_samples,
+            n_jobs=n_jobs,
+            random_state=42,
+        )
+        return perm.importances_mean
+    raise ValueError(f"Unknown importance engine {engine!r}. Known: {ENGINES}")
+
+
+def explain(
+    model,
+    X: np.ndarray,
+    y: np.ndarray,
+    feature_cols: list[str],
+    version: str,
+    engine: str = DEFAULT_ENGINE,
+    cache_dir: Path | None = CACHE_DIR,
+    **options,
+) -> tuple[pd.DataFrame, dict]:
+    # Importance table sorted descending, plus how it was obtained (engine, seconds, cache hit).
+    # Results are cached per model version, engine, options and evaluation rows.
+    h = hashlib.sha256(json.dumps([engine, sorted(options.items())]).encode())
+    h.update(np.ascontiguousarray(X, dtype="float64").tobytes())
+    h.update(np.ascontiguousarray(y, dtype="float64").tobytes())
+    path = (
+        None if cache_dir is None else cache_dir / f"{version}_{engine}_{h.hexdigest()[:12]}.json"
+    )
+
+    if path is not None and path.exists():
+        cached = json.loads(path.read_text(encoding="utf-8"))
+        values, seconds, hit = cached["importance"], cached["seconds"], True
+    else:
+        start = time.perf_counter()
+        values = compute(model, X, y, engine, **options).tolist()
+        seconds, hit = time.perf_counter() - start, False
+        if path is not None:
+            payload = {"engine": engine, "seconds": seconds, "importance": values}
+            runs.write_text(path, json.dumps(payload))
+
+    imp = pd.DataFrame({"feature": feature_cols, "importance": values})
+    imp = imp.sort_values("importance", ascending=False).reset_index(drop=True)
+    return imp, {"engine": engine, "version": version, "seconds": seconds, "cached": hit}
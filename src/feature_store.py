@@ -0,0 +1,110 @@
+from pathlib import Path
+
+import pandas as pd
+
+from src import runs
+from src.publish_risk_forecasts import FEATURE_COLS, LAGS, make_panel_features, target_col
+
+ROOT = Path(__file__).resolve().parents[1]
+STORE_ROOT = ROOT / "data" / "feature_store"
+
+# Raw daily columns the features are built from (what publish_risk_forecasts selects).
+RAW_COLS = [
+    "total_events",
+    "conflict_share",
+    "negative_share",
+    "weighted_avg_tone",
+    "risk_raw",
+]
+
+# Lags and rolling windows count observed rows per entity, so the last max(LAGS) rows are
+# all the history a new day's features need.
+STATE_ROWS = max(LAGS)
+
+
+class FeatureStore:
+    # Materialized forecast features keyed by (entity, date), stored as one Parquet part per
+    # month plus a small per-entity tail of raw rows. A daily refresh only featurizes the
+    # newly arrived days against that tail instead of the whole history.
+
+    def __init__(self, root: Path = STORE_ROOT / "country", keys: list[str] | None = None):
+        self.root = root
+        self.keys = keys or ["CountryCode"]
+        self.entity = self.keys[-1]
+        self.parts_dir = root / "parts"
+        self.state_path = root / "state.parquet"
+        self.latest_path = root / "latest.parquet"
+
+    def watermark(self) -> pd.Timestamp | None:
+        # Newest day already in the store; the next refresh only needs rows after it.
+        if not self.state_path.exists():
+            return None
+        return pd.read_parquet(self.state_path, columns=["date"])["date"].max()
+
+    def update(self, rows: pd.DataFrame) -> int:
+        # Appends days newer than the watermark. Late rows for older days are ignored;
+        # use rebuild() when history itself changed.
+        wm = self.watermark()
+        new = rows if wm is None else rows[rows["date"] > wm]
+        new = new[["date", *self.keys, *RAW_COLS]]
+        if new.empty:
+            return 0
+
+        state = pd.read_parquet(self.state_path) if wm is not None else new.iloc[:0]
+        combined = pd.concat([state.assign(_new=False), new.assign(_new=True)], ignore_index=True)
+        feats = make_panel_features(combined, horizons=0, entity=self.entity)
+        added = feats[feats["_new"]].drop(columns="_new")
+
+        # Parts first, then state: the state's max date is the commit point, and a rerun after
+        # a crash in between re-appends the same days (de-duplicated on write and on read).
+        self._append_parts(added)
+
+        tail = feats.groupby(self.entity, sort=False).tail(STATE_ROWS)
+        with runs.atomic_path(self.state_path) as tmp:
+            tail[["date", *self.keys, *RAW_COLS]].to_parquet(tmp, index=False)
+
+        # Latest row per entity; entities with no new day keep their previous latest row.
+        latest = added.groupby(self.entity, sort=False).tail(1)
+        if self.latest_path.exists():
+            old = pd.read_parquet(self.latest_path)
+            latest = pd.concat([old[~old[self.entity].isin(latest[self.entity])], latest])
+        with runs.atomic_path(self.latest_path) as tmp:
+            latest.sort_values(self.keys).to_parquet(tmp, index=False)
+        return len(added)
+
+    def _append_parts(self, added: pd.DataFrame) -> None:
+        # Days are appended into their month's part, so a daily refresh rewrites at most one
+        # month of rows and the part count grows with months, not with refreshes.
+        for month, rows in added.groupby(added["date"].dt.strftime("%Y%m"), sort=True):
+            part = self.parts_dir / f"month_{month}.parquet"
+            if part.exists():
+                rows = pd.concat([pd.read_parquet(part), rows], ignore_index=True)
+                rows = rows.drop_duplicates([*self.keys, "date"], keep="last")
+            with runs.atomic_path(part) as tmp:
+                rows.to_parquet(tmp, index=False)
+
+    def rebuild(self, rows: pd.DataFrame) -> int:
+        # Drops the store and materializes the full history again.
+        for path in [*self.parts_dir.glob("*.parquet"), self.state_path, self.latest_path]:
+            path.unlink(missing_ok=True)
+        return self.update(rows)
+
+    def features(self) -> pd.DataFrame:
+        parts = sorted(self.parts_dir.glob("month_*.parquet"))
+        if not parts:
+            raise FileNotFoundError(f"Feature store at {self.root} is empty. Run a refresh first.")
+        df = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        df = df.drop_duplicates([*self.keys, "date"], keep="last")
+        return df.sort_values([self.entity, "date"]).reset_index(drop=True)
+
+    def training_frame(self, horizons: int = 1) -> pd.DataFrame:
+        # Stored features plus horizon targets; targets are one grouped shift of risk_raw.
+        df = self.features()
+        by = df.groupby(self.entity, sort=False)["risk_raw"]
+        for h in range(1, horizons + 1):
+            df[target_col(h)] = by.shift(-h)
+        return df
+
+    def latest(self) -> pd.DataFrame:
+        # Latest-row inference input without touching the parts.
+        return pd.read_parquet(self.latest_path).dropna(subset=FEATURE_COLS)
@@ -1,36 +1,29 @@
+import argparse
 from pathlib import Path
 
-import matplotlib
 import numpy as np
 import pandas as pd
 
-matplotlib.use("Agg")
-
-import matplotlib.pyplot as plt
-import seaborn as sns
-from google.cloud import bigquery
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.inspection import permutation_importance
-from sklearn.metrics import mean_absolute_error
-from sklearn.model_selection import TimeSeriesSplit
+from src import aggregates, feature_importance, risk_variants, runs, schemas
 
 BILLING_PROJECT = "gen-lang-client-0366281238"
 TABLE = f"{BILLING_PROJECT}.gdelt_portfolio.country_risk_daily"
+TABLE_ADM1 = f"{BILLING_PROJECT}.gdelt_portfolio.region_risk_daily"
 
 
 ROOT = Path(__file__).resolve().parents[1]
 FIG_DIR = ROOT / "reports" / "figures"
-FIG_DIR.mkdir(parents=True, exist_ok=True)
-
 REP_DIR = ROOT / "reports"
-REP_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def save_fig(name: str) -> None:
+def save_fig(name: str, fig_dir: Path = FIG_DIR) -> None:
     # This writes a real image artifact for GitHub and your final report.
-    out = FIG_DIR / name
+    import matplotlib.pyplot as plt
+
+    out = fig_dir / name
     plt.tight_layout()
-    plt.savefig(out, dpi=200)
+    with runs.atomic_path(out) as tmp:
+        plt.savefig(tmp, dpi=200)
     plt.close()
     print(f"Saved: {out}")
 
@@ -46,31 +39,80 @@ def make_features(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def main() -> None:
-    sns.set_theme(style="whitegrid")
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Backtest one country (or region) forecast.")
+    parser.add_argument("--level", choices=list(aggregates.LEVELS), default="country")
+    parser.add_argument(
+        "--importance",
+        choices=feature_importance.ENGINES,
+        default=feature_importance.DEFAULT_ENGINE,
+        help="Feature-importance engine for the last fold.",
+    )
+    parser.add_argument(
+        "--permutation-repeats", type=int, default=feature_importance.PERMUTATION_REPEATS
+    )
+    parser.add_argument(
+        "--permutation-max-samples",
+        type=float,
+        default=feature_importance.PERMUTATION_MAX_SAMPLES,
+        help="Share of last-fold rows each permutation repeat scores.",
+    )
+    runs.add_run_args(parser)
+    args = parser.parse_args(argv)
+    layout = runs.layout_for(args.window, args.run_id)
+    entity = aggregates.LEVELS[args.level]
+    table = TABLE_ADM1 if args.level == "adm1" else TABLE
 
-    client = bigquery.Client(project=BILLING_PROJECT)
-    query = f"""
-    SELECT date, CountryCode, risk_raw
-    FROM `{TABLE}`
-    WHERE date IS NOT NULL
-      AND CountryCode IS NOT NULL
-    ORDER BY CountryCode, date
-    """
-    df = client.query(query).to_dataframe()
-    df["date"] = pd.to_datetime(df["date"])
+    # Plotting, modeling and BigQuery libraries load only when the stage actually runs.
+    import matplotlib
 
-    # This picks a country with enough activity so the forecast is meaningful.
-    top_country = client.query(
-        f"SELECT CountryCode FROM `{TABLE}` GROUP BY CountryCode ORDER BY SUM(total_events) DESC LIMIT 1"
-    ).to_dataframe()["CountryCode"][0]
+    matplotlib.use("Agg")
 
-    one = df[df["CountryCode"] == top_country].copy()
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_absolute_error
+    from sklearn.model_selection import TimeSeriesSplit
+
+    sns.set_theme(style="whitegrid")
+
+    if args.window is None:
+        from google.cloud import bigquery
+
+        client = bigquery.Client(project=BILLING_PROJECT)
+
+        # This picks a country (or region) with enough activity so the forecast is meaningful.
+        top_entity = client.query(
+            f"SELECT {entity} FROM `{table}` GROUP BY {entity} "
+            "ORDER BY SUM(total_events) DESC LIMIT 1"
+        ).to_dataframe()[entity][0]
+
+        # Only that one series is downloaded, so the ADM1 table costs no more than the country one.
+        query = f"""
+        SELECT date, {entity}, risk_raw
+        FROM `{table}`
+        WHERE date IS NOT NULL
+          AND {entity} = '{top_entity}'
+        ORDER BY date
+        """
+        df = client.query(query).to_dataframe()
+    else:
+        # A run's series is scored from its own clean dataset with the published (baseline)
+        # definition, so the backtest covers that window rather than the shared table.
+        keys = risk_variants.ADM1_KEYS if args.level == "adm1" else risk_variants.KEYS
+        clean = schemas.read_events_daily_clean(args.level, layout.processed)
+        risk = risk_variants.score_variants(
+            clean.dropna(subset=["date"]), [risk_variants.BASELINE], keys=keys
+        )
+        top_entity = risk.groupby(entity)["total_events"].sum().idxmax()
+        df = risk.loc[risk[entity] == top_entity, ["date", entity, "risk_raw"]]
+        df = df.sort_values("date").reset_index(drop=True)
+    one = schemas.coerce(df, schemas.table_for("country_risk_daily", args.level))
 
     # This fills missing days so time-based splits behave like a real daily series.
     full_days = pd.date_range(one["date"].min(), one["date"].max(), freq="D")
     one = one.set_index("date").reindex(full_days).reset_index().rename(columns={"index": "date"})
-    one["CountryCode"] = top_country
+    one[entity] = top_entity
     one["risk_raw"] = one["risk_raw"].fillna(0.0)
 
     one = make_features(one)
@@ -97,35 +139,54 @@ def main() -> None:
         pred = model.predict(X[test_idx])
         mae = mean_absolute_error(y[test_idx], pred)
         maes.append(mae)
-        last_fold = (model, test_idx, pred)
+        last_fold = (model, train_idx, test_idx, pred)
 
     avg_mae = float(np.mean(maes))
 
-    model, test_idx, pred = last_fold
+    model, train_idx, test_idx, pred = last_fold
     test = one.iloc[test_idx].copy()
     test["pred_next_day"] = pred
 
     plt.figure(figsize=(11, 4))
     plt.plot(test["date"], test["target_next_day"], label="Actual next-day risk")
     plt.plot(test["date"], test["pred_next_day"], label="Predicted next-day risk")
-    plt.title(f"Next-Day Risk Forecast (Country: {top_country}) | Avg MAE: {avg_mae:.4f}")
+    label = "Country" if args.level == "country" else "Region"
+    plt.title(f"Next-Day Risk Forecast ({label}: {top_entity}) | Avg MAE: {avg_mae:.4f}")
     plt.xlabel("Date")
     plt.ylabel("risk_raw")
     plt.legend()
-    save_fig("10_risk_forecast_next_day.png")
-
-    # This explains which features the model relied on the most.
-    perm = permutation_importance(model, X[test_idx], y[test_idx], n_repeats=10, random_state=42)
-    imp = pd.DataFrame({"feature": feature_cols, "importance": perm.importances_mean}).sort_values(
-        "importance", ascending=False
+    save_fig("10_risk_forecast_next_day.png", layout.figures)
+
+    # This explains which features the model relied on the most (cached per model version).
+    options = {}
+    if args.importance == "permutation":
+        options = {
+            "n_repeats": args.permutation_repeats,
+            "max_samples": args.permutation_max_samples,
+        }
+    version = feature_importance.model_version(model, X[train_idx], y[train_idx])
+    imp, info = feature_importance.explain(
+        model, X[test_idx], y[test_idx], feature_cols, version, args.importance, **options
     )
+    source = "cache" if info["cached"] else "computed"
+    print(f"Importance ({info['engine']}): {info['seconds']:.2f}s, {source}")
 
-    report_path = REP_DIR / "risk_forecast_report.md"
-    with open(report_path, "w", encoding="utf-8") as f:
+    report_path = layout.reports / "risk_forecast_report.md"
+    with runs.atomic_path(report_path) as tmp, open(tmp, "w", encoding="utf-8") as f:
         f.write("# Risk forecast report\n\n")
-        f.write(f"- Country: `{top_country}`\n")
+        f.write(f"- {label}: `{top_entity}`\n")
         f.write(f"- Avg MAE (TimeSeriesSplit): {avg_mae:.6f}\n\n")
-        f.write("## Permutation importance (last fold)\n\n")
+        f.write("## Feature importance (last fold)\n\n")
+        f.write(
+            f"- Engine: `{info['engine']}`: {feature_importance.DESCRIPTIONS[info['engine']]}\n"
+        )
+        if info["engine"] != "permutation":
+            f.write(
+                "- Note: reports before `--importance` existed used permutation importance; "
+                "scores from different engines are not comparable.\n"
+            )
+        f.write(f"- Model version: `{info['version']}`\n")
+        f.write(f"- Compute time: {info['seconds']:.3f}s ({source})\n\n")
         f.write(imp.to_markdown(index=False))
         f.write("\n")
 
@@ -0,0 +1,179 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+PROJECT = "gen-lang-client-0366281238"
+
+# Append-only record of every published forecast, and the realized errors scored against it.
+# History is partitioned by run_date and errors by forecast_date, both clustered by
+# country (and region at ADM1), so each evaluation touches only the newly realized days.
+TABLES = {
+    "country": {
+        "history": "gdelt_portfolio.country_risk_forecasts_history",
+        "errors": "gdelt_portfolio.country_risk_forecast_errors",
+        "mae": "gdelt_portfolio.country_risk_forecast_mae",
+        "daily": f"{PROJECT}.gdelt_portfolio.country_risk_daily",
+        "keys": ["CountryCode"],
+    },
+    "adm1": {
+        "history": "gdelt_portfolio.region_risk_forecasts_history",
+        "errors": "gdelt_portfolio.region_risk_forecast_errors",
+        "mae": "gdelt_portfolio.region_risk_forecast_mae",
+        "daily": f"{PROJECT}.gdelt_portfolio.region_risk_daily",
+        "keys": ["CountryCode", "RegionCode"],
+    },
+}
+
+HISTORY_COLS = ["run_date", "as_of_date", "forecast_date", "horizon", "pred_risk", "risk_as_of"]
+
+# Forecasts are scored if their run is at most this many days old, which bounds the history
+# and error partitions an evaluation has to read (and how late actuals may land).
+MAX_LOOKBACK_DAYS = 60
+MAE_WINDOW_DAYS = 30
+
+
+def history_rows(
+    long_rows: pd.DataFrame, keys: list[str], published_at: pd.Timestamp
+) -> pd.DataFrame:
+    # One row per (run, entity, horizon); published_at tells same-day reruns apart.
+    out = long_rows.rename(columns={"risk_raw": "risk_as_of"})
+    out["run_date"] = date.today()
+    out["as_of_date"] = out["date"].dt.date
+    out["published_at"] = published_at
+    return out[[*HISTORY_COLS[:4], *keys, *HISTORY_COLS[4:], "published_at"]]
+
+
+def append(client, df: pd.DataFrame, table: str, partition_field: str, keys: list[str]) -> None:
+    from google.cloud import bigquery
+
+    # A load job with WRITE_APPEND: no DML, and only the new rows are written.
+    job_config = bigquery.LoadJobConfig(
+        write_disposition="WRITE_APPEND",
+        time_partitioning=bigquery.TimePartitioning(field=partition_field),
+        clustering_fields=keys,
+    )
+    client.load_table_from_dataframe(df, f"{PROJECT}.{table}", job_config=job_config).result()
+
+
+def compact_sql(level: str = "country") -> str:
+    # Appends leave many small files and same-day reruns; rewrite keeping each run's latest
+    # publish per entity and horizon.
+    t = TABLES[level]
+    keys = ", ".join(t["keys"])
+    return f"""
+    CREATE OR REPLACE TABLE `{PROJECT}.{t["history"]}`
+    PARTITION BY run_date
+    CLUSTER BY {keys} AS
+    SELECT * EXCEPT(rn)
+    FROM (
+      SELECT
+        *,
+        ROW_NUMBER() OVER (
+          PARTITION BY run_date, {keys}, horizon ORDER BY published_at DESC
+        ) AS rn
+      FROM `{PROJECT}.{t["history"]}`
+    )
+    WHERE rn = 1
+    """
+
+
+def evaluate_sql(today: date, level: str = "country", errors_exist: bool = True) -> str:
+    # Joins every forecast in the lookback window whose target day has been observed and that
+    # has no error row yet (anti-join on keys + forecast_date + horizon + run_date). Late
+    # actuals for one entity are therefore scored when they land, and nothing is scored
+    # twice. The date bounds are constants so BigQuery prunes history and error partitions.
+    t = TABLES[level]
+    keys = t["keys"]
+    on = " AND ".join(f"d.{k} = h.{k}" for k in keys)
+    first_run = today - timedelta(days=MAX_LOOKBACK_DAYS)
+    scored = unscored = ""
+    if errors_exist:
+        match = " AND ".join(
+            f"e.{c} = h.{c}" for c in [*keys, "forecast_date", "horizon", "run_date"]
+        )
+        scored = f"""
+    LEFT JOIN `{PROJECT}.{t["errors"]}` AS e
+      ON {match}
+      AND e.forecast_date >= DATE '{first_run}'"""
+        unscored = "\n      AND e.run_date IS NULL"
+    return f"""
+    SELECT
+      h.run_date,
+      h.as_of_date,
+      h.forecast_date,
+      h.horizon,
+      {", ".join(f"h.{k}" for k in keys)},
+      h.pred_risk,
+      d.risk_raw AS actual,
+      h.pred_risk - d.risk_raw AS error,
+      CURRENT_TIMESTAMP() AS evaluated_at
+    FROM `{PROJECT}.{t["history"]}` AS h
+    JOIN `{t["daily"]}` AS d
+      ON {on} AND d.date = h.forecast_date{scored}
+    WHERE h.run_date >= DATE '{first_run}'
+      AND d.date >= DATE '{first_run}'{unscored}
+    QUALIFY ROW_NUMBER() OVER (
+      PARTITION BY h.run_date, {", ".join(f"h.{k}" for k in keys)}, h.horizon
+      ORDER BY h.published_at DESC
+    ) = 1
+    """
+
+
+def mae_sql(level: str = "country") -> str:
+    # Rolling per-entity MAE over the last MAE_WINDOW_DAYS of realized target days.
+    t = TABLES[level]
+    keys = ", ".join(t["keys"])
+    return f"""
+    CREATE OR REPLACE TABLE `{PROJECT}.{t["mae"]}` AS
+    SELECT
+      {keys},
+      horizon,
+      AVG(ABS(error)) AS mae,
+      COUNT(*) AS n_forecasts,
+      MIN(forecast_date) AS window_start,
+      MAX(forecast_date) AS window_end
+    FROM `{PROJECT}.{t["errors"]}`
+    WHERE forecast_date > DATE_SUB(
+      (SELECT MAX(forecast_date) FROM `{PROJECT}.{t["errors"]}`), INTERVAL {MAE_WINDOW_DAYS} DAY
+    )
+    GROUP BY {keys}, horizon
+    """
+
+
+def score_new(
+    history: pd.DataFrame,
+    daily: pd.DataFrame,
+    errors: pd.DataFrame | None,
+    keys: list[str],
+    today: date | None = None,
+) -> pd.DataFrame:
+    # Local twin of evaluate_sql: realized forecasts without an error row yet, latest
+    # publish per run, within the lookback window when today is given.
+    h = history.sort_values("published_at").drop_duplicates(
+        ["run_date", *keys, "horizon"], keep="last"
+    )
+    if today is not None:
+        h = h[h["run_date"] >= today - timedelta(days=MAX_LOOKBACK_DAYS)]
+    if errors is not None and len(errors):
+        match = [*keys, "forecast_date", "horizon", "run_date"]
+        done = errors[match].drop_duplicates().assign(_scored=True)
+        h = h.merge(done, on=match, how="left")
+        h = h[h["_scored"].isna()].drop(columns="_scored")
+    d = daily.assign(forecast_date=daily["date"].dt.date)[[*keys, "forecast_date", "risk_raw"]]
+    out = h.merge(d, on=[*keys, "forecast_date"], how="inner")
+    out = out.rename(columns={"risk_raw": "actual"})
+    out["error"] = out["pred_risk"] - out["actual"]
+    return out.drop(columns=["risk_as_of", "published_at"]).reset_index(drop=True)
+
+
+def rolling_mae(
+    errors: pd.DataFrame, keys: list[str], window_days: int = MAE_WINDOW_DAYS
+) -> pd.DataFrame:
+    # Local twin of mae_sql.
+    end = errors["forecast_date"].max()
+    recent = errors[errors["forecast_date"] > end - timedelta(days=window_days)]
+    return (
+        recent.assign(abs_error=recent["error"].abs())
+        .groupby([*keys, "horizon"], as_index=False)
+        .agg(mae=("abs_error", "mean"), n_forecasts=("abs_error", "size"))
+    )
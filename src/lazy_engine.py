@@ -0,0 +1,322 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src import aggregates, data_quality, runs, schemas, sketches
+
+# Optional Polars backend for the local analytics stages (clean, anomalies, viz, runlog).
+# Each function here is the lazy twin of a pandas step: it builds one query plan over the
+# files on disk, so only the projected columns are read, filters and aggregations run
+# inside the scan, and the streaming engine processes the input in batches on every core.
+# Only small aggregated results come back as pandas frames.
+ENGINES = ["pandas", "polars"]
+DEFAULT_ENGINE = "pandas"
+
+STREAMING = "streaming"
+
+
+def add_engine_arg(parser) -> None:
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default=DEFAULT_ENGINE,
+        help="polars runs the stage as a lazy, streaming plan that never loads the whole "
+        "input (pip install polars).",
+    )
+
+
+def import_polars():
+    try:
+        import polars as pl
+    except ImportError as e:
+        raise ImportError(
+            "--engine polars needs the optional Polars package: pip install polars"
+        ) from e
+    return pl
+
+
+def _dtype(pl, arrow_type: pa.DataType):
+    if pa.types.is_string(arrow_type):
+        return pl.String
+    if pa.types.is_timestamp(arrow_type):
+        return pl.Datetime("ns")
+    if pa.types.is_integer(arrow_type):
+        return pl.Int64
+    return pl.Float64
+
+
+def cast_to(lf, table: str):
+    # Lazy twin of schemas.coerce: bad values become null instead of failing the scan.
+    pl = import_polars()
+    names = lf.collect_schema().names()
+    return lf.with_columns(
+        pl.col(f.name).cast(_dtype(pl, f.type), strict=False)
+        for f in schemas.SCHEMAS[table]
+        if f.name in names
+    )
+
+
+def to_pandas(df) -> pd.DataFrame:
+    # Polars hands strings over as large/view strings; pin them to the registry's string dtype.
+    arrow = df.to_arrow()
+    fields = [
+        pa.field(f.name, pa.string())
+        if pa.types.is_large_string(f.type) or pa.types.is_string_view(f.type)
+        else f
+        for f in arrow.schema
+    ]
+    return arrow.cast(pa.schema(fields)).to_pandas(types_mapper=schemas._types_mapper)
+
+
+def collect(lf) -> pd.DataFrame:
+    return to_pandas(lf.collect(engine=STREAMING))
+
+
+def scan_extract(path: Path):
+    pl = import_polars()
+    header = pl.read_csv(path, n_rows=0).columns
+    strings = {
+        f.name: pl.String
+        for f in schemas.SCHEMAS["events_daily_extract"]
+        if pa.types.is_string(f.type) and f.name in header
+    }
+    return pl.scan_csv(path, schema_overrides=strings)
+
+
+def scan_clean(level: str = "country", processed_dir: Path = schemas.PROCESSED_DIR):
+    # Same preference as schemas.read_events_daily_clean: Arrow hand-off, then Parquet.
+    pl = import_polars()
+    feather_path, parquet_path = schemas.clean_paths(level, processed_dir)
+    if feather_path.exists():
+        return pl.scan_ipc(feather_path)
+    if parquet_path.exists():
+        return pl.scan_parquet(parquet_path)
+    raise FileNotFoundError(
+        f"Clean dataset not found in {processed_dir}. Run clean_events_daily.py first."
+    )
+
+
+def clean_plan(in_path: Path, root_labels: dict, tone_thresholds: dict):
+    # Lazy twin of clean_events_daily (country level): types, 2-digit root codes, date,
+    # labels and tone buckets, in the clean table's column order.
+    pl = import_polars()
+    lf = scan_extract(in_path)
+    names = lf.collect_schema().names()
+    if "SumTone" not in names:
+        raise ValueError(f"{in_path.name} has no partial sums (legacy format); use --engine pandas")
+
+    lf = cast_to(lf, "events_daily_extract")
+    lf = lf.with_columns(
+        pl.lit(None, pl.String).alias(c) for c in sketches.HIST_COLS if c not in names
+    )
+    tone = pl.col("AvgTone")
+    lf = lf.with_columns(
+        pl.col("EventRootCode").str.strip_chars().str.zfill(2),
+        pl.col("SQLDATE").str.to_datetime("%Y%m%d", strict=False, time_unit="ns").alias("date"),
+    ).with_columns(
+        pl.col("EventRootCode")
+        .replace_strict(root_labels, default="Unknown", return_dtype=pl.String)
+        .alias("EventRootLabel"),
+        pl.when(tone.is_null())
+        .then(pl.lit("unknown"))
+        .when(tone <= tone_thresholds["negative"])
+        .then(pl.lit("negative"))
+        .when(tone >= tone_thresholds["positive"])
+        .then(pl.lit("positive"))
+        .otherwise(pl.lit("neutral"))
+        .alias("ToneBucket"),
+    )
+    return cast_to(lf.select(schemas.columns("events_daily_clean")), "events_daily_clean")
+
+
+def write_clean(lf, parquet_path: Path, feather_path: Path) -> None:
+    # Streams the plan into Parquet, then re-streams that file batch by batch into the typed
+    # Arrow hand-off, so neither copy is ever held in memory whole.
+    with runs.atomic_path(parquet_path) as tmp:
+        lf.sink_parquet(tmp, engine=STREAMING)
+
+    schema = schemas.SCHEMAS["events_daily_clean"]
+    with runs.atomic_path(feather_path) as tmp, pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            for batch in pq.ParquetFile(parquet_path).iter_batches():
+                writer.write_batch(batch.select(schema.names).cast(schema))
+
+
+def rule_exprs(rules: dict = data_quality.RULES) -> list:
+    # data_quality.violations as Polars expressions, one boolean column per rule.
+    pl = import_polars()
+    exprs = []
+    for name, rule in rules.items():
+        kind = rule["kind"]
+        if kind == "range":
+            col = pl.col(rule["column"])
+            bad = pl.lit(False)
+            if rule["lo"] is not None:
+                bad = bad | (col < rule["lo"])
+            if rule["hi"] is not None:
+                bad = bad | (col > rule["hi"])
+            expr = bad.fill_null(False)
+        elif kind == "not_null":
+            expr = pl.col(rule["column"]).is_null()
+        elif kind == "in_set":
+            expr = ~pl.col(rule["column"]).is_in(rule["values"]).fill_null(False)
+        elif kind == "unique":
+            expr = pl.len().over(rule["columns"]) > 1
+        else:
+            raise ValueError(f"Unknown rule kind {kind!r} in rule {name!r}")
+        exprs.append(expr.alias(name))
+    return exprs
+
+
+def qa_stats(lf, rules: dict = data_quality.RULES) -> pd.DataFrame:
+    # Lazy twin of data_quality.evaluate: every rule and volume stat in one grouped pass.
+    pl = import_polars()
+    part = data_quality.PARTITION
+    stats = (
+        lf.with_columns(rule_exprs(rules))
+        .group_by(part)
+        .agg(
+            *[pl.col(name).sum().cast(pl.Int64) for name in rules],
+            pl.len().cast(pl.Int64).alias("rows"),
+            pl.col("EventCount").sum().alias("events"),
+            pl.col("ToneCount").sum().alias("tone_count"),
+            pl.col("SumTone").sum().alias("sum_tone"),
+        )
+        .sort(part, nulls_last=True)
+    )
+    return data_quality.finalize(collect(stats))
+
+
+def top_by_events(lf, keys: list[str], n: int):
+    # Largest EventCount totals first. Polars groups come out unordered, so ties are broken by
+    # the keys, which is the order pandas' sorted groupby leaves them in.
+    pl = import_polars()
+    totals = lf.group_by(keys).agg(pl.col("EventCount").sum())
+    return totals.sort(["EventCount", *keys], descending=[True] + [False] * len(keys)).head(n)
+
+
+def report_frames(lf) -> dict:
+    # Lazy twin of clean_events_daily.report_frames; collect_all shares one scan per plan.
+    pl = import_polars()
+    size, dates, missing, top_roots = pl.collect_all(
+        [
+            lf.select(pl.len().alias("rows")),
+            lf.select(pl.col("date").min().alias("min"), pl.col("date").max().alias("max")),
+            lf.select(pl.all().null_count()),
+            top_by_events(lf, ["EventRootCode", "EventRootLabel"], 10),
+        ],
+        engine=STREAMING,
+    )
+    return {
+        "rows": size["rows"][0],
+        "date_min": pd.Timestamp(dates["min"][0]),
+        "date_max": pd.Timestamp(dates["max"][0]),
+        "missing": to_pandas(missing).iloc[0].astype("int64").rename("missing"),
+        "top_roots": to_pandas(top_roots),
+    }
+
+
+def panel(lf, keys: list[str]) -> pd.DataFrame:
+    # Lazy twin of aggregates.combine(..., with_sketches=False) over dated rows: sums per key,
+    # averages re-derived afterwards. A key whose values are all null stays null (min_count=1).
+    pl = import_polars()
+    sums = [
+        pl.when(pl.col(c).count() > 0).then(pl.col(c).sum()).alias(c)
+        for c in aggregates.ADDITIVE_COLS
+    ]
+    plan = lf.filter(pl.col("date").is_not_null()).group_by(keys).agg(sums).sort(keys)
+    return aggregates.finalize(collect(plan))
+
+
+def sketch_counts(lf, keys: list[str], name: str) -> pd.DataFrame:
+    # Lazy twin of sketches.merge: sparse "bin:count" tokens are exploded and summed per key
+    # inside the scan; the result is a dense (keys x bins) count matrix.
+    pl = import_polars()
+    bins = sketches.SKETCHES[name]["bins"]
+    tokens = (
+        lf.select(*keys, pl.col(name).str.split(",").alias("token"))
+        .explode("token")
+        .filter(pl.col("token").str.len_chars() > 0)
+        .select(
+            *keys,
+            pl.col("token")
+            .str.split_exact(":", 1)
+            .struct.field("field_0")
+            .cast(pl.Int64)
+            .alias("bin"),
+            pl.col("token")
+            .str.split_exact(":", 1)
+            .struct.field("field_1")
+            .cast(pl.Int64)
+            .alias("n"),
+        )
+    )
+    long = collect(tokens.group_by([*keys, "bin"]).agg(pl.col("n").sum()))
+    if not keys:
+        return long.set_index("bin")["n"].reindex(range(bins), fill_value=0).to_frame().T
+    dense = long.pivot_table(index=keys, columns="bin", values="n", aggfunc="sum", fill_value=0)
+    return dense.reindex(columns=range(bins), fill_value=0).astype("int64")
+
+
+def overview_frames(lf) -> dict:
+    # Lazy twin of viz_overview.overview_frames: everything the figures need, as small frames.
+    pl = import_polars()
+    lf = lf.filter(pl.col("date").is_not_null())
+    events = pl.col("EventCount").sum()
+    daily, top_countries, top_roots, has_sketches = pl.collect_all(
+        [
+            lf.group_by("date").agg(events).sort("date"),
+            top_by_events(lf, ["CountryCode"], 15),
+            top_by_events(lf, ["EventRootCode", "EventRootLabel"], 12),
+            lf.select(pl.col("ToneHist").is_not_null().any()),
+        ],
+        engine=STREAMING,
+    )
+    frames = {
+        "daily": to_pandas(daily),
+        "top_countries": to_pandas(top_countries),
+        "top_roots": to_pandas(top_roots),
+        "has_sketches": bool(has_sketches.item()),
+    }
+    labels = frames["top_roots"]["EventRootLabel"].tolist()
+    top = lf.filter(pl.col("EventRootLabel").is_in(labels))
+
+    month = pl.col("date").dt.truncate("1mo").alias("month")
+    heat = collect(top.group_by(month, "EventRootLabel").agg(events))
+    frames["heat"] = (
+        heat.pivot(index="EventRootLabel", columns="month", values="EventCount")
+        .sort_index(axis=1)
+        .fillna(0)
+    )
+
+    if frames["has_sketches"]:
+        frames["tone_counts"] = sketch_counts(lf, [], "ToneHist").iloc[0].to_numpy()
+        frames["tone_box"] = sketch_counts(top, ["EventRootLabel"], "ToneHist").reindex(
+            labels, fill_value=0
+        )
+    else:
+        # Legacy extracts without sketches: the histogram is binned inside the scan, the box
+        # plot needs the (label, AvgTone) rows of the top categories.
+        tone = pl.col("AvgTone")
+        lo, hi = collect(lf.select(tone.min().alias("lo"), tone.max().alias("hi"))).iloc[0]
+        edges = np.linspace(lo, hi, 61)
+        idx = ((tone - lo) / (hi - lo) * 60).floor().clip(0, 59).cast(pl.Int64).alias("bin")
+        hist = collect(lf.filter(tone.is_not_null()).group_by(idx).agg(events))
+        counts = np.zeros(60)
+        counts[hist["bin"].to_numpy()] = hist["EventCount"].to_numpy()
+        frames["tone_hist"] = (counts, edges)
+        frames["tone_rows"] = collect(top.select("EventRootLabel", "AvgTone"))
+    return frames
+
+
+def extract_summary(path: Path) -> dict:
+    # Lazy twin of write_run_log.extract_summary: a row count and SQLDATE range, no full load.
+    pl = import_polars()
+    lf = pl.scan_csv(path)
+    exprs = [pl.len().alias("rows")]
+    if "SQLDATE" in lf.collect_schema().names():
+        exprs += [pl.col("SQLDATE").min().alias("min"), pl.col("SQLDATE").max().alias("max")]
+    return lf.select(exprs).collect(engine=STREAMING).row(0, named=True)
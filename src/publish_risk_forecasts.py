@@ -1,93 +1,249 @@
+import argparse
 from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
 
+import numpy as np
 import pandas as pd
-import pandas_gbq
-from google.cloud import bigquery
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.metrics import mean_absolute_error
+
+from src import aggregates, forecast_history, runs, schemas
+
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestRegressor
 
 PROJECT = "gen-lang-client-0366281238"
 SOURCE_TABLE = f"{PROJECT}.gdelt_portfolio.country_risk_daily"
 DEST_TABLE = "gdelt_portfolio.country_risk_forecasts_next_day"
+DEST_TABLE_HORIZONS = "gdelt_portfolio.country_risk_forecasts_horizons"
+
+# ADM1 twins (python -m src forecast --level adm1).
+SOURCE_TABLE_ADM1 = f"{PROJECT}.gdelt_portfolio.region_risk_daily"
+DEST_TABLE_ADM1 = "gdelt_portfolio.region_risk_forecasts_next_day"
+DEST_TABLE_HORIZONS_ADM1 = "gdelt_portfolio.region_risk_forecasts_horizons"
 LOCATION = "US"
 
+ROOT = Path(__file__).resolve().parents[1]
+MODEL_DIR = ROOT / "models"
+MODEL_PATH = MODEL_DIR / "risk_forecaster.joblib"
+LATEST_FEATURES_PATH = MODEL_DIR / "latest_features.parquet"
+LATEST_FORECASTS_PATH = MODEL_DIR / "latest_forecasts.csv"
+
+LAGS = [1, 2, 3, 7, 14]
+
+FEATURE_COLS = [
+    "lag_1",
+    "lag_2",
+    "lag_3",
+    "lag_7",
+    "lag_14",
+    "roll_mean_7",
+    "roll_std_7",
+    "total_events",
+    "conflict_share",
+    "negative_share",
+    "weighted_avg_tone",
+]
 
-def make_features(g: pd.DataFrame) -> pd.DataFrame:
+
+def target_col(h: int) -> str:
+    # Horizon 1 keeps its original name so the next-day table and tests stay unchanged.
+    return "target_next_day" if h == 1 else f"target_day_{h}"
+
+
+def make_features(g: pd.DataFrame, horizons: int = 1) -> pd.DataFrame:
     # Sort by date so “lag_7” really means 7 days earlier.
     g = g.sort_values("date").copy()
 
     # Lags give the model memory of recent risk levels.
-    for k in [1, 2, 3, 7, 14]:
+    for k in LAGS:
         g[f"lag_{k}"] = g["risk_raw"].shift(k)
 
     # Rolling stats capture trend and volatility without heavy modeling.
     g["roll_mean_7"] = g["risk_raw"].rolling(7, min_periods=3).mean()
     g["roll_std_7"] = g["risk_raw"].rolling(7, min_periods=3).std()
 
-    # Tomorrow’s risk is the target we’re trying to predict.
-    g["target_next_day"] = g["risk_raw"].shift(-1)
+    # Tomorrow’s risk (and optionally the days after) are the targets we’re trying to predict.
+    for h in range(1, horizons + 1):
+        g[target_col(h)] = g["risk_raw"].shift(-h)
     return g
 
 
-def main() -> None:
+def make_panel_features(
+    df: pd.DataFrame, horizons: int = 1, entity: str = "CountryCode"
+) -> pd.DataFrame:
+    # Same features as make_features, but for every country (or region) in one vectorized pass.
+    # Grouped shift/rolling run in compiled code instead of one Python call per series.
+    df = df.sort_values([entity, "date"]).reset_index(drop=True)
+    by = df.groupby(entity, sort=False)["risk_raw"]
+
+    for k in LAGS:
+        df[f"lag_{k}"] = by.shift(k)
+
+    roll = by.rolling(7, min_periods=3)
+    df["roll_mean_7"] = roll.mean().reset_index(level=0, drop=True)
+    df["roll_std_7"] = roll.std().reset_index(level=0, drop=True)
+
+    # All horizon targets come from the same grouped series, so t+1..t+H cost one pass.
+    for h in range(1, horizons + 1):
+        df[target_col(h)] = by.shift(-h)
+    return df
+
+
+def to_horizon_rows(latest_rows: pd.DataFrame, yhat: np.ndarray, horizons: int) -> pd.DataFrame:
+    # This turns one row per country + one prediction column per horizon into long form.
+    yhat = np.asarray(yhat).reshape(len(latest_rows), horizons)
+    parts = []
+    for h in range(1, horizons + 1):
+        part = latest_rows.copy()
+        part["horizon"] = h
+        part["forecast_date"] = (part["date"] + pd.Timedelta(days=h)).dt.date
+        part["pred_risk"] = yhat[:, h - 1]
+        parts.append(part)
+    return pd.concat(parts, ignore_index=True)
+
+
+def save_serving_artifacts(
+    model: "RandomForestRegressor",
+    latest_rows: pd.DataFrame,
+    yhat: np.ndarray,
+    horizons: int,
+    model_path: Path = MODEL_PATH,
+    features_path: Path = LATEST_FEATURES_PATH,
+    forecasts_path: Path = LATEST_FORECASTS_PATH,
+) -> None:
+    # This persists the refit model + latest feature rows so forecasts can be served on demand.
+    import joblib
+
+    bundle = {
+        "model": model,
+        "feature_cols": FEATURE_COLS,
+        "horizons": horizons,
+        "run_date": date.today().isoformat(),
+        "as_of_date": latest_rows["date"].max().date().isoformat(),
+    }
+    # No compression: uncompressed arrays can be memory-mapped by joblib.load(mmap_mode="r").
+    # Each artifact is renamed into place whole, so `serve` never loads a partial file.
+    with runs.atomic_path(model_path) as tmp:
+        joblib.dump(bundle, tmp, compress=0)
+
+    with runs.atomic_path(features_path) as tmp:
+        latest_rows[["CountryCode", "date", "risk_raw", *FEATURE_COLS]].to_parquet(tmp, index=False)
+
+    # A plain CSV of the predictions themselves lets `lookup` answer without pandas or sklearn.
+    snapshot = to_horizon_rows(latest_rows, yhat, horizons)
+    snapshot["as_of_date"] = snapshot["date"].dt.date
+    with runs.atomic_path(forecasts_path) as tmp:
+        snapshot[["CountryCode", "as_of_date", "horizon", "forecast_date", "pred_risk"]].to_csv(
+            tmp, index=False
+        )
+
+    print(f"Saved model: {model_path}")
+    print(f"Saved latest features: {features_path}")
+    print(f"Saved latest forecasts: {forecasts_path}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Train and publish country risk forecasts.")
+    parser.add_argument(
+        "--horizons",
+        type=int,
+        default=1,
+        help="Forecast t+1..t+H with one multi-output model (default: 1, next day only).",
+    )
+    parser.add_argument(
+        "--level",
+        choices=list(aggregates.LEVELS),
+        default="country",
+        help="adm1 forecasts every region from region_risk_daily (no serving artifacts).",
+    )
+    parser.add_argument(
+        "--feature-store",
+        action="store_true",
+        help="Pull only days newer than the local feature store and train from the store.",
+    )
+    parser.add_argument(
+        "--rebuild-store",
+        action="store_true",
+        help="With --feature-store: re-materialize the store from the full history.",
+    )
+    args = parser.parse_args(argv)
+    horizons = args.horizons
+    if horizons < 1:
+        parser.error("--horizons must be >= 1")
+
+    # Heavy dependencies load here, not at import, so importing make_features stays cheap.
+    import pandas_gbq
+    from google.cloud import bigquery
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.metrics import mean_absolute_error
+
     client = bigquery.Client(project=PROJECT)
 
+    adm1 = args.level == "adm1"
+    entity = aggregates.LEVELS[args.level]
+    keys = ["CountryCode", entity] if adm1 else ["CountryCode"]
+    source_table = SOURCE_TABLE_ADM1 if adm1 else SOURCE_TABLE
+
+    store = None
+    since = ""
+    if args.feature_store:
+        from src.feature_store import STORE_ROOT, FeatureStore
+
+        # With a store, only days after its watermark are downloaded and featurized.
+        store = FeatureStore(STORE_ROOT / args.level, keys)
+        wm = None if args.rebuild_store else store.watermark()
+        if wm is not None:
+            since = f"AND date > DATE '{wm.date()}'"
+
     # Pull only the columns we need to train + forecast.
     q = f"""
     SELECT
       date,
-      CountryCode,
+      {", ".join(keys)},
       total_events,
       conflict_share,
       negative_share,
       weighted_avg_tone,
       risk_raw
-    FROM `{SOURCE_TABLE}`
-    WHERE date IS NOT NULL AND CountryCode IS NOT NULL
-    ORDER BY CountryCode, date
+    FROM `{source_table}`
+    WHERE date IS NOT NULL AND {entity} IS NOT NULL {since}
+    ORDER BY {entity}, date
     """
     df = client.query(q).to_dataframe()
-    df["date"] = pd.to_datetime(df["date"])
-
-    # Make sure numeric columns are truly numeric before feature engineering.
-    num_cols = ["total_events", "conflict_share", "negative_share", "weighted_avg_tone", "risk_raw"]
-    for col in num_cols:
-        df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    # Build features for every country-day (including the latest day per country).
-    # include_groups=False is the forward-safe behavior for pandas GroupBy.apply.
-    feats_all = (
-        df.groupby("CountryCode", group_keys=True)
-        .apply(make_features, include_groups=False)
-        .reset_index(level=0)  # Bring CountryCode back as a normal column.
-    )
 
-    feature_cols = [
-        "lag_1",
-        "lag_2",
-        "lag_3",
-        "lag_7",
-        "lag_14",
-        "roll_mean_7",
-        "roll_std_7",
-        "total_events",
-        "conflict_share",
-        "negative_share",
-        "weighted_avg_tone",
-    ]
-
-    # Train only where we actually know “tomorrow” (target_next_day is present).
-    train = feats_all.dropna(subset=feature_cols + ["target_next_day"]).copy()
+    # One schema-driven pass: columns BigQuery already typed correctly are left alone.
+    df = schemas.coerce(df, schemas.table_for("country_risk_daily", args.level))
+
+    if store is not None:
+        n_new = store.rebuild(df) if args.rebuild_store else store.update(df)
+        print(f"Feature store: {n_new} new row(s) materialized in {store.root}")
+        feats_all = store.training_frame(horizons)
+    else:
+        # Build features + every horizon target for every country-day in one pass
+        # (including the latest day per country, which has no targets yet).
+        # Region series are sparse (only days with events), so their lags are observed days.
+        feats_all = make_panel_features(df, horizons=horizons, entity=entity)
+
+    feature_cols = FEATURE_COLS
+    target_cols = [target_col(h) for h in range(1, horizons + 1)]
+
+    # Train only where we actually know every horizon (all targets present).
+    train = feats_all.dropna(subset=feature_cols + target_cols).copy()
 
     X = train[feature_cols].to_numpy()
-    y = train["target_next_day"].to_numpy()
+    y = train[target_cols].to_numpy()
+    if horizons == 1:
+        y = y.ravel()
     d = train["date"]
 
     # Simple time-ordered backtest: last 14 days as holdout (no shuffling).
+    # Training rows must also have all of their targets on or before the cutoff.
     cutoff = d.max() - pd.Timedelta(days=14)
-    train_mask = d <= cutoff
+    train_mask = d <= cutoff - pd.Timedelta(days=horizons - 1)
     test_mask = d > cutoff
 
+    # One forest handles every horizon: RandomForestRegressor is natively multi-output,
+    # so a week-ahead run costs about the same as a next-day run.
     model = RandomForestRegressor(n_estimators=500, random_state=42, n_jobs=-1)
     model.fit(X[train_mask], y[train_mask])
 
@@ -95,34 +251,57 @@ def main() -> None:
         pred = model.predict(X[test_mask])
         mae = mean_absolute_error(y[test_mask], pred)
         print(f"Backtest MAE (last 14 days): {mae:.4f}")
+        if horizons > 1:
+            per_h = mean_absolute_error(y[test_mask], pred, multioutput="raw_values")
+            for h, m in enumerate(per_h, start=1):
+                print(f"  horizon t+{h}: {m:.4f}")
 
     # Refit on all training rows before producing the latest forecasts.
     model.fit(X, y)
 
     # Forecast from the true latest day per country (even though it has no target).
-    latest_rows = (
-        feats_all.sort_values(["CountryCode", "date"])
-        .groupby("CountryCode")
-        .tail(1)
-        .dropna(subset=feature_cols)
-        .copy()
-    )
+    if store is not None:
+        latest_rows = store.latest()
+    else:
+        latest_rows = (
+            feats_all.sort_values([entity, "date"])
+            .groupby(entity)
+            .tail(1)
+            .dropna(subset=feature_cols)
+            .copy()
+        )
 
     X_latest = latest_rows[feature_cols].to_numpy()
     yhat = model.predict(X_latest)
 
+    # Every run is also appended to the forecast history so live accuracy can be scored later
+    # (python -m src evaluate-forecasts); the snapshot table below is still replaced.
+    history = forecast_history.history_rows(
+        to_horizon_rows(latest_rows, yhat, horizons), keys, pd.Timestamp.now(tz="UTC")
+    )
+
+    # The serving API answers per country, so only country runs refresh its artifacts.
+    if not adm1:
+        save_serving_artifacts(model, latest_rows, yhat, horizons)
+
     latest_rows["run_date"] = date.today()
     latest_rows["as_of_date"] = latest_rows["date"].dt.date
-    latest_rows["forecast_date"] = (latest_rows["date"] + pd.Timedelta(days=1)).dt.date
-    latest_rows["pred_risk_next_day"] = yhat
+
+    if horizons == 1:
+        latest_rows["forecast_date"] = (latest_rows["date"] + pd.Timedelta(days=1)).dt.date
+        latest_rows["pred_risk_next_day"] = yhat
+        pred_cols = ["forecast_date", *keys, "pred_risk_next_day"]
+        dest_table = DEST_TABLE_ADM1 if adm1 else DEST_TABLE
+    else:
+        latest_rows = to_horizon_rows(latest_rows, yhat, horizons)
+        pred_cols = ["forecast_date", "horizon", *keys, "pred_risk"]
+        dest_table = DEST_TABLE_HORIZONS_ADM1 if adm1 else DEST_TABLE_HORIZONS
 
     out = latest_rows[
         [
             "run_date",
             "as_of_date",
-            "forecast_date",
-            "CountryCode",
-            "pred_risk_next_day",
+            *pred_cols,
             "risk_raw",
             "total_events",
             "conflict_share",
@@ -134,15 +313,20 @@ def main() -> None:
     # Overwrite the table so Tableau always reads the latest snapshot.
     pandas_gbq.to_gbq(
         out,
-        DEST_TABLE,
+        dest_table,
         project_id=PROJECT,
         if_exists="replace",
         location=LOCATION,
         progress_bar=True,
     )
 
-    print(f"Published: {PROJECT}.{DEST_TABLE}")
-    print(f"Countries forecasted: {len(out)}")
+    print(f"Published: {PROJECT}.{dest_table}")
+
+    history_table = forecast_history.TABLES[args.level]["history"]
+    forecast_history.append(client, history, history_table, "run_date", keys)
+    print(f"Appended {len(history)} row(s) to: {PROJECT}.{history_table}")
+    label = "Regions" if adm1 else "Countries"
+    print(f"{label} forecasted: {out[entity].nunique()}")
     print(out.head(5).to_string(index=False))
 
 
@@ -0,0 +1,238 @@
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+from src import aggregates, risk_variants, runs, schemas, sketches
+from src.publish_risk_forecasts import LATEST_FORECASTS_PATH
+
+ROOT = Path(__file__).resolve().parents[1]
+EXTRACT_DIR = ROOT / "tableau" / "extracts"
+HYPER_PATH = EXTRACT_DIR / "gdelt_portfolio.hyper"
+MANIFEST_PATH = EXTRACT_DIR / "manifest.json"
+
+SCHEMA = "Extract"
+
+# Every table is stored date-major (rows sorted by their partition column first), so Tableau
+# filters on date read contiguous blocks. Partitions are tracked in the manifest by content
+# hash; a refresh rewrites only partitions that are new or whose content changed.
+# partition=None means the table is small and simply replaced on every publish.
+TABLES = {
+    "events_daily_clean": {
+        "partition": "date",
+        "sort": ["date", "CountryCode", "EventRootCode"],
+    },
+    "events_country_daily": {"partition": "date", "sort": ["date", "CountryCode"]},
+    "events_root_monthly": {"partition": "month", "sort": ["month", "EventRootCode"]},
+    "country_risk_daily": {"partition": "date", "sort": ["date", "CountryCode"]},
+    "forecasts_latest": {"partition": None, "sort": ["CountryCode", "horizon"]},
+}
+
+
+def build_tables(clean: pd.DataFrame, forecasts: pd.DataFrame | None = None) -> dict:
+    # Curated tables + pre-aggregated rollups, all derived locally from the clean dataset,
+    # so the extract builds offline. Rollups add partial sums, then re-derive the averages.
+    clean = clean.dropna(subset=["date"])
+    hist = [c for c in clean.columns if c in sketches.HIST_COLS]
+    tables = {"events_daily_clean": clean.drop(columns=hist)}
+
+    tables["events_country_daily"] = aggregates.combine(
+        clean, keys=["date", "CountryCode"], with_sketches=False
+    )
+    monthly = clean.assign(month=clean["date"].dt.to_period("M").dt.to_timestamp())
+    tables["events_root_monthly"] = aggregates.combine(
+        monthly, keys=["month", "EventRootCode", "EventRootLabel"], with_sketches=False
+    )
+
+    # Same baseline definition as the BigQuery country_risk_daily table.
+    risk = risk_variants.score_variants(clean, [risk_variants.BASELINE])
+    tables["country_risk_daily"] = risk.drop(columns="variant")
+
+    if forecasts is not None:
+        tables["forecasts_latest"] = forecasts
+
+    return {
+        name: df.sort_values(TABLES[name]["sort"]).reset_index(drop=True)
+        for name, df in tables.items()
+    }
+
+
+def partition_hashes(df: pd.DataFrame, partition: str) -> dict[str, str]:
+    # One content fingerprint per partition value, computed in a single vectorized pass.
+    row_hash = pd.util.hash_pandas_object(df, index=False).astype("uint64")
+    sums = row_hash.groupby(df[partition]).sum()
+    return {str(k.date()): f"{v:016x}" for k, v in sums.items()}
+
+
+def to_arrow(df: pd.DataFrame) -> pa.Table:
+    # Timestamp columns hold whole days here, so they become Hyper DATE columns.
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, field in enumerate(table.schema):
+        if pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.date32()))
+    return table
+
+
+def hyper_type(arrow_type: pa.DataType):
+    from tableauhyperapi import SqlType
+
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return SqlType.text()
+    if pa.types.is_integer(arrow_type):
+        return SqlType.big_int()
+    if pa.types.is_floating(arrow_type):
+        return SqlType.double()
+    if pa.types.is_date(arrow_type):
+        return SqlType.date()
+    if pa.types.is_boolean(arrow_type):
+        return SqlType.bool()
+    raise TypeError(f"No Hyper type for Arrow type {arrow_type}")
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> dict:
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def publish(
+    tables: dict,
+    hyper_path: Path = HYPER_PATH,
+    manifest_path: Path = MANIFEST_PATH,
+    full: bool = False,
+) -> dict:
+    try:
+        from tableauhyperapi import (
+            Connection,
+            CreateMode,
+            HyperProcess,
+            TableDefinition,
+            TableName,
+            Telemetry,
+            escape_string_literal,
+        )
+    except ImportError as e:
+        raise ImportError(
+            "Writing .hyper extracts needs the optional Tableau Hyper API: "
+            "pip install tableauhyperapi"
+        ) from e
+
+    hyper_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest = {} if full or not hyper_path.exists() else load_manifest(manifest_path)
+    mode = CreateMode.CREATE_AND_REPLACE if not manifest else CreateMode.CREATE_IF_NOT_EXISTS
+    if not manifest:
+        # The file is about to be recreated, so the old manifest no longer describes it.
+        runs.write_text(manifest_path, "{}")
+    summary = {}
+
+    with (
+        HyperProcess(
+            Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU,
+            parameters={"log_dir": str(hyper_path.parent)},
+        ) as hyper,
+        Connection(hyper.endpoint, hyper_path, mode) as conn,
+        tempfile.TemporaryDirectory() as tmp,
+    ):
+        conn.catalog.create_schema_if_not_exists(SCHEMA)
+
+        for name, df in tables.items():
+            spec = TABLES[name]
+            table_name = TableName(SCHEMA, name)
+            arrow = to_arrow(df)
+
+            # Hyper autocommits every command, so each table's drop/delete/insert runs in one
+            # transaction: a crash leaves the table as the manifest describes it. The manifest
+            # is saved after each commit.
+            conn.execute_command("BEGIN TRANSACTION")
+            try:
+                # Schema changes (new columns, new types) fall back to a full table rewrite.
+                columns = [TableDefinition.Column(f.name, hyper_type(f.type)) for f in arrow.schema]
+                layout = [f"{f.name}:{f.type}" for f in arrow.schema]
+                previous = manifest.get(name, {})
+                if previous.get("layout") != layout or spec["partition"] is None:
+                    conn.execute_command(f"DROP TABLE IF EXISTS {table_name}")
+                    previous = {}
+                conn.catalog.create_table_if_not_exists(TableDefinition(table_name, columns))
+
+                if spec["partition"] is None:
+                    todo, hashes = None, {}
+                    rows = arrow
+                else:
+                    part = spec["partition"]
+                    hashes = partition_hashes(df, part)
+                    old = previous.get("partitions", {})
+                    todo = sorted(k for k, v in hashes.items() if old.get(k) != v)
+
+                    # Vanished partitions and everything about to be inserted are deleted
+                    # first, so an insert never duplicates rows the manifest didn't record.
+                    stale = sorted((set(old) - set(hashes)) | set(todo))
+                    if stale:
+                        keys = ", ".join(f"DATE {escape_string_literal(k)}" for k in stale)
+                        conn.execute_command(f'DELETE FROM {table_name} WHERE "{part}" IN ({keys})')
+                    keep = df[part].dt.strftime("%Y-%m-%d").isin(todo).to_numpy()
+                    rows = arrow.filter(pa.array(keep))
+
+                # Hyper reads the Parquet file itself: no per-row Python inserts.
+                if rows.num_rows:
+                    import pyarrow.parquet as pq
+
+                    tmp_file = Path(tmp) / f"{name}.parquet"
+                    pq.write_table(rows, tmp_file)
+                    conn.execute_command(
+                        f"INSERT INTO {table_name} SELECT * FROM "
+                        f"external({escape_string_literal(str(tmp_file))}, FORMAT => 'parquet')"
+                    )
+            except BaseException:
+                conn.execute_command("ROLLBACK")
+                raise
+            conn.execute_command("COMMIT")
+
+            manifest[name] = {"layout": layout, "partitions": hashes}
+            runs.write_text(manifest_path, json.dumps(manifest, indent=2, sort_keys=True))
+            summary[name] = {
+                "rows": len(df),
+                "written": rows.num_rows,
+                "partitions_written": len(hashes) if todo is None else len(todo),
+            }
+
+    return summary
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Write the curated tables to a Tableau .hyper.")
+    parser.add_argument(
+        "--out", type=Path, help="Output .hyper (default: tableau/extracts/ of the layout)."
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild every table instead of only new or changed partitions.",
+    )
+    runs.add_run_args(parser)
+    args = parser.parse_args(argv)
+    layout = runs.layout_for(args.window, args.run_id)
+    out = args.out or layout.root / HYPER_PATH.relative_to(ROOT)
+
+    start = time.perf_counter()
+    clean = schemas.read_events_daily_clean(processed_dir=layout.processed)
+    # Forecasts come from the same layout: a run without its own forecasts gets none, never
+    # another run's (or the shared) ones.
+    forecasts = None
+    forecasts_path = layout.root / LATEST_FORECASTS_PATH.relative_to(ROOT)
+    if forecasts_path.exists():
+        forecasts = pd.read_csv(forecasts_path, parse_dates=["as_of_date", "forecast_date"])
+    tables = build_tables(clean, forecasts)
+
+    summary = publish(tables, out, out.with_name(MANIFEST_PATH.name), full=args.full)
+    for name, s in summary.items():
+        print(
+            f"{name}: {s['rows']:,} rows, wrote {s['written']:,} "
+            f"({s['partitions_written']} partition(s))"
+        )
+    print(f"Saved: {out} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,88 @@
-from pathlib import Path
+import argparse
 
 import pandas as pd
-import pandas_gbq
+
+from src import data_quality, runs
+from src.schemas import read_events_daily_clean
 
 BILLING_PROJECT = "gen-lang-client-0366281238"
 DESTINATION = "gdelt_portfolio.events_daily_clean"
+DESTINATION_ADM1 = "gdelt_portfolio.events_daily_adm1_clean"
 LOCATION = "US"
 
 
-def main() -> None:
-    # This pushes the cleaned dataset into BigQuery so Tableau can query it directly.
-    root = Path(__file__).resolve().parents[1]
+def publish_adm1(df: pd.DataFrame) -> None:
+    from google.cloud import bigquery
+
+    # Region-days are ~10x the country rows, so only the days in this extract are replaced:
+    # load into a staging table, then swap those day partitions in one transaction. The
+    # staging table is unique per publish, so concurrent window publishes never share it.
+    client = bigquery.Client(project=BILLING_PROJECT, location=LOCATION)
+    dest = f"{BILLING_PROJECT}.{DESTINATION_ADM1}"
+    staging = f"{dest}_staging_{runs.new_run_id()}"
 
-    parquet_path = root / "data" / "processed" / "events_daily_clean.parquet"
-    csv_gz_path = root / "data" / "processed" / "events_daily_clean.csv.gz"
+    job_config = bigquery.LoadJobConfig(write_disposition="WRITE_TRUNCATE")
+    lo, hi = df["date"].min().date(), df["date"].max().date()
+    try:
+        client.load_table_from_dataframe(df, staging, job_config=job_config).result()
+        client.query(
+            f"""
+            CREATE TABLE IF NOT EXISTS `{dest}`
+            PARTITION BY DATE(date) CLUSTER BY CountryCode, RegionCode
+            AS SELECT * FROM `{staging}` WHERE FALSE;
 
-    # This reads the fastest local format available.
-    if parquet_path.exists():
-        df = pd.read_parquet(parquet_path)
-    else:
-        df = pd.read_csv(csv_gz_path)
+            BEGIN TRANSACTION;
+            DELETE FROM `{dest}` WHERE DATE(date) BETWEEN '{lo}' AND '{hi}';
+            INSERT INTO `{dest}` SELECT * FROM `{staging}`;
+            COMMIT TRANSACTION;
+            """
+        ).result()
+    finally:
+        client.delete_table(staging, not_found_ok=True)
+    print(f"Published table: {dest} (replaced {lo} → {hi})")
 
-    # This keeps dates clean for BigQuery and downstream tools.
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Publish the clean events table to BigQuery.")
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Publish even if the latest data-quality check failed.",
+    )
+    parser.add_argument(
+        "--level",
+        choices=["country", "adm1"],
+        default="country",
+        help="adm1 publishes the regional table (day partitions replaced in place).",
+    )
+    runs.add_run_args(parser)
+    args = parser.parse_args(argv)
+    layout = runs.layout_for(args.window, args.run_id)
+
+    # This refuses to overwrite the Tableau table with data that failed validation.
+    try:
+        failed = data_quality.failed_partitions(layout.qa_history)
+    except FileNotFoundError:
+        if not args.force:
+            raise
+        failed = []
+    if len(failed):
+        dates = ", ".join(str(d)[:10] for d in failed["date"].head(5))
+        msg = f"Data-quality gate failed for {len(failed)} partition(s): {dates}"
+        if not args.force:
+            report = layout.reports / "data_quality_events_daily.md"
+            raise SystemExit(f"{msg}. See {report} or use --force.")
+        print(f"{msg}. Publishing anyway (--force).")
+
+    if args.level == "adm1":
+        publish_adm1(read_events_daily_clean("adm1", layout.processed).dropna(subset=["date"]))
+        return
+
+    import pandas_gbq
+
+    # This pushes the cleaned dataset into BigQuery so Tableau can query it directly.
+    # The typed hand-off from the clean stage already carries real datetimes.
+    df = read_events_daily_clean(processed_dir=layout.processed)
     df = df.dropna(subset=["date"])
 
     # This overwrites the table each run so Tableau always reads the latest version.
@@ -0,0 +1,212 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from src import schemas
+
+# Risk-definition registry. Every variant is a transparent blend of three daily signals:
+# - conflict share: events whose CAMEO root is in conflict_roots, over all events
+# - negative share: events in rows with AvgTone <= tone_threshold, over all events
+# - volume: LOG(1 + total_events)
+# "baseline" is the published country_risk_daily definition.
+CONFLICT_ROOTS = ["14", "15", "16", "17", "18", "19", "20"]
+
+VARIANTS = {
+    "baseline": {
+        "conflict_roots": CONFLICT_ROOTS,
+        "tone_threshold": -2.0,
+        "weights": {"conflict": 1.5, "negative": 1.0, "volume": 0.5},
+    },
+    "violence_only": {
+        "conflict_roots": ["18", "19", "20"],
+        "tone_threshold": -2.0,
+        "weights": {"conflict": 1.5, "negative": 1.0, "volume": 0.5},
+    },
+    "strict_tone": {
+        "conflict_roots": CONFLICT_ROOTS,
+        "tone_threshold": -5.0,
+        "weights": {"conflict": 1.5, "negative": 1.0, "volume": 0.5},
+    },
+    "conflict_heavy": {
+        "conflict_roots": CONFLICT_ROOTS,
+        "tone_threshold": -2.0,
+        "weights": {"conflict": 3.0, "negative": 0.5, "volume": 0.5},
+    },
+    "volume_neutral": {
+        "conflict_roots": CONFLICT_ROOTS,
+        "tone_threshold": -2.0,
+        "weights": {"conflict": 1.5, "negative": 1.0, "volume": 0.0},
+    },
+}
+
+BASELINE = "baseline"
+KEYS = ["date", "CountryCode"]
+ADM1_KEYS = ["date", "CountryCode", "RegionCode"]
+
+
+def select(names: list[str] | None = None, variants: dict = VARIANTS) -> dict:
+    # Picks variants by name (all when None) and checks them before they reach SQL.
+    names = list(variants) if names is None else names
+    unknown = [n for n in names if n not in variants]
+    if unknown:
+        raise ValueError(f"Unknown risk variant(s): {unknown}. Known: {list(variants)}")
+
+    for name in names:
+        spec = variants[name]
+        if not re.fullmatch(r"[a-z][a-z0-9_]*", name):
+            raise ValueError(f"Variant name {name!r} must be lower_snake_case")
+        if not all(re.fullmatch(r"\d{2}", r) for r in spec["conflict_roots"]):
+            raise ValueError(f"Variant {name!r}: conflict_roots must be 2-digit CAMEO codes")
+        if set(spec["weights"]) != {"conflict", "negative", "volume"}:
+            raise ValueError(f"Variant {name!r}: weights need conflict, negative and volume")
+    return {n: variants[n] for n in names}
+
+
+def _signals(variants: dict) -> tuple[list[tuple[str, ...]], list[float]]:
+    # Variants often share a root set or a threshold; each distinct one is aggregated once.
+    root_sets = list(dict.fromkeys(tuple(sorted(v["conflict_roots"])) for v in variants.values()))
+    thresholds = list(dict.fromkeys(float(v["tone_threshold"]) for v in variants.values()))
+    return root_sets, thresholds
+
+
+def build_query(
+    source: str,
+    names: list[str] | None = None,
+    variants: dict = VARIANTS,
+    keys: list[str] = KEYS,
+) -> str:
+    # One scan of the source: every distinct signal is a column of the same GROUP BY, and the
+    # variants are unpivoted afterwards with UNNEST over one STRUCT per variant.
+    # keys=ADM1_KEYS scores region-days from the ADM1 clean table instead.
+    variants = select(names, variants)
+    region = "\n        RegionCode," if "RegionCode" in keys else ""
+    group_by = ", ".join(keys)
+    long_keys = ", ".join(f"agg.{k}" for k in keys)
+    out_keys = ",\n      ".join(keys)
+    root_sets, thresholds = _signals(variants)
+
+    signal_cols = [
+        f"SUM(IF(EventRootCode IN ({', '.join(repr(r) for r in roots)}), EventCount, 0)) "
+        f"AS conflict_events_{i}"
+        for i, roots in enumerate(root_sets)
+    ] + [
+        f"SUM(IF(AvgTone <= {t}, EventCount, 0)) AS negative_tone_events_{j}"
+        for j, t in enumerate(thresholds)
+    ]
+
+    structs = []
+    for name, spec in variants.items():
+        i = root_sets.index(tuple(sorted(spec["conflict_roots"])))
+        j = thresholds.index(float(spec["tone_threshold"]))
+        w = spec["weights"]
+        structs.append(
+            f"STRUCT('{name}' AS variant, conflict_events_{i} AS conflict_events, "
+            f"negative_tone_events_{j} AS negative_tone_events, "
+            f"{float(w['conflict'])} AS w_conflict, {float(w['negative'])} AS w_negative, "
+            f"{float(w['volume'])} AS w_volume)"
+        )
+
+    signals_sql = ",\n        ".join(signal_cols)
+    structs_sql = ",\n        ".join(structs)
+    return f"""
+    WITH base AS (
+      SELECT
+        DATE(date) AS date,
+        CountryCode,{region}
+        LPAD(CAST(EventRootCode AS STRING), 2, '0') AS EventRootCode,
+        CAST(EventCount AS INT64) AS EventCount,
+        CAST(AvgTone AS FLOAT64) AS AvgTone,
+        CAST(ToneCount AS INT64) AS ToneCount,
+        CAST(SumTone AS FLOAT64) AS SumTone
+      FROM `{source}`
+      WHERE CountryCode IS NOT NULL
+        AND date IS NOT NULL
+    ),
+    agg AS (
+      SELECT
+        {group_by},
+        SUM(EventCount) AS total_events,
+        SAFE_DIVIDE(SUM(SumTone), SUM(ToneCount)) AS weighted_avg_tone,
+        {signals_sql}
+      FROM base
+      GROUP BY {group_by}
+    ),
+    long AS (
+      SELECT {long_keys}, agg.total_events, agg.weighted_avg_tone, v.*
+      FROM agg, UNNEST([
+        {structs_sql}
+      ]) AS v
+    )
+    SELECT
+      {out_keys},
+      variant,
+      total_events,
+      conflict_events,
+      negative_tone_events,
+      weighted_avg_tone,
+      SAFE_DIVIDE(conflict_events, total_events) AS conflict_share,
+      SAFE_DIVIDE(negative_tone_events, total_events) AS negative_share,
+      LOG(1 + total_events) AS log_events,
+      (
+        w_conflict * SAFE_DIVIDE(conflict_events, total_events)
+        + w_negative * SAFE_DIVIDE(negative_tone_events, total_events)
+        + w_volume * LOG(1 + total_events)
+      ) AS risk_raw
+    FROM long
+    """
+
+
+def score_variants(
+    df: pd.DataFrame,
+    names: list[str] | None = None,
+    variants: dict = VARIANTS,
+    keys: list[str] = KEYS,
+) -> pd.DataFrame:
+    # Local twin of build_query over events_daily_clean rows: one groupby for all signals,
+    # then every variant is scored at once with (cells x variants) array arithmetic.
+    variants = select(names, variants)
+    root_sets, thresholds = _signals(variants)
+
+    events = df["EventCount"].astype("float64")
+    parts = {"total_events": events, "SumTone": df["SumTone"], "ToneCount": df["ToneCount"]}
+    for i, roots in enumerate(root_sets):
+        parts[f"c{i}"] = events.where(df["EventRootCode"].isin(roots), 0.0)
+    for j, t in enumerate(thresholds):
+        parts[f"n{j}"] = events.where(df["AvgTone"] <= t, 0.0)
+
+    agg = pd.DataFrame(parts).groupby([df[k] for k in keys], observed=True).sum(min_count=1)
+    agg = agg.reset_index()
+
+    ci = [root_sets.index(tuple(sorted(v["conflict_roots"]))) for v in variants.values()]
+    nj = [thresholds.index(float(v["tone_threshold"])) for v in variants.values()]
+    conflict = agg[[f"c{i}" for i in range(len(root_sets))]].to_numpy()[:, ci]
+    negative = agg[[f"n{j}" for j in range(len(thresholds))]].to_numpy()[:, nj]
+    w = np.array(
+        [[v["weights"][k] for k in ("conflict", "negative", "volume")] for v in variants.values()]
+    )
+
+    total = agg["total_events"].to_numpy()[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        conflict_share = conflict / np.where(total > 0, total, np.nan)
+        negative_share = negative / np.where(total > 0, total, np.nan)
+    log_events = np.log1p(total)
+    risk = w[:, 0] * conflict_share + w[:, 1] * negative_share + w[:, 2] * log_events
+
+    # (cells x variants) -> long form, cell-major so each (date, country) block stays together.
+    n_var = len(variants)
+    rep = np.repeat(np.arange(len(agg)), n_var)
+    out = agg.loc[rep, keys].reset_index(drop=True)
+    out["variant"] = np.tile(list(variants), len(agg))
+    out["total_events"] = agg["total_events"].to_numpy()[rep]
+    out["conflict_events"] = conflict.ravel()
+    out["negative_tone_events"] = negative.ravel()
+    out["weighted_avg_tone"] = (agg["SumTone"] / agg["ToneCount"].replace(0, np.nan)).to_numpy()[
+        rep
+    ]
+    out["conflict_share"] = conflict_share.ravel()
+    out["negative_share"] = negative_share.ravel()
+    out["log_events"] = np.repeat(log_events[:, 0], n_var)
+    out["risk_raw"] = risk.ravel()
+    level = "adm1" if "RegionCode" in keys else "country"
+    return schemas.coerce(out, schemas.table_for("country_risk_daily_variants", level))
@@ -0,0 +1,115 @@
+import json
+import os
+from contextlib import contextmanager
+from datetime import UTC, datetime
+from pathlib import Path
+from uuid import uuid4
+
+ROOT = Path(__file__).resolve().parents[1]
+RUNS_ROOT = ROOT / "runs"
+
+# Run-scoped outputs: runs/<window>/<run_id>/ mirrors the repo tree (data/processed/,
+# reports/...), so concurrent backfills of different windows never share a file. Each window
+# has a CURRENT file naming its last successful run; it only moves once a run finished.
+POINTER = "CURRENT"
+MANIFEST = "run.json"
+
+
+@contextmanager
+def atomic_path(path: Path):
+    # Yields a temporary sibling of path and renames it over path only if the block succeeds,
+    # so readers see the old file or the new one, never half of one. The temp name is unique
+    # per writer and keeps the suffix (matplotlib picks the format from it).
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.{uuid4().hex[:8]}{path.suffix}")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+@contextmanager
+def locked(path: Path):
+    # Exclusive lock for read-modify-write of a shared file (e.g. the QA history), held on a
+    # hidden sibling so the atomic rename of the file itself is unaffected.
+    import fcntl
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(f".{path.name}.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def write_text(path: Path, text: str) -> None:
+    with atomic_path(path) as tmp:
+        tmp.write_text(text, encoding="utf-8")
+
+
+class Layout:
+    # Where a stage reads and writes. The default root is the repo itself (the fixed shared
+    # paths); a run's root is its own directory with the same structure.
+
+    def __init__(self, root: Path = ROOT):
+        self.root = root
+        self.processed = root / "data" / "processed"
+        self.reports = root / "reports"
+        self.figures = self.reports / "figures"
+        self.qa_history = self.processed / "qa_history.parquet"
+
+
+def new_run_id() -> str:
+    # Sortable by start time, unique across processes started in the same second.
+    return f"{datetime.now(UTC):%Y%m%dT%H%M%SZ}_{uuid4().hex[:6]}"
+
+
+def run_dir(window: str, run_id: str, root: Path = RUNS_ROOT) -> Path:
+    return root / window / run_id
+
+
+def current(window: str, root: Path = RUNS_ROOT) -> str:
+    pointer = root / window / POINTER
+    if not pointer.exists():
+        raise FileNotFoundError(
+            f"No successful run for {window} under {root}. Run clean_events_daily.py "
+            f"--extract <file> --run-id first."
+        )
+    return pointer.read_text(encoding="utf-8").strip()
+
+
+def promote(window: str, run_id: str, root: Path = RUNS_ROOT) -> None:
+    # The pointer is swapped atomically, after everything the run wrote is in place.
+    write_text(root / window / POINTER, run_id + "\n")
+
+
+def write_manifest(layout: Layout, **fields) -> None:
+    fields["created_at"] = datetime.now(UTC).isoformat(timespec="seconds")
+    write_text(layout.root / MANIFEST, json.dumps(fields, indent=2) + "\n")
+
+
+def read_manifest(layout: Layout) -> dict:
+    path = layout.root / MANIFEST
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+
+def add_run_args(parser) -> None:
+    # --window/--run-id for the stages that read a run's clean dataset.
+    parser.add_argument(
+        "--window",
+        help="Read and write runs/<window>/<run id>/ (e.g. events_daily_20251001_20260101) "
+        "instead of the shared paths.",
+    )
+    parser.add_argument("--run-id", help="Run within --window (default: its CURRENT run).")
+
+
+def layout_for(window: str | None, run_id: str | None, root: Path = RUNS_ROOT) -> Layout:
+    # Downstream stages: no window means the shared paths; a window without a run ID means
+    # the window's current (last successful) run.
+    if window is None:
+        if run_id is not None:
+            raise ValueError("--run-id needs --window")
+        return Layout()
+    return Layout(run_dir(window, run_id or current(window, root), root))
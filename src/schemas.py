@@ -0,0 +1,229 @@
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from src.runs import atomic_path
+
+ROOT = Path(__file__).resolve().parents[1]
+PROCESSED_DIR = ROOT / "data" / "processed"
+
+CLEAN_FEATHER = PROCESSED_DIR / "events_daily_clean.arrow"
+CLEAN_PARQUET = PROCESSED_DIR / "events_daily_clean.parquet"
+CLEAN_CSV_GZ = PROCESSED_DIR / "events_daily_clean.csv.gz"
+
+ADM1_CLEAN_FEATHER = PROCESSED_DIR / "events_daily_adm1_clean.arrow"
+ADM1_CLEAN_PARQUET = PROCESSED_DIR / "events_daily_adm1_clean.parquet"
+
+
+# One typed schema per pipeline table so every stage agrees on column types.
+# Strings are Arrow-backed in pandas; numbers and timestamps use NumPy dtypes because
+# Arrow -> NumPy is zero-copy for null-free fixed-width columns and sklearn needs NumPy.
+SCHEMAS: dict[str, pa.Schema] = {
+    "events_daily_extract": pa.schema(
+        [
+            ("SQLDATE", pa.string()),
+            ("CountryCode", pa.string()),
+            ("EventRootCode", pa.string()),
+            ("EventCount", pa.int64()),
+            ("AvgTone", pa.float64()),
+            ("AvgGoldstein", pa.float64()),
+            ("ToneCount", pa.int64()),
+            ("SumTone", pa.float64()),
+            ("SumSqTone", pa.float64()),
+            ("GoldsteinCount", pa.int64()),
+            ("SumGoldstein", pa.float64()),
+            ("SumSqGoldstein", pa.float64()),
+            ("TotalMentions", pa.int64()),
+            ("TotalArticles", pa.int64()),
+            ("TotalSources", pa.int64()),
+            ("ToneHist", pa.string()),
+            ("GoldsteinHist", pa.string()),
+        ]
+    ),
+    "events_daily_clean": pa.schema(
+        [
+            ("SQLDATE", pa.string()),
+            ("CountryCode", pa.string()),
+            ("EventRootCode", pa.string()),
+            ("EventCount", pa.int64()),
+            ("AvgTone", pa.float64()),
+            ("AvgGoldstein", pa.float64()),
+            ("ToneCount", pa.int64()),
+            ("SumTone", pa.float64()),
+            ("SumSqTone", pa.float64()),
+            ("GoldsteinCount", pa.int64()),
+            ("SumGoldstein", pa.float64()),
+            ("SumSqGoldstein", pa.float64()),
+            ("TotalMentions", pa.int64()),
+            ("TotalArticles", pa.int64()),
+            ("TotalSources", pa.int64()),
+            ("ToneHist", pa.string()),
+            ("GoldsteinHist", pa.string()),
+            ("date", pa.timestamp("ns")),
+            ("EventRootLabel", pa.string()),
+            ("ToneBucket", pa.string()),
+        ]
+    ),
+    "country_risk_daily": pa.schema(
+        [
+            ("date", pa.timestamp("ns")),
+            ("CountryCode", pa.string()),
+            ("total_events", pa.int64()),
+            ("conflict_events", pa.int64()),
+            ("negative_tone_events", pa.int64()),
+            ("weighted_avg_tone", pa.float64()),
+            ("conflict_share", pa.float64()),
+            ("negative_share", pa.float64()),
+            ("log_events", pa.float64()),
+            ("risk_raw", pa.float64()),
+        ]
+    ),
+    "country_risk_daily_variants": pa.schema(
+        [
+            ("date", pa.timestamp("ns")),
+            ("CountryCode", pa.string()),
+            ("variant", pa.string()),
+            ("total_events", pa.int64()),
+            ("conflict_events", pa.int64()),
+            ("negative_tone_events", pa.int64()),
+            ("weighted_avg_tone", pa.float64()),
+            ("conflict_share", pa.float64()),
+            ("negative_share", pa.float64()),
+            ("log_events", pa.float64()),
+            ("risk_raw", pa.float64()),
+        ]
+    ),
+}
+
+
+def _with_region(schema: pa.Schema) -> pa.Schema:
+    # ADM1 tables are their country-level twin plus RegionCode right after CountryCode.
+    return schema.insert(
+        schema.get_field_index("CountryCode") + 1, pa.field("RegionCode", pa.string())
+    )
+
+
+# Sub-national (ADM1) twins of the country-level tables.
+ADM1_TABLES = {
+    "events_daily_extract": "events_daily_adm1_extract",
+    "events_daily_clean": "events_daily_adm1_clean",
+    "country_risk_daily": "region_risk_daily",
+    "country_risk_daily_variants": "region_risk_daily_variants",
+}
+SCHEMAS |= {adm1: _with_region(SCHEMAS[table]) for table, adm1 in ADM1_TABLES.items()}
+
+
+def table_for(table: str, level: str) -> str:
+    return ADM1_TABLES[table] if level == "adm1" else table
+
+
+STRING_DTYPE = pd.StringDtype("pyarrow")
+
+
+def columns(table: str) -> list[str]:
+    return SCHEMAS[table].names
+
+
+def pandas_dtype(arrow_type: pa.DataType):
+    # This is the single place that decides how an Arrow type looks inside pandas.
+    if pa.types.is_string(arrow_type):
+        return STRING_DTYPE
+    if pa.types.is_timestamp(arrow_type):
+        return "datetime64[ns]"
+    return arrow_type.to_pandas_dtype()
+
+
+def csv_dtypes(table: str) -> dict:
+    # Only string columns are pinned at read time; pinning ints would crash on bad rows.
+    return {f.name: STRING_DTYPE for f in SCHEMAS[table] if pa.types.is_string(f.type)}
+
+
+def _types_mapper(arrow_type: pa.DataType):
+    return STRING_DTYPE if pa.types.is_string(arrow_type) else None
+
+
+def coerce(df: pd.DataFrame, table: str) -> pd.DataFrame:
+    # Cast only the columns whose dtype differs from the schema, so typed input costs nothing.
+    for field in SCHEMAS[table]:
+        if field.name not in df.columns:
+            continue
+
+        target = pandas_dtype(field.type)
+        col = df[field.name]
+        if col.dtype == target:
+            continue
+
+        if pa.types.is_string(field.type):
+            df[field.name] = col.astype(STRING_DTYPE)
+        elif pa.types.is_timestamp(field.type):
+            df[field.name] = pd.to_datetime(col, errors="coerce").astype(target)
+        else:
+            # Bad rows become NaN instead of crashing later; ints stay float if NaNs appear.
+            num = pd.to_numeric(col, errors="coerce")
+            if pa.types.is_integer(field.type) and num.isna().any():
+                df[field.name] = num.astype("float64")
+            else:
+                df[field.name] = num.astype(target)
+    return df
+
+
+def write_feather(df: pd.DataFrame, path: Path, table: str) -> None:
+    # Uncompressed Arrow IPC so the next stage can memory-map it instead of decoding it.
+    arrow_table = pa.Table.from_pandas(df[columns(table)], preserve_index=False)
+    with atomic_path(path) as tmp:
+        feather.write_feather(arrow_table, tmp, compression="uncompressed")
+
+
+def read_feather(path: Path, table: str) -> pd.DataFrame:
+    # memory_map + split_blocks lets null-free numeric columns come through without copies.
+    arrow_table = feather.read_table(path, memory_map=True)
+    df = arrow_table.to_pandas(types_mapper=_types_mapper, split_blocks=True)
+    return coerce(df, table)
+
+
+def read_parquet(path: Path, table: str) -> pd.DataFrame:
+    df = pq.read_table(path).to_pandas(types_mapper=_types_mapper, split_blocks=True)
+    return coerce(df, table)
+
+
+def clean_paths(level: str = "country", processed_dir: Path = PROCESSED_DIR) -> tuple[Path, Path]:
+    # (Arrow, Parquet) hand-offs of the clean table; run-scoped outputs use their own dir.
+    feather_path, parquet_path = (
+        (ADM1_CLEAN_FEATHER, ADM1_CLEAN_PARQUET)
+        if level == "adm1"
+        else (CLEAN_FEATHER, CLEAN_PARQUET)
+    )
+    return processed_dir / feather_path.name, processed_dir / parquet_path.name
+
+
+def read_events_daily_clean(
+    level: str = "country", processed_dir: Path = PROCESSED_DIR
+) -> pd.DataFrame:
+    feather_path, parquet_path = clean_paths(level, processed_dir)
+
+    # The ADM1 clean table has no CSV fallback; it only exists as the typed hand-offs.
+    if level == "adm1":
+        if feather_path.exists():
+            return read_feather(feather_path, "events_daily_adm1_clean")
+        if parquet_path.exists():
+            return read_parquet(parquet_path, "events_daily_adm1_clean")
+        raise FileNotFoundError(
+            f"ADM1 clean dataset not found in {processed_dir}. Run clean_events_daily.py "
+            "--level adm1 first."
+        )
+
+    # This prefers the Arrow IPC hand-off, then Parquet, then the gzipped CSV fallback.
+    csv_path = processed_dir / CLEAN_CSV_GZ.name
+    if feather_path.exists():
+        return read_feather(feather_path, "events_daily_clean")
+    if parquet_path.exists():
+        return read_parquet(parquet_path, "events_daily_clean")
+    if csv_path.exists():
+        df = pd.read_csv(csv_path, dtype=csv_dtypes("events_daily_clean"))
+        return coerce(df, "events_daily_clean")
+    raise FileNotFoundError(
+        f"Clean dataset not found in {processed_dir}. Run clean_events_daily.py first."
+    )
@@ -0,0 +1,261 @@
+import argparse
+import csv
+import json
+import threading
+import time
+from collections import deque
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+MODEL_PATH = ROOT / "models" / "risk_forecaster.joblib"
+LATEST_FEATURES_PATH = ROOT / "models" / "latest_features.parquet"
+LATEST_FORECASTS_PATH = ROOT / "models" / "latest_forecasts.csv"
+
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class LatencyMetrics:
+    # This keeps a bounded window of request latencies so /metrics stays cheap to compute.
+    def __init__(self, window: int = 10_000) -> None:
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque] = {}
+        self._counts: dict[str, int] = {}
+        self._window = window
+
+    def record(self, endpoint: str, ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(endpoint, deque(maxlen=self._window)).append(ms)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            out = {}
+            for endpoint, samples in self._samples.items():
+                arr = np.fromiter(samples, dtype=float)
+                out[endpoint] = {
+                    "count": self._counts[endpoint],
+                    "mean_ms": round(float(arr.mean()), 3),
+                    "p50_ms": round(float(np.percentile(arr, 50)), 3),
+                    "p95_ms": round(float(np.percentile(arr, 95)), 3),
+                    "p99_ms": round(float(np.percentile(arr, 99)), 3),
+                    "max_ms": round(float(arr.max()), 3),
+                }
+            return out
+
+
+class ForecastService:
+    # This holds the persisted model + latest feature row per country in memory.
+    def __init__(
+        self,
+        model_path: Path = MODEL_PATH,
+        features_path: Path = LATEST_FEATURES_PATH,
+    ) -> None:
+        import joblib
+        import pandas as pd
+
+        # mmap_mode="r" maps the forest's node arrays straight from disk instead of copying them.
+        bundle = joblib.load(model_path, mmap_mode="r")
+        self.model = bundle["model"]
+        self.feature_cols: list[str] = list(bundle["feature_cols"])
+        self.horizons: int = int(bundle["horizons"])
+        self.run_date: str = bundle["run_date"]
+
+        # Single rows are too small to benefit from a process pool; threads only add latency.
+        self.model.n_jobs = 1
+
+        feats = pd.read_parquet(features_path)
+        feats["date"] = pd.to_datetime(feats["date"])
+        self._countries = feats["CountryCode"].astype(str).tolist()
+        self._index = {code: i for i, code in enumerate(self._countries)}
+        self._as_of = feats["date"].dt.date.tolist()
+        self._risk = feats["risk_raw"].to_numpy(dtype=float)
+        self._X = feats[self.feature_cols].to_numpy(dtype=float)
+
+        self.metrics = LatencyMetrics()
+
+    @property
+    def countries(self) -> list[str]:
+        return list(self._countries)
+
+    def _rows(self, countries: list[str], overrides: dict | None) -> np.ndarray:
+        missing = [c for c in countries if c not in self._index]
+        if missing:
+            raise KeyError(f"Unknown CountryCode(s): {', '.join(missing)}")
+
+        X = self._X[[self._index[c] for c in countries]].copy()
+
+        # What-if queries replace selected feature values before predicting.
+        for col, value in (overrides or {}).items():
+            if col not in self.feature_cols:
+                raise KeyError(f"Unknown feature: {col}")
+            X[:, self.feature_cols.index(col)] = float(value)
+        return X
+
+    def _format(self, country: str, preds: np.ndarray) -> dict:
+        i = self._index[country]
+        as_of: date = self._as_of[i]
+        return {
+            "CountryCode": country,
+            "as_of_date": as_of.isoformat(),
+            "risk_as_of": float(self._risk[i]),
+            "forecasts": [
+                {
+                    "horizon": h,
+                    "forecast_date": (as_of + timedelta(days=h)).isoformat(),
+                    "pred_risk": float(preds[h - 1]),
+                }
+                for h in range(1, self.horizons + 1)
+            ],
+        }
+
+    def predict_many(self, countries: list[str], overrides: dict | None = None) -> list[dict]:
+        # One model.predict call for the whole batch keeps per-country cost tiny.
+        start = time.perf_counter()
+        X = self._rows(countries, overrides)
+        yhat = np.asarray(self.model.predict(X)).reshape(len(countries), self.horizons)
+        out = [self._format(c, yhat[k]) for k, c in enumerate(countries)]
+        self.metrics.record("predict", (time.perf_counter() - start) * 1000)
+        return out
+
+    def predict(self, country: str, overrides: dict | None = None) -> dict:
+        return self.predict_many([country], overrides)[0]
+
+
+def make_server(
+    service: ForecastService, host: str = HOST, port: int = PORT
+) -> ThreadingHTTPServer:
+    # This exposes the service over local HTTP with JSON in and out (stdlib only).
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: dict | list) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _timed(self, endpoint: str, fn) -> None:
+            start = time.perf_counter()
+            try:
+                status, payload = fn()
+            except KeyError as e:
+                status, payload = 404, {"error": str(e.args[0])}
+            except (ValueError, TypeError) as e:
+                status, payload = 400, {"error": str(e)}
+            # Record before replying so /metrics never lags behind a finished request.
+            service.metrics.record(endpoint, (time.perf_counter() - start) * 1000)
+            self._send(status, payload)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            if url.path == "/health":
+                self._send(200, {"status": "ok", "run_date": service.run_date})
+            elif url.path == "/metrics":
+                self._send(200, service.metrics.snapshot())
+            elif url.path.startswith("/forecast/"):
+                country = url.path.removeprefix("/forecast/").upper()
+                self._timed("GET /forecast", lambda: (200, service.predict(country)))
+            elif url.path == "/forecast":
+                # No country= means every country, like a POST without "countries".
+                countries = parse_qs(url.query).get("country") or service.countries
+                self._timed(
+                    "GET /forecast",
+                    lambda: (200, service.predict_many([c.upper() for c in countries])),
+                )
+            else:
+                self._send(404, {"error": f"Unknown path: {url.path}"})
+
+        def do_POST(self) -> None:
+            url = urlparse(self.path)
+            if url.path != "/forecast":
+                self._send(404, {"error": f"Unknown path: {url.path}"})
+                return
+
+            def handle():
+                length = int(self.headers.get("Content-Length", 0))
+                req = json.loads(self.rfile.read(length) or b"{}")
+
+                # Malformed bodies get a 400 instead of an exception that drops the connection.
+                if not isinstance(req, dict):
+                    raise ValueError("Request body must be a JSON object")
+                countries = req.get("countries") or service.countries
+                if not isinstance(countries, list) or not all(
+                    isinstance(c, str) for c in countries
+                ):
+                    raise ValueError("countries must be a list of CountryCode strings")
+                overrides = req.get("overrides")
+                if overrides is not None and not isinstance(overrides, dict):
+                    raise ValueError("overrides must be an object of feature: value")
+                return 200, service.predict_many(countries, overrides)
+
+            self._timed("POST /forecast", handle)
+
+        def log_message(self, format: str, *args) -> None:
+            # Latency lives in /metrics; per-request stderr lines would dominate the cost.
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def lookup(country: str, path: Path = LATEST_FORECASTS_PATH) -> list[dict]:
+    # This reads the published predictions with the stdlib only, so it starts instantly.
+    country = country.upper()
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row for row in csv.DictReader(f) if row["CountryCode"] == country]
+
+
+def lookup_main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Print the latest published forecast for a country."
+    )
+    parser.add_argument("country")
+    parser.add_argument("--path", type=Path, default=LATEST_FORECASTS_PATH)
+    args = parser.parse_args(argv)
+
+    if not args.path.exists():
+        raise SystemExit(
+            f"No published forecasts at {args.path}. Run `python -m src forecast` first."
+        )
+    rows = lookup(args.country, args.path)
+    if not rows:
+        raise SystemExit(f"No forecast for {args.country.upper()} in {args.path}")
+    for row in rows:
+        print(
+            f"{row['CountryCode']}  as_of={row['as_of_date']}  t+{row['horizon']} "
+            f"({row['forecast_date']}): {float(row['pred_risk']):.4f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve risk forecasts from the persisted model.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--model", type=Path, default=MODEL_PATH)
+    parser.add_argument("--features", type=Path, default=LATEST_FEATURES_PATH)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    service = ForecastService(args.model, args.features)
+    print(
+        f"Loaded model ({len(service.countries)} countries, {service.horizons} horizon(s)) "
+        f"in {(time.perf_counter() - start) * 1000:.0f} ms"
+    )
+
+    server = make_server(service, args.host, args.port)
+    print(f"Serving on http://{args.host}:{server.server_port}  (GET /forecast/US, POST /forecast)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Fixed-bin histograms of event-level values per extract cell. Fixed edges make them
+# mergeable by plain addition (across dates, countries, roots or partitions), and every
+# value outside the range is clamped into the first/last bin so counts are never lost.
+SKETCHES = {
+    "ToneHist": {"column": "AvgTone", "lo": -20.0, "hi": 20.0, "bins": 40},
+    "GoldsteinHist": {"column": "GoldsteinScale", "lo": -10.0, "hi": 10.0, "bins": 20},
+}
+
+HIST_COLS = list(SKETCHES)
+
+
+def edges(name: str) -> np.ndarray:
+    spec = SKETCHES[name]
+    return np.linspace(spec["lo"], spec["hi"], spec["bins"] + 1)
+
+
+def bin_sql(name: str) -> str:
+    # Bin index for one raw event row (NULL values get a NULL bin and are not counted).
+    spec = SKETCHES[name]
+    width = (spec["hi"] - spec["lo"]) / spec["bins"]
+    return (
+        f"LEAST(GREATEST(CAST(FLOOR(({spec['column']} - ({spec['lo']})) / {width}) AS INT64), 0), "
+        f"{spec['bins'] - 1})"
+    )
+
+
+def hist_sql(name: str, bin_col: str) -> str:
+    # One COUNTIF per bin keeps the histogram inside the same single-scan GROUP BY.
+    counts = ", ".join(f"COUNTIF({bin_col} = {i})" for i in range(SKETCHES[name]["bins"]))
+    return f"[{counts}] AS {name}"
+
+
+def encode(mat: np.ndarray) -> pd.Series:
+    # Dense (cells x bins) counts -> sparse "bin:count,..." strings (empty bins are skipped).
+    # Built with Arrow compute kernels so millions of cells encode without a Python loop.
+    rows, cols = np.nonzero(mat)
+    tokens = pc.binary_join_element_wise(
+        pa.array(cols).cast(pa.string()), pa.array(mat[rows, cols]).cast(pa.string()), ":"
+    )
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=len(mat)))])
+    lists = pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), tokens)
+    return pd.Series(pc.binary_join(lists, ","), dtype="string[pyarrow]")
+
+
+def decode(values: pd.Series, name: str) -> np.ndarray:
+    # Sparse strings -> dense (cells x bins) int64 matrix; missing sketches decode as empty rows.
+    bins = SKETCHES[name]["bins"]
+    arr = pc.fill_null(pa.array(values.astype("string[pyarrow]").array), "")
+    pairs = pc.split_pattern(arr, ",")
+    row = pc.list_parent_indices(pairs).to_numpy()
+    tokens = pc.list_flatten(pairs)
+    keep = pc.greater(pc.utf8_length(tokens), 0)
+    parts = pc.split_pattern(pc.filter(tokens, keep), ":")
+    row = row[keep.to_numpy(zero_copy_only=False)]
+    b = pc.list_element(parts, 0).cast(pa.int64()).to_numpy()
+    n = pc.list_element(parts, 1).cast(pa.int64()).to_numpy()
+    flat = np.bincount(row * bins + b, weights=n, minlength=len(values) * bins)
+    return flat.astype(np.int64).reshape(len(values), bins)
+
+
+def encode_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # BigQuery returns each histogram as an array per row; store them as sparse strings.
+    for name in HIST_COLS:
+        if name in df.columns and len(df) and not isinstance(df[name].iloc[0], str):
+            df[name] = encode(np.stack(df[name].to_numpy()).astype(np.int64)).to_numpy()
+    return df
+
+
+def merge(df: pd.DataFrame, keys: list[str], name: str) -> pd.DataFrame:
+    # Rollup: decode once, sum the bin counts per group, return a dense bin matrix per key.
+    mat = pd.DataFrame(decode(df[name], name), index=df.index)
+    return mat.groupby([df[k] for k in keys], observed=True).sum()
+
+
+def rollup(df: pd.DataFrame, keys: list[str], name: str) -> pd.Series:
+    # Same as merge, re-encoded so the result can be stored next to other rolled-up columns.
+    merged = merge(df, keys, name)
+    return pd.Series(encode(merged.to_numpy()).to_numpy(), index=merged.index, name=name)
+
+
+def quantiles(counts: np.ndarray, name: str, qs: list[float]) -> np.ndarray:
+    # Quantiles from bin counts, interpolating linearly inside the bin that holds each one.
+    counts = np.atleast_2d(np.asarray(counts, dtype=float))
+    e = edges(name)
+    cum = np.cumsum(counts, axis=1)
+    total = cum[:, -1:]
+    out = np.full((len(counts), len(qs)), np.nan)
+    for j, q in enumerate(qs):
+        target = q * total
+        # Leading empty bins are skipped, so q=0 starts at the first non-empty bin.
+        idx = np.minimum(((cum < target) | (cum <= 0)).sum(axis=1), counts.shape[1] - 1)
+        below = np.where(idx > 0, np.take_along_axis(cum, (idx - 1)[:, None], axis=1)[:, 0], 0.0)
+        in_bin = counts[np.arange(len(counts)), idx]
+        frac = np.divide(target[:, 0] - below, in_bin, out=np.zeros(len(counts)), where=in_bin > 0)
+        out[:, j] = np.where(total[:, 0] > 0, e[idx] + frac * (e[idx + 1] - e[idx]), np.nan)
+    return out
@@ -0,0 +1,176 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import risk_variants, runs, schemas
+
+PROJECT = "gen-lang-client-0366281238"
+SOURCE_TABLE = f"{PROJECT}.gdelt_portfolio.country_risk_daily"
+DEST_TABLE = "gdelt_portfolio.country_risk_lead_lag"
+LOCATION = "US"
+
+ROOT = Path(__file__).resolve().parents[1]
+OUT_DIR = ROOT / "reports" / "spillover"
+FIG_DIR = ROOT / "reports" / "figures"
+
+MAX_LAG = 7
+TOP_K = 50
+MIN_COVERAGE = 0.8
+
+
+def risk_matrix(df: pd.DataFrame, min_coverage: float = MIN_COVERAGE) -> pd.DataFrame:
+    # Dense date x country matrix; missing days stay NaN so overlaps can be counted exactly.
+    wide = df.pivot_table(index="date", columns="CountryCode", values="risk_raw", aggfunc="mean")
+    wide = wide.reindex(pd.date_range(wide.index.min(), wide.index.max(), freq="D"))
+
+    # Sparse series produce noisy correlations, so only well-covered countries take part.
+    return wide.loc[:, wide.notna().mean() >= min_coverage]
+
+
+def standardize(wide: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    # Day-over-day changes remove shared trends, so correlation reflects co-moving spikes.
+    diff = wide.diff().iloc[1:]
+    z = (diff - diff.mean()) / diff.std(ddof=0).replace(0, np.nan)
+    mask = z.notna().to_numpy(dtype=float)
+    return z.fillna(0.0).to_numpy(), mask
+
+
+def lagged_xcorr(z: np.ndarray, mask: np.ndarray, max_lag: int) -> np.ndarray:
+    # C[l, i, j] = corr(x_i[t], x_j[t + l]) for every pair at once. Missing days are zeros in z,
+    # so masked matrix products give each pair's overlap count, sums, sums of squares and cross
+    # products; the Pearson correlation then uses that overlap's own means and variances.
+    n = z.shape[1]
+    out = np.full((max_lag + 1, n, n), np.nan)
+    for lag in range(max_lag + 1):
+        lead, follow = z[: len(z) - lag], z[lag:]
+        m_lead, m_follow = mask[: len(z) - lag], mask[lag:]
+        count = m_lead.T @ m_follow
+        sum_lead, sum_follow = lead.T @ m_follow, m_lead.T @ follow
+        with np.errstate(invalid="ignore", divide="ignore"):
+            count = np.where(count > 2, count, np.nan)
+            cov = lead.T @ follow - sum_lead * sum_follow / count
+            var_lead = (lead**2).T @ m_follow - sum_lead**2 / count
+            var_follow = m_lead.T @ follow**2 - sum_follow**2 / count
+            denom = np.sqrt(var_lead * var_follow)
+            out[lag] = np.clip(cov / np.where(denom > 0, denom, np.nan), -1.0, 1.0)
+    return out
+
+
+def top_edges(corr: np.ndarray, countries: list[str], k: int = TOP_K) -> pd.DataFrame:
+    # Best positive lag per ordered pair (leader -> follower), ranked by correlation.
+    if len(corr) < 2:
+        raise ValueError("top_edges needs correlations for at least one positive lag")
+    lagged = corr[1:]
+    best = np.nanargmax(np.where(np.isnan(lagged), -np.inf, lagged), axis=0)
+    best_corr = np.take_along_axis(lagged, best[None], axis=0)[0]
+    np.fill_diagonal(best_corr, np.nan)
+
+    leader, follower = np.where(~np.isnan(best_corr))
+    edges = pd.DataFrame(
+        {
+            "leader": np.asarray(countries)[leader],
+            "follower": np.asarray(countries)[follower],
+            "lag_days": best[leader, follower] + 1,
+            "corr": best_corr[leader, follower],
+            # Same-day correlation for context: a real lead should beat it.
+            "corr_lag0": corr[0][leader, follower],
+        }
+    )
+    return edges.sort_values("corr", ascending=False).head(k).reset_index(drop=True)
+
+
+def save_edges_figure(edges: pd.DataFrame, n: int = 15, fig_dir: Path = FIG_DIR) -> None:
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set_theme(style="whitegrid")
+    top = edges.head(n).iloc[::-1]
+    labels = top["leader"] + " → " + top["follower"] + " (+" + top["lag_days"].astype(str) + "d)"
+
+    plt.figure(figsize=(10, 6))
+    plt.barh(labels, top["corr"], label="lagged corr")
+    plt.scatter(top["corr_lag0"], labels, color="black", marker="|", s=200, label="same-day corr")
+    plt.title(f"Top {n} Lead-Lag Edges in Daily risk_raw Changes")
+    plt.xlabel("Correlation")
+    plt.legend(loc="lower right")
+
+    out = fig_dir / "11_lead_lag_top_edges.png"
+    plt.tight_layout()
+    with runs.atomic_path(out) as tmp:
+        plt.savefig(tmp, dpi=200)
+    plt.close()
+    print(f"Saved: {out}")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Cross-country lead-lag analysis of risk_raw.")
+    parser.add_argument("--max-lag", type=int, default=MAX_LAG)
+    parser.add_argument("--top-k", type=int, default=TOP_K)
+    parser.add_argument("--min-coverage", type=float, default=MIN_COVERAGE)
+    runs.add_run_args(parser)
+    args = parser.parse_args(argv)
+    if args.max_lag < 1:
+        parser.error("--max-lag must be at least 1 (edges are leads of one day or more)")
+    layout = runs.layout_for(args.window, args.run_id)
+
+    if args.window is None:
+        from google.cloud import bigquery
+
+        client = bigquery.Client(project=PROJECT)
+        q = f"""
+        SELECT date, CountryCode, risk_raw
+        FROM `{SOURCE_TABLE}`
+        WHERE date IS NOT NULL AND CountryCode IS NOT NULL
+        """
+        df = schemas.coerce(client.query(q).to_dataframe(), "country_risk_daily")
+    else:
+        # A run's risk is scored from its own clean dataset (baseline definition), and its
+        # edges stay in the run: the BigQuery table is shared, so nothing is published.
+        clean = schemas.read_events_daily_clean(processed_dir=layout.processed)
+        df = risk_variants.score_variants(clean.dropna(subset=["date"]), [risk_variants.BASELINE])
+
+    start = time.perf_counter()
+    wide = risk_matrix(df, args.min_coverage)
+    z, mask = standardize(wide)
+    corr = lagged_xcorr(z, mask, args.max_lag)
+    edges = top_edges(corr, wide.columns.tolist(), args.top_k)
+    elapsed = time.perf_counter() - start
+
+    n = wide.shape[1]
+    print(
+        f"Scanned {n * (n - 1):,} ordered pairs x {args.max_lag} lags "
+        f"over {len(wide)} days in {elapsed:.2f}s"
+    )
+
+    out_path = layout.reports / OUT_DIR.name / "top_lead_lag_edges.csv"
+    with runs.atomic_path(out_path) as tmp:
+        edges.to_csv(tmp, index=False)
+    print(f"Saved: {out_path}")
+    save_edges_figure(edges, fig_dir=layout.figures)
+    if args.window is not None:
+        print(edges.head(10).to_string(index=False))
+        return
+
+    import pandas_gbq
+
+    pandas_gbq.to_gbq(
+        edges,
+        DEST_TABLE,
+        project_id=PROJECT,
+        if_exists="replace",
+        location=LOCATION,
+        progress_bar=True,
+    )
+    print(f"Published: {PROJECT}.{DEST_TABLE}")
+    print(edges.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
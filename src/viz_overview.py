@@ -1,114 +1,164 @@
+import argparse
 from pathlib import Path
 
-import matplotlib
 import numpy as np
-
-matplotlib.use("Agg")
-
-import matplotlib.pyplot as plt
 import pandas as pd
-import seaborn as sns
+
+from src import lazy_engine, runs, sketches
+from src.schemas import read_events_daily_clean
 
 ROOT = Path(__file__).resolve().parents[1]
-DATA_PATH = ROOT / "data" / "processed" / "events_daily_clean.parquet"
 FIG_DIR = ROOT / "reports" / "figures"
-FIG_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def save_fig(name: str) -> None:
+def save_fig(name: str, fig_dir: Path = FIG_DIR) -> None:
     # This saves the current chart to disk so the repo has real artifacts.
-    out = FIG_DIR / name
+    import matplotlib.pyplot as plt
+
+    out = fig_dir / name
     plt.tight_layout()
-    plt.savefig(out, dpi=200)
+    with runs.atomic_path(out) as tmp:
+        plt.savefig(tmp, dpi=200)
     plt.close()
     print(f"Saved: {out}")
 
 
-def main() -> None:
+def overview_frames(df: pd.DataFrame) -> dict:
+    # Everything the figures need, as small aggregated frames (lazy_engine.overview_frames is
+    # the Polars twin, so plotting is the same for both engines).
+    df = df.dropna(subset=["date"])
+    frames = {
+        "daily": df.groupby("date", as_index=False)["EventCount"].sum(),
+        "top_countries": (
+            df.groupby("CountryCode", as_index=False)["EventCount"]
+            .sum()
+            .sort_values("EventCount", ascending=False)
+            .head(15)
+        ),
+        "top_roots": (
+            df.groupby(["EventRootCode", "EventRootLabel"], as_index=False)["EventCount"]
+            .sum()
+            .sort_values("EventCount", ascending=False)
+            .head(12)
+        ),
+        # Per-cell histograms describe individual events; AvgTone rows are already averages.
+        "has_sketches": "ToneHist" in df.columns and df["ToneHist"].notna().any(),
+    }
+
+    top_root_labels = frames["top_roots"]["EventRootLabel"].tolist()
+    df_top = df[df["EventRootLabel"].isin(top_root_labels)]
+    month = df_top["date"].dt.to_period("M").dt.to_timestamp().rename("month")
+    frames["heat"] = (
+        df_top.groupby([month, "EventRootLabel"])["EventCount"]
+        .sum()
+        .reset_index()
+        .pivot(index="EventRootLabel", columns="month", values="EventCount")
+        .fillna(0)
+    )
+
+    if frames["has_sketches"]:
+        # Merging every cell's sketch gives the true event-level distribution in one sum.
+        frames["tone_counts"] = sketches.decode(df["ToneHist"], "ToneHist").sum(axis=0)
+        frames["tone_box"] = sketches.merge(df_top, ["EventRootLabel"], "ToneHist").reindex(
+            top_root_labels
+        )
+    else:
+        tone = df.dropna(subset=["AvgTone"])
+        frames["tone_hist"] = np.histogram(tone["AvgTone"], bins=60, weights=tone["EventCount"])
+        frames["tone_rows"] = df_top[["EventRootLabel", "AvgTone"]]
+    return frames
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Draw the overview figures.")
+    runs.add_run_args(parser)
+    lazy_engine.add_engine_arg(parser)
+    args = parser.parse_args(argv)
+    layout = runs.layout_for(args.window, args.run_id)
+
+    # Plotting libraries load only when the stage actually runs.
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # This keeps styling consistent across every plot in the project.
     sns.set_theme(style="whitegrid")
 
-    # This dataset is already cleaned and labeled, so we can focus on insights.
-    df = pd.read_parquet(DATA_PATH)
-
-    # This makes sure our date column behaves like a real datetime everywhere.
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
-    df = df.dropna(subset=["date"])
+    # This dataset is already cleaned, labeled and typed, so we can focus on insights.
+    if args.engine == "polars":
+        frames = lazy_engine.overview_frames(lazy_engine.scan_clean(processed_dir=layout.processed))
+    else:
+        frames = overview_frames(read_events_daily_clean(processed_dir=layout.processed))
 
     # 1) Global activity over time.
-    daily = df.groupby("date", as_index=False)["EventCount"].sum()
     plt.figure(figsize=(10, 4))
-    sns.lineplot(data=daily, x="date", y="EventCount")
+    sns.lineplot(data=frames["daily"], x="date", y="EventCount")
     plt.title("Global Event Volume Over Time")
     plt.xlabel("Date")
     plt.ylabel("Total Event Count")
-    save_fig("01_global_event_volume_over_time.png")
+    save_fig("01_global_event_volume_over_time.png", layout.figures)
 
     # 2) Top countries by total activity (based on event location).
-    top_countries = (
-        df.groupby("CountryCode", as_index=False)["EventCount"]
-        .sum()
-        .sort_values("EventCount", ascending=False)
-        .head(15)
-    )
     plt.figure(figsize=(10, 5))
-    sns.barplot(data=top_countries, x="EventCount", y="CountryCode")
+    sns.barplot(data=frames["top_countries"], x="EventCount", y="CountryCode")
     plt.title("Top 15 Countries by Total Event Count")
     plt.xlabel("Total Event Count")
     plt.ylabel("Country Code")
-    save_fig("02_top_countries_by_event_count.png")
+    save_fig("02_top_countries_by_event_count.png", layout.figures)
 
     # 3) Tone distribution, weighted by how many events each row represents.
     plt.figure(figsize=(10, 4))
-    plt.hist(df["AvgTone"], bins=60, weights=df["EventCount"])
-    plt.title("Event-Weighted Tone Distribution (AvgTone)")
+    if frames["has_sketches"]:
+        bin_edges = sketches.edges("ToneHist")
+        plt.bar(bin_edges[:-1], frames["tone_counts"], width=np.diff(bin_edges), align="edge")
+        plt.title("Event-Level Tone Distribution (AvgTone)")
+        plt.ylabel("Events")
+    else:
+        counts, bin_edges = frames["tone_hist"]
+        plt.stairs(counts, bin_edges, fill=True)
+        plt.title("Event-Weighted Tone Distribution (AvgTone)")
+        plt.ylabel("Weighted Count")
     plt.xlabel("AvgTone")
-    plt.ylabel("Weighted Count")
-    save_fig("03_weighted_tone_distribution.png")
+    save_fig("03_weighted_tone_distribution.png", layout.figures)
 
     # 4) Which event categories dominate overall (CAMEO root codes).
-    top_roots = (
-        df.groupby(["EventRootCode", "EventRootLabel"], as_index=False)["EventCount"]
-        .sum()
-        .sort_values("EventCount", ascending=False)
-        .head(12)
-    )
     plt.figure(figsize=(10, 5))
-    sns.barplot(data=top_roots, x="EventCount", y="EventRootLabel")
+    sns.barplot(data=frames["top_roots"], x="EventCount", y="EventRootLabel")
     plt.title("Top 12 Event Root Categories by Total Event Count")
     plt.xlabel("Total Event Count")
     plt.ylabel("Event Root Category")
-    save_fig("04_top_event_root_categories.png")
+    save_fig("04_top_event_root_categories.png", layout.figures)
 
     # 5) Monthly heatmap of activity for the top root categories.
-    df["month"] = df["date"].dt.to_period("M").dt.to_timestamp()
-    top_root_labels = top_roots["EventRootLabel"].tolist()
-
-    heat = (
-        df[df["EventRootLabel"].isin(top_root_labels)]
-        .groupby(["month", "EventRootLabel"])["EventCount"]
-        .sum()
-        .reset_index()
-        .pivot(index="EventRootLabel", columns="month", values="EventCount")
-        .fillna(0)
-    )
-
     plt.figure(figsize=(12, 6))
-    sns.heatmap(np.log10(heat + 1), cbar=True)
+    sns.heatmap(np.log10(frames["heat"] + 1), cbar=True)
     plt.title("Monthly Activity Heatmap (log-scaled) for Top Root Categories")
     plt.xlabel("Month")
     plt.ylabel("Event Root Category")
-    save_fig("05_monthly_root_category_heatmap.png")
+    save_fig("05_monthly_root_category_heatmap.png", layout.figures)
 
     # 6) Tone by category (restricted to top categories so it stays readable).
-    df_top = df[df["EventRootLabel"].isin(top_root_labels)].copy()
     plt.figure(figsize=(12, 5))
-    sns.boxplot(data=df_top, x="EventRootLabel", y="AvgTone")
-    plt.title("Tone by Event Root Category (Top Categories)")
+    if frames["has_sketches"]:
+        # Box stats come from each category's merged sketch (whiskers at p5/p95).
+        merged = frames["tone_box"]
+        q = sketches.quantiles(merged.to_numpy(), "ToneHist", [0.05, 0.25, 0.5, 0.75, 0.95])
+        stats = [
+            {"label": label, "whislo": r[0], "q1": r[1], "med": r[2], "q3": r[3], "whishi": r[4]}
+            for label, r in zip(merged.index, q, strict=True)
+        ]
+        plt.gca().bxp(stats, showfliers=False)
+        plt.title("Event-Level Tone by Event Root Category (Top Categories, p5–p95 whiskers)")
+    else:
+        sns.boxplot(data=frames["tone_rows"], x="EventRootLabel", y="AvgTone")
+        plt.title("Tone by Event Root Category (Top Categories)")
     plt.xlabel("Event Root Category")
     plt.ylabel("AvgTone")
     plt.xticks(rotation=25, ha="right")
-    save_fig("06_tone_by_root_category_boxplot.png")
+    save_fig("06_tone_by_root_category_boxplot.png", layout.figures)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import argparse
 from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
+from src import runs
 
 
 def _latest_extract() -> Path | None:
@@ -12,38 +13,72 @@ def _latest_extract() -> Path | None:
     return extracts[-1] if extracts else None
 
 
-def main() -> None:
-    # This writes a single “latest.md” so the repo doesn’t fill up with daily logs.
-    out_dir = Path("reports/runlogs")
-    out_dir.mkdir(parents=True, exist_ok=True)
-    out_path = out_dir / "latest.md"
+def extract_summary(path: Path) -> dict:
+    # pandas loads only when there is an extract to summarize.
+    import pandas as pd
+
+    df = pd.read_csv(path, low_memory=False)
+    out = {"rows": len(df)}
+    if "SQLDATE" in df.columns:
+        out |= {"min": df["SQLDATE"].min(), "max": df["SQLDATE"].max()}
+    return out
+
 
-    extract_path = _latest_extract()
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Write the reproducibility run log.")
+    runs.add_run_args(parser)
+    # Same choices as lazy_engine.ENGINES; that module loads pandas, so it is imported only
+    # when the Polars engine is picked.
+    parser.add_argument(
+        "--engine",
+        choices=["pandas", "polars"],
+        default="pandas",
+        help="polars counts the extract with a streaming scan instead of loading it.",
+    )
+    args = parser.parse_args(argv)
+
+    # This writes a single “latest.md” so the repo doesn’t fill up with daily logs.
+    # A run logs into its own tree, against the extract it actually cleaned.
+    if args.window is None and args.run_id is None:
+        out_path = Path("reports/runlogs") / "latest.md"
+        extract_path = _latest_extract()
+        run = {}
+    else:
+        layout = runs.layout_for(args.window, args.run_id)
+        out_path = layout.reports / "runlogs" / "latest.md"
+        run = runs.read_manifest(layout)
+        extract_path = Path(run["extract"]) if "extract" in run else None
 
     lines: list[str] = []
     lines.append("# Run Log (latest)")
     lines.append("")
     lines.append(f"- run_timestamp: {datetime.now().isoformat(timespec='seconds')}")
+    if run:
+        lines.append(f"- run_id: {run['run_id']} (window `{run['window']}`)")
     lines.append("")
 
     if extract_path is None:
         lines.append("## Extract")
         lines.append("- status: no extract file found in `data/extracts/`")
     else:
-        df = pd.read_csv(extract_path, low_memory=False)
+        if args.engine == "polars":
+            from src.lazy_engine import extract_summary as summarize
+        else:
+            summarize = extract_summary
+        summary = summarize(extract_path)
         lines.append("## Extract")
         lines.append(f"- file: `{extract_path.as_posix()}`")
-        lines.append(f"- rows: {len(df):,}")
-        if "SQLDATE" in df.columns:
-            lines.append(f"- min(SQLDATE): {df['SQLDATE'].min()}")
-            lines.append(f"- max(SQLDATE): {df['SQLDATE'].max()}")
+        lines.append(f"- rows: {summary['rows']:,}")
+        if "min" in summary:
+            lines.append(f"- min(SQLDATE): {summary['min']}")
+            lines.append(f"- max(SQLDATE): {summary['max']}")
 
     lines.append("")
     lines.append("## Notes")
-    lines.append("- This log is generated by `python src/write_run_log.py` (or `make runlog`).")
+    lines.append("- This log is generated by `python -m src runlog` (or `make runlog`).")
     lines.append("- BigQuery validation checks live in `docs/OPERATIONS.md`.")
 
-    out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    runs.write_text(out_path, "\n".join(lines) + "\n")
     print(f"Wrote: {out_path.as_posix()}")
 
 
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import aggregates
+
+
+def partials(values: list[float], **keys) -> dict:
+    # This builds one partial row the way the extract query would from raw event values.
+    v = np.array(values)
+    return {
+        **keys,
+        "EventCount": len(v),
+        "ToneCount": len(v),
+        "SumTone": v.sum(),
+        "SumSqTone": (v**2).sum(),
+        "GoldsteinCount": len(v),
+        "SumGoldstein": v.sum(),
+        "SumSqGoldstein": (v**2).sum(),
+        "TotalMentions": len(v),
+        "TotalArticles": len(v),
+        "TotalSources": len(v),
+    }
+
+
+def test_combine_matches_stats_of_the_pooled_events():
+    # Two partitions of the same key fold into exactly the mean/variance of all their events.
+    a, b = [-4.0, -2.0, 0.0], [5.0]
+    keys = {"SQLDATE": "20250101", "CountryCode": "US", "EventRootCode": "01"}
+    df = pd.DataFrame([partials(a, **keys), partials(b, **keys)])
+
+    out = aggregates.combine(df)
+
+    pooled = np.array(a + b)
+    assert len(out) == 1
+    assert out["EventCount"].iloc[0] == 4
+    assert out["AvgTone"].iloc[0] == pytest.approx(pooled.mean())
+    assert aggregates.variance(out, "Tone").iloc[0] == pytest.approx(pooled.var())
+
+
+def test_combine_is_order_independent():
+    # Folding partitions in any order (or incrementally) must give the same answer.
+    keys = {"SQLDATE": "20250101", "CountryCode": "US", "EventRootCode": "01"}
+    parts = [partials([1.0, 2.0], **keys), partials([3.0], **keys), partials([-6.0, 0.5], **keys)]
+
+    all_at_once = aggregates.combine(pd.DataFrame(parts))
+    incremental = aggregates.combine(
+        pd.concat([aggregates.combine(pd.DataFrame(parts[:2])), pd.DataFrame(parts[2:])])
+    )
+
+    pd.testing.assert_frame_equal(all_at_once, incremental)
+
+
+def test_region_rows_roll_up_to_the_country_extract():
+    # Summing ADM1 partials per country key gives the same row as a country-level extract.
+    keys = {"SQLDATE": "20250101", "CountryCode": "US", "EventRootCode": "01"}
+    regions = [
+        partials([1.0, -3.0], RegionCode="USCA", **keys),
+        partials([2.0], RegionCode="USNY", **keys),
+        partials([-1.0, 4.0], RegionCode="US", **keys),
+    ]
+    country = aggregates.combine(pd.DataFrame([partials([1.0, -3.0, 2.0, -1.0, 4.0], **keys)]))
+
+    rolled = aggregates.combine(pd.DataFrame(regions), keys=aggregates.KEYS)
+
+    pd.testing.assert_frame_equal(rolled, country)
+    assert aggregates.level_keys("adm1") == [
+        "SQLDATE",
+        "CountryCode",
+        "RegionCode",
+        "EventRootCode",
+    ]
+
+
+def test_legacy_rows_without_an_average_do_not_dilute_the_combined_average():
+    # A legacy row with no AvgTone/AvgGoldstein adds its events but no weight to either average.
+    keys = {"SQLDATE": "20250101", "CountryCode": "US", "EventRootCode": "01"}
+    legacy = pd.DataFrame(
+        [
+            {**keys, "EventCount": 4, "AvgTone": -3.0, "AvgGoldstein": 2.0},
+            {**keys, "EventCount": 6, "AvgTone": np.nan, "AvgGoldstein": np.nan},
+        ]
+    )
+    for col in ["TotalMentions", "TotalArticles", "TotalSources"]:
+        legacy[col] = legacy["EventCount"]
+
+    out = aggregates.combine(aggregates.from_averages(legacy), with_sketches=False)
+    assert out["EventCount"].iloc[0] == 10
+    assert out["AvgTone"].iloc[0] == pytest.approx(-3.0)
+    assert out["AvgGoldstein"].iloc[0] == pytest.approx(2.0)
@@ -0,0 +1,21 @@
+import pytest
+
+from src import cli
+from src.bench_startup import STAGE_MODULES, heavy_modules_loaded_by
+
+
+def test_importing_stage_modules_does_not_load_heavy_libraries():
+    # This guards fast startup: plotting, sklearn and BigQuery must load only inside main().
+    assert heavy_modules_loaded_by(STAGE_MODULES) == []
+
+
+def test_every_command_resolves_to_a_callable():
+    # This catches typos in the "module:function" table without running any stage.
+    for command in cli.COMMANDS:
+        assert callable(cli.resolve(command))
+
+
+def test_zero_option_stage_rejects_extra_arguments():
+    # This verifies stray options are reported instead of silently ignored.
+    with pytest.raises(SystemExit):
+        cli.main(["gkg-themes", "--oops"])
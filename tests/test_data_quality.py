@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import data_quality
+
+
+def clean_frame(days: int = 20, countries=("US", "FR"), roots=("01", "14")) -> pd.DataFrame:
+    # This builds a well-formed clean table: one row per (date, country, root) with steady volume.
+    idx = pd.MultiIndex.from_product(
+        [pd.date_range("2025-01-01", periods=days, freq="D"), countries, roots],
+        names=["date", "CountryCode", "EventRootCode"],
+    )
+    df = idx.to_frame(index=False)
+    rng = np.random.default_rng(0)
+    df["EventCount"] = rng.integers(90, 110, len(df))
+    df["AvgTone"] = rng.normal(-2, 0.5, len(df))
+    df["AvgGoldstein"] = rng.normal(0, 2, len(df))
+    df["ToneCount"] = df["EventCount"]
+    df["SumTone"] = df["AvgTone"] * df["ToneCount"]
+    return df
+
+
+def test_row_rules_are_counted_per_partition():
+    # Out-of-range, missing, unknown-code and duplicate rows land in their own partition's counts.
+    df = clean_frame(days=3)
+    df.loc[0, "AvgGoldstein"] = 12.0
+    df.loc[1, "AvgTone"] = np.nan
+    df.loc[2, "EventRootCode"] = "99"
+    df = pd.concat([df, df.iloc[[5]]], ignore_index=True)
+
+    stats = data_quality.evaluate(df).set_index("date")
+    day0, day1 = pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-02")
+    assert stats.loc[day0, "goldstein_out_of_range"] == 1
+    assert stats.loc[day0, "missing_tone"] == 1
+    assert stats.loc[day0, "unknown_root_code"] == 1
+    assert stats.loc[day1, "duplicate_key"] == 2
+    assert stats["rows"].sum() == len(df)
+    assert stats.loc[day1, "tone_out_of_range"] == 0
+
+
+def test_chunk_stats_add_up_to_full_stats():
+    # Stats are counts and sums, so evaluating two chunks and adding them matches one pass.
+    df = clean_frame(days=4)
+    full = data_quality.evaluate(df).set_index("date")
+    parts = [data_quality.evaluate(df.iloc[:10]), data_quality.evaluate(df.iloc[10:])]
+    added = pd.concat(parts).groupby("date").sum(numeric_only=True)
+    cols = ["rows", "events", "sum_tone", *data_quality.RULES]
+    pd.testing.assert_frame_equal(added[cols], full[cols], check_dtype=False)
+
+
+def test_volume_collapse_fails_and_is_gated(tmp_path):
+    # A day that loses most of its volume fails the run, and the gate reports it.
+    df = clean_frame(days=20)
+    last = df["date"] == df["date"].max()
+    df.loc[last, "EventCount"] = 5
+
+    path = tmp_path / "qa_history.parquet"
+    stats = data_quality.check(df, source="run_a.csv", path=path)
+
+    assert stats.set_index("date")["volume_collapse"].sum() == 1
+    assert stats.set_index("date").loc[df["date"].max(), "status"] == "fail"
+    failed = data_quality.failed_partitions(path)
+    assert failed["date"].tolist() == [df["date"].max()]
+
+
+def test_history_uses_previous_runs_and_replaces_reruns(tmp_path):
+    # A later window is judged against an earlier one, and rerunning a source doesn't duplicate it.
+    df = clean_frame(days=20)
+    path = tmp_path / "qa_history.parquet"
+    first, second = df[df["date"] < "2025-01-15"], df[df["date"] >= "2025-01-15"].copy()
+    second["EventCount"] = 5
+
+    data_quality.check(first, source="window_1.csv", path=path)
+    stats = data_quality.check(second, source="window_2.csv", path=path)
+    assert stats["volume_collapse"].iloc[0]
+
+    data_quality.check(second, source="window_2.csv", path=path)
+    history = data_quality.load_history(path)
+    assert len(history) == 20
+
+
+def test_overlapping_collapsed_reextract_fails_on_shared_dates(tmp_path):
+    # A re-extract that overlaps an earlier window is judged against that window's rows, so its
+    # collapsed shared dates fail too instead of hiding behind the earlier, fuller rows.
+    path = tmp_path / "qa_history.parquet"
+    df = clean_frame(days=33)
+    data_quality.check(df[df["date"] < "2025-01-31"], source="window_1.csv", path=path)
+
+    rerun = df[df["date"] >= "2025-01-26"].copy()
+    rerun["EventCount"] = 3
+    stats = data_quality.check(rerun, source="window_2.csv", path=path).set_index("date")
+    assert stats["volume_collapse"].all()
+    assert (stats["status"] == "fail").all()
+    assert len(data_quality.failed_partitions(path)) == 8
+
+
+def test_merged_run_history_becomes_the_baseline_for_later_runs(tmp_path):
+    # A promoted run's rows land in the shared history once, so the next run is judged by them.
+    shared, run_copy = tmp_path / "shared.parquet", tmp_path / "run" / "qa_history.parquet"
+    df = clean_frame(days=20)
+    first = data_quality.check(df[df["date"] < "2025-01-15"], source="window_1.csv", path=run_copy)
+    data_quality.merge(first, shared)
+    data_quality.merge(first, shared)
+    assert len(data_quality.load_history(shared)) == 14
+
+    second = df[df["date"] >= "2025-01-15"].copy()
+    second["EventCount"] = 5
+    stats = data_quality.check(second, source="window_2.csv", path=shared)
+    assert stats["volume_collapse"].all()
+
+
+def test_unknown_rule_kind_is_rejected():
+    # A typo in a rule definition should fail loudly instead of silently passing.
+    with pytest.raises(ValueError, match="Unknown rule kind"):
+        data_quality.violations(clean_frame(days=1), {"x": {"kind": "regex", "severity": "warn"}})
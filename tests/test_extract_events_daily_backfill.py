@@ -0,0 +1,112 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from src.extract_events_daily import (
+    backfill,
+    build_query,
+    partition_chunks,
+    window_name,
+    with_retry,
+)
+
+
+def fake_extract(start: str, end: str) -> pd.DataFrame:
+    # One row per chunk, keyed on the chunk's first day, so merges are easy to check.
+    return pd.DataFrame(
+        {
+            "SQLDATE": [int(start.replace("-", ""))],
+            "CountryCode": ["US"],
+            "EventRootCode": ["01"],
+            "EventCount": [2],
+            "ToneCount": [2],
+            "SumTone": [-2.0],
+            "SumSqTone": [2.0],
+            "GoldsteinCount": [2],
+            "SumGoldstein": [2.0],
+            "SumSqGoldstein": [2.0],
+            "TotalMentions": [4],
+            "TotalArticles": [3],
+            "TotalSources": [2],
+        }
+    )
+
+
+def test_partition_chunks_cover_window_without_gaps():
+    # This verifies chunks are contiguous, day-aligned and the last one is clipped to the end.
+    chunks = partition_chunks("2025-01-01", "2025-01-20", chunk_days=7)
+
+    assert chunks == [
+        ("2025-01-01", "2025-01-08"),
+        ("2025-01-08", "2025-01-15"),
+        ("2025-01-15", "2025-01-20"),
+    ]
+
+
+def test_with_retry_backs_off_then_succeeds():
+    # This simulates two transient failures before a successful query.
+    calls, waits = [], []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise RuntimeError("transient")
+        return "ok"
+
+    assert with_retry(flaky, retries=3, backoff_s=1.0, sleep=waits.append) == "ok"
+    assert len(waits) == 2
+    assert waits[1] > waits[0]
+
+
+def test_backfill_resumes_from_missing_chunks(tmp_path):
+    # First run fails one chunk; the rerun only queries that chunk and then merges all of them.
+    lock = threading.Lock()
+    seen = []
+
+    def failing_extract(start, end):
+        with lock:
+            seen.append(start)
+        if start == "2025-01-08":
+            raise RuntimeError("boom")
+        return fake_extract(start, end)
+
+    with pytest.raises(RuntimeError, match="rerun to resume"):
+        backfill("2025-01-01", "2025-01-20", failing_extract, chunk_dir=tmp_path, retries=0)
+    assert len(list(tmp_path.glob("chunk_*.parquet"))) == 2
+
+    seen.clear()
+    out = backfill(
+        "2025-01-01",
+        "2025-01-20",
+        lambda s, e: seen.append(s) or fake_extract(s, e),
+        chunk_dir=tmp_path,
+    )
+
+    assert seen == ["2025-01-08"]
+    assert out["SQLDATE"].tolist() == [20250101, 20250108, 20250115]
+
+
+def test_backfill_merges_keys_split_across_chunks(tmp_path):
+    # The same SQLDATE can appear in two partition chunks; the merge must add them up.
+    def same_day_extract(start, end):
+        df = fake_extract(start, end)
+        df["SQLDATE"] = 20250101
+        df["SumTone"] = -2.0 if start == "2025-01-01" else 6.0
+        return df
+
+    out = backfill("2025-01-01", "2025-01-03", same_day_extract, chunk_days=1, chunk_dir=tmp_path)
+
+    assert len(out) == 1
+    assert out["EventCount"].iloc[0] == 4
+    assert out["AvgTone"].iloc[0] == pytest.approx(1.0)
+
+
+def test_adm1_query_groups_by_region_and_keeps_its_own_files():
+    # ADM1 adds RegionCode to the grain and writes to a separate extract/chunk name.
+    sql = build_query("2025-01-01", "2025-01-08", level="adm1")
+
+    assert "AS RegionCode" in sql
+    assert "GROUP BY SQLDATE, CountryCode, RegionCode, EventRootCode" in sql
+    assert "RegionCode" not in build_query("2025-01-01", "2025-01-08")
+    assert window_name("2025-01-01", "2025-01-08", "adm1") == "events_daily_adm1_20250101_20250108"
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from src.feature_importance import compute, explain, model_version, tree_path_contributions
+
+
+def fitted(seed: int = 0):
+    # This fits a small forest where only features 0 and 2 drive the target.
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(200, 4))
+    y = 3 * X[:, 0] + X[:, 2] + rng.normal(0, 0.1, 200)
+    model = RandomForestRegressor(n_estimators=20, random_state=42).fit(X[:150], y[:150])
+    return model, X, y
+
+
+def test_tree_path_contributions_add_up_to_the_prediction():
+    # Saabas attributions are exact: bias + row contributions reproduce predict().
+    model, X, _ = fitted()
+    contributions, bias = tree_path_contributions(model, X[150:])
+    np.testing.assert_allclose(bias + contributions.sum(axis=1), model.predict(X[150:]))
+
+
+@pytest.mark.parametrize("engine", ["impurity", "tree_path", "permutation"])
+def test_every_engine_ranks_the_driving_features_first(engine):
+    # All engines agree on the two informative features.
+    model, X, y = fitted()
+    values = compute(model, X[150:], y[150:], engine, n_jobs=1)
+    assert set(np.argsort(values)[-2:]) == {0, 2}
+
+
+def test_explain_caches_per_model_version(tmp_path):
+    # The second call for the same model and rows is read back instead of recomputed.
+    model, X, y = fitted()
+    version = model_version(model, X[:150], y[:150])
+    cols = ["a", "b", "c", "d"]
+    first, info = explain(model, X[150:], y[150:], cols, version, cache_dir=tmp_path)
+    again, info_again = explain(model, X[150:], y[150:], cols, version, cache_dir=tmp_path)
+
+    assert not info["cached"] and info_again["cached"]
+    assert info_again["seconds"] == info["seconds"]
+    assert first.equals(again)
+    assert first["feature"].iloc[0] == "a"
+
+    # Same params on different training rows is a different model.
+    assert model_version(model, X[:100], y[:100]) != version
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+from src.feature_store import FeatureStore
+from src.publish_risk_forecasts import FEATURE_COLS, make_panel_features
+
+
+def daily(days: int = 40) -> pd.DataFrame:
+    # This builds a country_risk_daily slice where FR misses some days (sparse series).
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2025-01-01", periods=days, freq="D")
+    frames = []
+    for country in ["US", "FR"]:
+        g = pd.DataFrame({"date": dates, "CountryCode": country})
+        g["total_events"] = rng.integers(100, 200, days)
+        g["conflict_share"] = rng.random(days)
+        g["negative_share"] = rng.random(days)
+        g["weighted_avg_tone"] = rng.normal(-2, 1, days)
+        g["risk_raw"] = rng.normal(5, 1, days)
+        frames.append(g if country == "US" else g.iloc[::2])
+    return pd.concat(frames, ignore_index=True)
+
+
+def test_daily_appends_match_a_full_recompute(tmp_path):
+    # Feeding one day at a time through the state tail must give the full-history features.
+    df = daily()
+    store = FeatureStore(tmp_path)
+    store.update(df[df["date"] < "2025-01-20"])
+    for day in sorted(df.loc[df["date"] >= "2025-01-20", "date"].unique()):
+        store.update(df[df["date"] <= day])
+
+    full = make_panel_features(df, horizons=0)
+    got = store.features()
+    pd.testing.assert_frame_equal(got[FEATURE_COLS], full[FEATURE_COLS])
+
+
+def test_daily_refreshes_keep_one_part_per_month(tmp_path):
+    # Ninety one-day refreshes land in three monthly parts instead of ninety files.
+    df = daily(days=90)
+    store = FeatureStore(tmp_path)
+    for day in sorted(df["date"].unique()):
+        store.update(df[df["date"] <= day])
+
+    parts = sorted(p.name for p in (tmp_path / "parts").glob("*.parquet"))
+    assert parts == ["month_202501.parquet", "month_202502.parquet", "month_202503.parquet"]
+    pd.testing.assert_frame_equal(
+        store.features()[FEATURE_COLS], make_panel_features(df, horizons=0)[FEATURE_COLS]
+    )
+
+
+def test_update_only_featurizes_days_after_the_watermark(tmp_path):
+    # Re-sending old days is a no-op; only newer days are appended.
+    df = daily()
+    store = FeatureStore(tmp_path)
+    store.update(df[df["date"] < "2025-02-01"])
+
+    assert store.update(df[df["date"] < "2025-02-01"]) == 0
+    assert store.update(df) == int((df["date"] >= "2025-02-01").sum())
+    assert store.watermark() == df["date"].max()
+
+
+def test_latest_and_training_frame_serve_the_model(tmp_path):
+    # latest() is each country's newest row; training_frame() adds the horizon targets.
+    df = daily()
+    store = FeatureStore(tmp_path)
+    store.update(df[df["date"] < "2025-01-25"])
+    store.update(df)
+
+    latest = store.latest().set_index("CountryCode")
+    assert latest.loc["US", "date"] == df.loc[df["CountryCode"] == "US", "date"].max()
+    assert latest.loc["FR", "date"] == df.loc[df["CountryCode"] == "FR", "date"].max()
+
+    train = store.training_frame(horizons=2)
+    us = train[train["CountryCode"] == "US"].reset_index(drop=True)
+    assert us["target_day_2"].iloc[0] == us["risk_raw"].iloc[2]
+    assert us["target_next_day"].isna().sum() == 1
@@ -0,0 +1,117 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src import forecast_history
+
+
+def history(
+    run_day: int, preds: dict[str, float], published: str = "2025-01-01 06:00"
+) -> pd.DataFrame:
+    # This builds stored next-day forecasts made on 2025-01-<run_day> for 2025-01-<run_day + 1>.
+    as_of = pd.Timestamp(f"2025-01-{run_day:02d}")
+    return pd.DataFrame(
+        {
+            "run_date": as_of.date(),
+            "as_of_date": as_of.date(),
+            "forecast_date": (as_of + pd.Timedelta(days=1)).date(),
+            "horizon": 1,
+            "CountryCode": list(preds),
+            "pred_risk": list(preds.values()),
+            "risk_as_of": 0.0,
+            "published_at": pd.Timestamp(published, tz="UTC"),
+        }
+    )
+
+
+def daily(values: dict[tuple[int, str], float]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {"date": pd.Timestamp(f"2025-01-{d:02d}"), "CountryCode": c, "risk_raw": v}
+            for (d, c), v in values.items()
+        ]
+    )
+
+
+def test_score_new_skips_scored_forecasts_and_waits_for_unobserved_days():
+    # Forecasts with an error row are skipped, and days not yet observed wait for the next run.
+    h = pd.concat([history(1, {"US": 2.0}), history(2, {"US": 3.0}), history(3, {"US": 4.0})])
+    d = daily({(2, "US"): 2.5, (3, "US"): 3.5})
+    errors = forecast_history.score_new(h.iloc[:1], d, None, ["CountryCode"])
+
+    out = forecast_history.score_new(h, d, errors, keys=["CountryCode"])
+
+    assert out["forecast_date"].tolist() == [date(2025, 1, 3)]
+    assert out["error"].iloc[0] == pytest.approx(3.0 - 3.5)
+
+
+def test_score_new_scores_a_late_country_once_its_actuals_land():
+    # FR's actual for Jan 2 arrives a day late; it is still scored, and only once.
+    h = pd.concat([history(1, {"US": 2.0, "FR": 1.0}), history(2, {"US": 3.0, "FR": 1.5})])
+    first = daily({(2, "US"): 2.5, (3, "US"): 3.5})
+    errors = forecast_history.score_new(h, first, None, ["CountryCode"])
+    assert sorted(errors["CountryCode"]) == ["US", "US"]
+
+    late = daily({(2, "US"): 2.5, (3, "US"): 3.5, (2, "FR"): 0.5, (3, "FR"): 1.0})
+    new = forecast_history.score_new(h, late, errors, ["CountryCode"])
+    assert new["CountryCode"].tolist() == ["FR", "FR"]
+    errors = pd.concat([errors, new])
+    assert forecast_history.score_new(h, late, errors, ["CountryCode"]).empty
+
+
+def test_score_new_ignores_runs_older_than_the_lookback():
+    # The lookback bounds how late an actual may land and still be scored.
+    h = history(1, {"US": 2.0})
+    out = forecast_history.score_new(
+        h, daily({(2, "US"): 1.0}), None, ["CountryCode"], today=date(2025, 4, 1)
+    )
+    assert out.empty
+
+
+def test_score_new_keeps_the_latest_publish_of_a_rerun():
+    # Two publishes on the same run_date count once, using the later one.
+    h = pd.concat(
+        [
+            history(1, {"US": 2.0}, published="2025-01-01 06:00"),
+            history(1, {"US": 9.0}, published="2025-01-01 18:00"),
+        ]
+    )
+    out = forecast_history.score_new(h, daily({(2, "US"): 8.0}), None, ["CountryCode"])
+
+    assert len(out) == 1
+    assert out["pred_risk"].iloc[0] == 9.0
+
+
+def test_rolling_mae_per_country_uses_only_the_recent_window():
+    # Errors older than the window no longer count towards the MAE.
+    errors = pd.DataFrame(
+        {
+            "forecast_date": [
+                date(2025, 1, 1),
+                date(2025, 3, 1),
+                date(2025, 3, 2),
+                date(2025, 3, 2),
+            ],
+            "horizon": 1,
+            "CountryCode": ["US", "US", "US", "FR"],
+            "error": [100.0, 1.0, -3.0, 0.5],
+        }
+    )
+    mae = forecast_history.rolling_mae(errors, ["CountryCode"]).set_index("CountryCode")
+
+    assert mae.loc["US", "mae"] == pytest.approx(2.0)
+    assert mae.loc["US", "n_forecasts"] == 2
+    assert mae.loc["FR", "mae"] == pytest.approx(0.5)
+
+
+def test_evaluate_sql_prunes_partitions_and_anti_joins_scored_forecasts():
+    # Bounds are literals so BigQuery can skip old partitions; scored rows are excluded by key.
+    sql = forecast_history.evaluate_sql(date(2025, 3, 1), level="adm1")
+
+    assert "h.run_date >= DATE '2024-12-31'" in sql
+    assert "e.forecast_date >= DATE '2024-12-31'" in sql
+    assert "e.run_date = h.run_date" in sql and "e.horizon = h.horizon" in sql
+    assert "AND e.run_date IS NULL" in sql
+    assert "d.RegionCode = h.RegionCode" in sql
+    assert "e.run_date" not in forecast_history.evaluate_sql(date(2025, 3, 1), errors_exist=False)
@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from src import aggregates, clean_events_daily, data_quality, schemas, viz_overview, write_run_log
+
+pl = pytest.importorskip("polars")
+
+from src import lazy_engine  # noqa: E402
+
+EXTRACT = """\
+SQLDATE,CountryCode,EventRootCode,EventCount,AvgTone,AvgGoldstein,ToneCount,SumTone,SumSqTone,GoldsteinCount,SumGoldstein,SumSqGoldstein,TotalMentions,TotalArticles,TotalSources,ToneHist,GoldsteinHist
+20250101,US,1,4,-1.0,0.5,4,-4.0,6.0,4,2.0,3.0,12,8,4,"10:2,12:2","0:1,3:3"
+20250101,US,14,2,-3.0,-5.0,2,-6.0,20.0,2,-10.0,52.0,6,4,2,"5:2","1:2"
+20250101,FR,1,3,1.0,2.0,3,3.0,5.0,3,6.0,14.0,9,6,3,"20:3","4:3"
+20250102,US,1,5,-2.0,1.0,5,-10.0,22.0,5,5.0,7.0,15,10,5,"15:5","2:4,5:1"
+20250102,FR,19,1,,,0,,,0,,,3,2,1,,
+bad,FR,2,1,2.0,1.0,1,2.0,4.0,1,1.0,1.0,2,1,1,"18:1","3:1"
+"""
+
+
+@pytest.fixture
+def extract(tmp_path):
+    path = tmp_path / "events_daily_20250101_20250103.csv"
+    path.write_text(EXTRACT, encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def clean(extract, tmp_path):
+    # Both engines write their hand-off files; tests compare what readers get back.
+    out = tmp_path / "polars"
+    plan = lazy_engine.clean_plan(
+        extract, clean_events_daily.ROOT_LABEL, clean_events_daily.TONE_THRESHOLDS
+    )
+    lazy_engine.write_clean(
+        plan, out / "events_daily_clean.parquet", out / "events_daily_clean.arrow"
+    )
+    df, _ = clean_events_daily.clean_frame(extract)
+    return df, out
+
+
+def test_clean_files_match_the_pandas_engine(clean):
+    # Same rows, columns and dtypes in both the Parquet and the Arrow hand-off.
+    df, out = clean
+    expected = schemas.coerce(df, "events_daily_clean")
+    for read in (schemas.read_parquet, schemas.read_feather):
+        suffix = ".parquet" if read is schemas.read_parquet else ".arrow"
+        got = read(out / f"events_daily_clean{suffix}", "events_daily_clean")
+        pd.testing.assert_frame_equal(got, expected)
+
+
+def test_qa_and_report_frames_match_the_pandas_engine(clean):
+    # Rule stats and coverage numbers are computed inside the scan, not on a loaded frame.
+    df, out = clean
+    lf = lazy_engine.scan_clean(processed_dir=out)
+    pd.testing.assert_frame_equal(
+        lazy_engine.qa_stats(lf), data_quality.evaluate(df), check_dtype=False
+    )
+
+    got, expected = lazy_engine.report_frames(lf), clean_events_daily.report_frames(df)
+    assert (got["rows"], got["date_min"], got["date_max"]) == (
+        expected["rows"],
+        expected["date_min"],
+        expected["date_max"],
+    )
+    pd.testing.assert_series_equal(got["missing"], expected["missing"], check_dtype=False)
+    pd.testing.assert_frame_equal(got["top_roots"], expected["top_roots"], check_dtype=False)
+
+
+def test_panel_matches_aggregates_combine(clean):
+    # Country-day sums and re-derived averages, including an all-null tone group.
+    df, out = clean
+    keys = ["date", "CountryCode"]
+    got = lazy_engine.panel(lazy_engine.scan_clean(processed_dir=out), keys)
+    expected = aggregates.combine(df.dropna(subset=["date"]), keys=keys, with_sketches=False)
+    pd.testing.assert_frame_equal(got, expected[got.columns.tolist()], check_dtype=False)
+
+
+def test_overview_frames_match_the_pandas_engine(clean):
+    # The figures plot identical frames whichever engine built them.
+    df, out = clean
+    got = lazy_engine.overview_frames(lazy_engine.scan_clean(processed_dir=out))
+    expected = viz_overview.overview_frames(df)
+    assert got["has_sketches"] and expected["has_sketches"]
+    for name in ("daily", "top_countries", "top_roots"):
+        pd.testing.assert_frame_equal(
+            got[name].reset_index(drop=True),
+            expected[name].reset_index(drop=True),
+            check_dtype=False,
+        )
+    pd.testing.assert_frame_equal(
+        got["heat"], expected["heat"], check_dtype=False, check_names=False
+    )
+    assert (got["tone_counts"] == expected["tone_counts"]).all()
+    pd.testing.assert_frame_equal(
+        got["tone_box"], expected["tone_box"], check_dtype=False, check_names=False
+    )
+
+
+def test_extract_summary_matches_the_pandas_engine(extract):
+    # The run log only needs a row count and the SQLDATE range.
+    got = lazy_engine.extract_summary(extract)
+    expected = write_run_log.extract_summary(extract)
+    assert got["rows"] == expected["rows"] == 6
+    assert (str(got["min"]), str(got["max"])) == (str(expected["min"]), str(expected["max"]))
@@ -1,6 +1,12 @@
+import numpy as np
 import pandas as pd
 
-from src.publish_risk_forecasts import make_features
+from src.publish_risk_forecasts import (
+    FEATURE_COLS,
+    make_features,
+    make_panel_features,
+    to_horizon_rows,
+)
 
 
 def test_make_features_creates_expected_columns():
@@ -35,3 +41,81 @@ def test_make_features_shifts_targets_correctly():
 
     # lag_14 at index 14 should point back to index 0.
     assert out["lag_14"].iloc[14] == 0
+
+
+def test_make_panel_features_matches_per_country_features():
+    # This checks the vectorized panel path against the per-country reference implementation.
+    dates = pd.date_range("2025-01-01", periods=20, freq="D")
+    df = pd.concat(
+        [
+            pd.DataFrame(
+                {"date": dates, "CountryCode": "US", "risk_raw": [float(i) for i in range(20)]}
+            ),
+            pd.DataFrame(
+                {"date": dates, "CountryCode": "FR", "risk_raw": [float(i % 5) for i in range(20)]}
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    panel = make_panel_features(df, horizons=3)
+
+    for country, g in df.groupby("CountryCode"):
+        expected = make_features(g, horizons=3).reset_index(drop=True)
+        got = panel[panel["CountryCode"] == country].reset_index(drop=True)
+        cols = FEATURE_COLS[:7] + ["target_next_day", "target_day_2", "target_day_3"]
+        pd.testing.assert_frame_equal(got[cols], expected[cols])
+
+
+def test_make_panel_features_keeps_regions_of_one_country_apart():
+    # At ADM1 level every region is its own series, even when they share a CountryCode.
+    dates = pd.date_range("2025-01-01", periods=10, freq="D")
+    df = pd.concat(
+        [
+            pd.DataFrame(
+                {"date": dates, "CountryCode": "US", "RegionCode": "USCA", "risk_raw": 1.0}
+            ),
+            pd.DataFrame(
+                {"date": dates, "CountryCode": "US", "RegionCode": "USNY", "risk_raw": 5.0}
+            ),
+        ],
+        ignore_index=True,
+    )
+
+    panel = make_panel_features(df, entity="RegionCode")
+
+    for region, value in [("USCA", 1.0), ("USNY", 5.0)]:
+        g = panel[panel["RegionCode"] == region]
+        assert g["lag_1"].dropna().eq(value).all()
+        assert g["roll_mean_7"].dropna().eq(value).all()
+
+
+def test_make_features_builds_every_horizon_target():
+    # This verifies t+h targets are aligned h rows ahead and run out at the end of the series.
+    df = pd.DataFrame(
+        {
+            "date": pd.date_range("2025-01-01", periods=10, freq="D"),
+            "risk_raw": list(range(10)),
+        }
+    )
+
+    out = make_features(df, horizons=3)
+
+    assert out["target_day_3"].iloc[0] == 3
+    assert out["target_day_2"].iloc[-2:].isna().all()
+    assert out["target_day_3"].iloc[-3:].isna().all()
+
+
+def test_to_horizon_rows_emits_one_row_per_country_and_horizon():
+    # This verifies the long-form snapshot has a horizon column and stepped forecast dates.
+    latest = pd.DataFrame(
+        {"CountryCode": ["US", "FR"], "date": pd.to_datetime(["2025-01-10", "2025-01-10"])}
+    )
+    yhat = np.array([[1.0, 2.0], [3.0, 4.0]])
+
+    out = to_horizon_rows(latest, yhat, horizons=2)
+
+    assert len(out) == 4
+    fr_day_2 = out[(out["CountryCode"] == "FR") & (out["horizon"] == 2)].iloc[0]
+    assert fr_day_2["pred_risk"] == 4.0
+    assert str(fr_day_2["forecast_date"]) == "2025-01-12"
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.publish_tableau_extract import build_tables, partition_hashes, publish
+
+hyperapi = pytest.importorskip("tableauhyperapi")
+
+
+def clean(days: int = 5) -> pd.DataFrame:
+    # This builds a small events_daily_clean frame: 2 countries x 2 root codes per day.
+    rng = np.random.default_rng(0)
+    rows = [
+        (d, c, r)
+        for d in pd.date_range("2025-01-30", periods=days, freq="D")
+        for c in ["US", "FR"]
+        for r in ["01", "19"]
+    ]
+    df = pd.DataFrame(rows, columns=["date", "CountryCode", "EventRootCode"])
+    n = len(df)
+    df["SQLDATE"] = df["date"].dt.strftime("%Y%m%d")
+    df["EventCount"] = rng.integers(1, 50, n)
+    df["ToneCount"] = df["EventCount"]
+    df["SumTone"] = rng.normal(-2, 1, n) * df["ToneCount"]
+    df["SumSqTone"] = df["SumTone"] ** 2
+    df["AvgTone"] = df["SumTone"] / df["ToneCount"]
+    df["GoldsteinCount"] = df["EventCount"]
+    df["SumGoldstein"] = rng.normal(0, 2, n) * df["EventCount"]
+    df["SumSqGoldstein"] = df["SumGoldstein"] ** 2
+    df["AvgGoldstein"] = df["SumGoldstein"] / df["GoldsteinCount"]
+    for col in ["TotalMentions", "TotalArticles", "TotalSources"]:
+        df[col] = df["EventCount"] * 2
+    df["EventRootLabel"] = df["EventRootCode"].map({"01": "Make statement", "19": "Fight"})
+    df["ToneBucket"] = "neutral"
+    return df
+
+
+def query(path, sql: str):
+    from tableauhyperapi import Connection, HyperProcess, Telemetry
+
+    with (
+        HyperProcess(
+            Telemetry.DO_NOT_SEND_USAGE_DATA_TO_TABLEAU, parameters={"log_dir": str(path.parent)}
+        ) as hyper,
+        Connection(hyper.endpoint, path) as conn,
+    ):
+        return conn.execute_scalar_query(sql)
+
+
+def test_rollups_add_up_to_the_clean_rows():
+    # Pre-aggregated tables keep the event totals of the detail table.
+    tables = build_tables(clean())
+    total = tables["events_daily_clean"]["EventCount"].sum()
+    assert tables["events_country_daily"]["EventCount"].sum() == total
+    assert tables["events_root_monthly"]["EventCount"].sum() == total
+    assert tables["country_risk_daily"]["total_events"].sum() == total
+    assert set(tables["events_root_monthly"]["month"].dt.month) == {1, 2}
+    assert tables["events_daily_clean"]["date"].is_monotonic_increasing
+
+
+def test_partition_hashes_change_only_for_edited_days():
+    # Editing one day changes exactly that partition's fingerprint.
+    df = clean()
+    before = partition_hashes(df, "date")
+    df.loc[df["date"] == "2025-02-01", "EventCount"] += 1
+    after = partition_hashes(df, "date")
+    assert [k for k in before if before[k] != after[k]] == ["2025-02-01"]
+
+
+def test_refresh_rewrites_only_new_and_changed_partitions(tmp_path):
+    # A rerun appends the new day, replaces the edited one and leaves the rest alone.
+    path, manifest = tmp_path / "x.hyper", tmp_path / "manifest.json"
+    df = clean(days=5)
+    first = publish(build_tables(df[df["date"] < "2025-02-03"]), path, manifest)
+    assert first["events_daily_clean"]["partitions_written"] == 4
+
+    df.loc[df["date"] == "2025-02-01", "EventCount"] += 1
+    second = publish(build_tables(df), path, manifest)
+    assert second["events_daily_clean"]["partitions_written"] == 2
+    assert second["events_daily_clean"]["written"] == 8
+
+    tables = build_tables(df)
+    for name, t in tables.items():
+        assert query(path, f'SELECT COUNT(*) FROM "Extract"."{name}"') == len(t)
+    got = query(path, 'SELECT SUM("EventCount") FROM "Extract"."events_daily_clean"')
+    assert got == df["EventCount"].sum()
+
+    again = publish(tables, path, manifest)
+    assert again["events_daily_clean"]["written"] == 0
+
+
+def test_crash_mid_table_rolls_back_and_the_next_run_repairs_it(tmp_path, monkeypatch):
+    # A failed insert undoes that table's deletes; the manifest still matches the file.
+    import pyarrow.parquet as pq
+
+    path, manifest = tmp_path / "x.hyper", tmp_path / "manifest.json"
+    df = clean(days=5)
+    publish(build_tables(df[df["date"] < "2025-02-03"]), path, manifest)
+
+    df.loc[df["date"] == "2025-02-01", "EventCount"] += 1
+    write_table = pq.write_table
+
+    def crash(table, where, **kwargs):
+        if "events_daily_clean" in str(where):
+            raise OSError("disk full")
+        write_table(table, where, **kwargs)
+
+    monkeypatch.setattr(pq, "write_table", crash)
+    with pytest.raises(OSError):
+        publish(build_tables(df), path, manifest)
+    monkeypatch.setattr(pq, "write_table", write_table)
+
+    before = df[df["date"] < "2025-02-03"]
+    got = query(path, 'SELECT COUNT(*) FROM "Extract"."events_daily_clean"')
+    assert got == len(before)
+
+    publish(build_tables(df), path, manifest)
+    got = query(path, 'SELECT SUM("EventCount") FROM "Extract"."events_daily_clean"')
+    assert got == df["EventCount"].sum()
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import risk_variants
+
+
+def events() -> pd.DataFrame:
+    # This builds a small events_daily_clean slice with a mix of roots and tones.
+    rng = np.random.default_rng(0)
+    idx = pd.MultiIndex.from_product(
+        [
+            pd.date_range("2025-01-01", periods=5, freq="D"),
+            ["US", "FR", "IN"],
+            [f"{i:02d}" for i in range(1, 21)],
+        ],
+        names=["date", "CountryCode", "EventRootCode"],
+    )
+    df = idx.to_frame(index=False)
+    df["EventCount"] = rng.integers(1, 50, len(df))
+    df["AvgTone"] = rng.normal(-2, 3, len(df))
+    df.loc[::17, "AvgTone"] = np.nan
+    df["ToneCount"] = df["EventCount"]
+    df["SumTone"] = (df["AvgTone"] * df["ToneCount"]).fillna(0)
+    return df
+
+
+def score_one(df: pd.DataFrame, spec: dict) -> pd.DataFrame:
+    # Reference: the original single-definition computation, one variant at a time.
+    d = df.assign(
+        conflict=np.where(df["EventRootCode"].isin(spec["conflict_roots"]), df["EventCount"], 0),
+        negative=np.where(df["AvgTone"] <= spec["tone_threshold"], df["EventCount"], 0),
+    )
+    g = d.groupby(["date", "CountryCode"])[["EventCount", "conflict", "negative"]].sum()
+    w = spec["weights"]
+    return (
+        w["conflict"] * g["conflict"] / g["EventCount"]
+        + w["negative"] * g["negative"] / g["EventCount"]
+        + w["volume"] * np.log1p(g["EventCount"])
+    )
+
+
+def test_score_variants_matches_per_variant_reference():
+    # All variants in one pass must equal scoring each definition separately.
+    df = events()
+    out = risk_variants.score_variants(df)
+
+    assert set(out["variant"]) == set(risk_variants.VARIANTS)
+    for name, spec in risk_variants.VARIANTS.items():
+        got = out[out["variant"] == name].set_index(["date", "CountryCode"])["risk_raw"]
+        expected = score_one(df, spec)
+        np.testing.assert_allclose(got.sort_index(), expected.sort_index())
+
+
+def test_build_query_aggregates_each_distinct_signal_once():
+    # Variants sharing a root set or tone threshold reuse the same aggregate column.
+    sql = risk_variants.build_query("p.d.events_daily_clean")
+    root_sets, thresholds = risk_variants._signals(risk_variants.VARIANTS)
+
+    assert sql.count("AS conflict_events_") == len(root_sets) == 2
+    assert sql.count("AS negative_tone_events_") == len(thresholds) == 2
+    assert sql.count("FROM `p.d.events_daily_clean`") == 1
+    for name in risk_variants.VARIANTS:
+        assert f"STRUCT('{name}' AS variant" in sql
+
+
+def test_select_rejects_unknown_or_malformed_variants():
+    # Names and root codes end up inside SQL, so they are checked up front.
+    with pytest.raises(ValueError, match="Unknown risk variant"):
+        risk_variants.select(["nope"])
+
+    bad = {"bad": {"conflict_roots": ["14'); DROP"], "tone_threshold": -2, "weights": {}}}
+    with pytest.raises(ValueError, match="2-digit"):
+        risk_variants.select(None, bad)
+
+
+def test_checked_in_refresh_sql_matches_the_generator():
+    # docs/sql/ is generated from the registry; a stale copy would publish an old formula.
+    from src import create_country_risk_daily_table as table
+
+    expected = table.SQL_DOC_HEADER + table.baseline_statement()
+    assert table.SQL_DOC_PATH.read_text(encoding="utf-8") == expected
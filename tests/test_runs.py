@@ -0,0 +1,58 @@
+import pytest
+
+from src import runs
+
+
+def test_atomic_path_keeps_the_old_file_when_the_writer_fails(tmp_path):
+    # A crash mid-write leaves the previous artifact intact and no temp file behind.
+    out = tmp_path / "report.md"
+    runs.write_text(out, "old\n")
+    with pytest.raises(RuntimeError), runs.atomic_path(out) as tmp:
+        tmp.write_text("half", encoding="utf-8")
+        raise RuntimeError("boom")
+    assert out.read_text(encoding="utf-8") == "old\n"
+    assert [p.name for p in tmp_path.iterdir()] == ["report.md"]
+
+
+def test_atomic_path_keeps_the_suffix_for_format_sniffing(tmp_path):
+    # matplotlib and pandas pick the format from the extension, so temp names keep it.
+    with runs.atomic_path(tmp_path / "fig.png") as tmp:
+        assert tmp.suffix == ".png" and tmp.parent == tmp_path
+        tmp.write_bytes(b"png")
+    assert (tmp_path / "fig.png").read_bytes() == b"png"
+
+
+def test_current_pointer_moves_only_on_promote(tmp_path):
+    # Runs of one window are isolated; readers follow CURRENT, which promote() swaps.
+    window = "events_daily_20250101_20250201"
+    with pytest.raises(FileNotFoundError):
+        runs.layout_for(window, None, tmp_path)
+
+    runs.promote(window, "run_a", tmp_path)
+    assert runs.layout_for(window, None, tmp_path).root == tmp_path / window / "run_a"
+    assert runs.layout_for(window, "run_b", tmp_path).processed == (
+        tmp_path / window / "run_b" / "data" / "processed"
+    )
+
+    runs.promote(window, "run_b", tmp_path)
+    assert runs.current(window, tmp_path) == "run_b"
+    assert runs.layout_for(None, None).root == runs.ROOT
+    with pytest.raises(ValueError):
+        runs.layout_for(None, "run_b")
+
+
+def test_default_layout_is_the_shared_tree():
+    # Without --window every stage reads and gates on the same files as before runs existed.
+    from src import data_quality, schemas
+
+    shared = runs.layout_for(None, None)
+    assert shared.processed == schemas.PROCESSED_DIR
+    assert shared.qa_history == data_quality.HISTORY_PATH
+
+
+def test_run_scoped_clean_requires_an_explicit_extract():
+    # A run's window comes from the extract name, so it is never guessed from file mtimes.
+    from src import clean_events_daily
+
+    with pytest.raises(SystemExit):
+        clean_events_daily.main(["--run-id"])
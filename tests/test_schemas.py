@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from src import schemas
+
+
+def test_coerce_applies_schema_types_and_nans_bad_rows():
+    # This mimics a messy CSV read: numbers as text and one unparseable value.
+    df = pd.DataFrame(
+        {
+            "SQLDATE": [20250101, 20250102],
+            "CountryCode": ["US", "FR"],
+            "EventCount": ["3", "oops"],
+            "AvgTone": ["-1.5", "2.0"],
+        }
+    )
+
+    out = schemas.coerce(df, "events_daily_extract")
+
+    assert out["SQLDATE"].dtype == schemas.STRING_DTYPE
+    assert out["SQLDATE"].iloc[0] == "20250101"
+    assert out["AvgTone"].dtype == "float64"
+    # An int column with a bad row stays float so the NaN survives.
+    assert out["EventCount"].isna().sum() == 1
+
+
+def test_coerce_leaves_already_typed_columns_untouched():
+    # This verifies typed input skips re-coercion (same underlying arrays come back).
+    df = schemas.coerce(
+        pd.DataFrame({"date": pd.to_datetime(["2025-01-01"]), "risk_raw": [1.0]}),
+        "country_risk_daily",
+    )
+    before = {col: df[col].to_numpy() for col in df.columns}
+
+    out = schemas.coerce(df, "country_risk_daily")
+
+    for col, arr in before.items():
+        assert np.shares_memory(out[col].to_numpy(), arr)
+
+
+def test_feather_round_trip_keeps_schema_types(tmp_path):
+    # This checks the Arrow IPC hand-off comes back with the registry dtypes, values intact.
+    df = pd.DataFrame(
+        {
+            "SQLDATE": ["20250101"],
+            "CountryCode": ["US"],
+            "EventRootCode": ["01"],
+            "EventCount": [5],
+            "AvgTone": [-1.0],
+            "AvgGoldstein": [2.0],
+            "ToneCount": [5],
+            "SumTone": [-5.0],
+            "SumSqTone": [5.0],
+            "GoldsteinCount": [5],
+            "SumGoldstein": [10.0],
+            "SumSqGoldstein": [20.0],
+            "TotalMentions": [10],
+            "TotalArticles": [7],
+            "TotalSources": [3],
+            "ToneHist": ["18:5"],
+            "GoldsteinHist": ["12:5"],
+            "date": pd.to_datetime(["2025-01-01"]),
+            "EventRootLabel": ["Make Public Statement"],
+            "ToneBucket": ["neutral"],
+        }
+    )
+    df = schemas.coerce(df, "events_daily_clean")
+    path = tmp_path / "clean.arrow"
+
+    schemas.write_feather(df, path, "events_daily_clean")
+    out = schemas.read_feather(path, "events_daily_clean")
+
+    pd.testing.assert_frame_equal(out, df)
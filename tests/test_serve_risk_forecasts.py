@@ -0,0 +1,138 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from src.publish_risk_forecasts import FEATURE_COLS, save_serving_artifacts
+from src.serve_risk_forecasts import ForecastService, lookup, make_server
+
+
+@pytest.fixture
+def service(tmp_path):
+    # This trains a tiny two-horizon forest on fake data so the test stays fast and offline.
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, len(FEATURE_COLS)))
+    y = np.column_stack([X[:, 0], X[:, 0] * 2])
+    model = RandomForestRegressor(n_estimators=10, random_state=42).fit(X, y)
+
+    latest = pd.DataFrame(rng.normal(size=(3, len(FEATURE_COLS))), columns=FEATURE_COLS)
+    latest["CountryCode"] = ["US", "FR", "IN"]
+    latest["date"] = pd.Timestamp("2025-01-10")
+    latest["risk_raw"] = [1.0, 2.0, 3.0]
+
+    save_serving_artifacts(
+        model,
+        latest,
+        model.predict(latest[FEATURE_COLS].to_numpy()),
+        horizons=2,
+        model_path=tmp_path / "model.joblib",
+        features_path=tmp_path / "latest.parquet",
+        forecasts_path=tmp_path / "latest.csv",
+    )
+    return ForecastService(tmp_path / "model.joblib", tmp_path / "latest.parquet")
+
+
+def test_predict_returns_every_horizon(service):
+    # This verifies a single-country lookup returns stepped forecast dates per horizon.
+    out = service.predict("FR")
+
+    assert out["as_of_date"] == "2025-01-10"
+    assert [f["forecast_date"] for f in out["forecasts"]] == ["2025-01-11", "2025-01-12"]
+    assert service.metrics.snapshot()["predict"]["count"] == 1
+
+
+def test_predict_many_matches_single_predictions_and_overrides_apply(service):
+    # This checks batching gives the same answers and what-if overrides change the input row.
+    batch = service.predict_many(["US", "IN"])
+    assert batch[1] == service.predict("IN")
+
+    base = service.predict("US")["forecasts"][0]["pred_risk"]
+    shifted = service.predict("US", overrides={"lag_1": 10.0})["forecasts"][0]["pred_risk"]
+    assert shifted != base
+
+    with pytest.raises(KeyError):
+        service.predict("ZZ")
+
+
+def test_http_api_serves_single_and_batch_requests(service):
+    # This spins up the local HTTP server on a free port and hits each endpoint once.
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with urllib.request.urlopen(f"{base}/forecast/us") as resp:
+            assert json.load(resp)["CountryCode"] == "US"
+
+        req = urllib.request.Request(
+            f"{base}/forecast",
+            data=json.dumps({"countries": ["FR", "IN"]}).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req) as resp:
+            assert [r["CountryCode"] for r in json.load(resp)] == ["FR", "IN"]
+
+        with urllib.request.urlopen(f"{base}/metrics") as resp:
+            metrics = json.load(resp)
+        assert metrics["GET /forecast"]["count"] == 1
+        assert metrics["POST /forecast"]["count"] == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_http_get_without_country_returns_every_country(service):
+    # A bare GET /forecast answers for all countries instead of a model error.
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/forecast") as resp:
+            rows = json.load(resp)
+        assert sorted(r["CountryCode"] for r in rows) == sorted(service.countries)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        b"[]",
+        b'"x"',
+        b"{not json",
+        b'{"countries": "US"}',
+        b'{"countries": ["US", 1]}',
+        b'{"countries": ["US"], "overrides": ["lag_1"]}',
+        b'{"countries": ["US"], "overrides": {"lag_1": "high"}}',
+    ],
+)
+def test_http_api_rejects_malformed_post_bodies_with_400(service, body):
+    # This checks bad JSON shapes get a 400 reply instead of a dropped connection.
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        req = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/forecast", data=body)
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(req)
+        assert err.value.code == 400
+        assert "error" in json.load(err.value)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_lookup_reads_published_snapshot_without_the_model(service, tmp_path):
+    # This verifies the stdlib-only lookup returns one row per horizon for a country.
+    rows = lookup("fr", tmp_path / "latest.csv")
+
+    assert [r["horizon"] for r in rows] == ["1", "2"]
+    assert float(rows[0]["pred_risk"]) == pytest.approx(
+        service.predict("FR")["forecasts"][0]["pred_risk"]
+    )
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import aggregates, sketches
+
+
+def hist_of(values: list[float], name: str = "ToneHist") -> np.ndarray:
+    # This bins raw event values exactly like the extract SQL does (clamped fixed bins).
+    spec = sketches.SKETCHES[name]
+    width = (spec["hi"] - spec["lo"]) / spec["bins"]
+    idx = np.clip(
+        np.floor((np.array(values) - spec["lo"]) / width).astype(int), 0, spec["bins"] - 1
+    )
+    return np.bincount(idx, minlength=spec["bins"])
+
+
+def test_encode_decode_round_trip_keeps_counts():
+    # This verifies the sparse string form is lossless, including an empty sketch.
+    mat = np.vstack([hist_of([-3.2, -3.1, 5.0]), np.zeros(40, dtype=int), hist_of([25.0])])
+
+    encoded = sketches.encode(mat)
+
+    assert encoded.iloc[1] == ""
+    np.testing.assert_array_equal(sketches.decode(encoded, "ToneHist"), mat)
+
+
+def test_rollup_equals_histogram_of_pooled_events():
+    # Merging cell sketches for a slice must equal sketching all of the slice's events at once.
+    a, b, c = [-5.5, -1.0], [2.0, 2.5, -1.2], [9.9]
+    df = pd.DataFrame(
+        {
+            "EventRootCode": ["14", "14", "01"],
+            "ToneHist": sketches.encode(np.vstack([hist_of(a), hist_of(b), hist_of(c)])),
+        }
+    )
+
+    merged = sketches.merge(df, ["EventRootCode"], "ToneHist")
+
+    np.testing.assert_array_equal(merged.loc["14"].to_numpy(), hist_of(a + b))
+    np.testing.assert_array_equal(merged.loc["01"].to_numpy(), hist_of(c))
+
+
+def test_quantiles_land_inside_the_right_bins():
+    # This checks sketch percentiles against the raw data to within one bin width.
+    values = np.random.default_rng(0).normal(-2, 3, 5000)
+
+    q = sketches.quantiles(hist_of(values.tolist()), "ToneHist", [0.25, 0.5, 0.75])[0]
+
+    np.testing.assert_allclose(q, np.percentile(values, [25, 50, 75]), atol=1.0)
+
+
+def test_quantile_zero_starts_at_the_first_non_empty_bin():
+    # With the low bins empty, q=0 is the low edge of the lowest occupied bin, not of the range.
+    q = sketches.quantiles(hist_of([-3.5, -2.5, 4.0]), "ToneHist", [0.0, 1.0])[0]
+
+    np.testing.assert_allclose(q, [-4.0, 5.0])
+
+
+def test_combine_merges_sketches_with_the_partials():
+    # The partial-aggregate combine operator also folds the histogram columns.
+    keys = {"SQLDATE": "20250101", "CountryCode": "US", "EventRootCode": "01"}
+    df = pd.DataFrame([{**keys, **{c: 1 for c in aggregates.ADDITIVE_COLS}}] * 2)
+    df["ToneHist"] = sketches.encode(np.vstack([hist_of([1.0]), hist_of([1.0, -4.0])]))
+
+    out = aggregates.combine(df)
+
+    np.testing.assert_array_equal(
+        sketches.decode(out["ToneHist"], "ToneHist")[0], hist_of([1.0, 1.0, -4.0])
+    )
+    assert pytest.approx(out["AvgTone"].iloc[0]) == 1.0
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.spillover_lead_lag import lagged_xcorr, risk_matrix, standardize, top_edges
+
+
+def panel(series: dict[str, np.ndarray]) -> pd.DataFrame:
+    dates = pd.date_range("2025-01-01", periods=len(next(iter(series.values()))), freq="D")
+    return pd.concat(
+        [pd.DataFrame({"date": dates, "CountryCode": c, "risk_raw": v}) for c, v in series.items()],
+        ignore_index=True,
+    )
+
+
+def test_detects_a_country_that_leads_another_by_two_days():
+    # FR copies US with a 2-day delay; IN is independent noise.
+    rng = np.random.default_rng(0)
+    us = rng.normal(size=300).cumsum()
+    fr = np.concatenate([rng.normal(size=2), us[:-2]]) + rng.normal(scale=0.1, size=300)
+    inn = rng.normal(size=300).cumsum()
+
+    wide = risk_matrix(panel({"US": us, "FR": fr, "IN": inn}))
+    z, mask = standardize(wide)
+    edges = top_edges(lagged_xcorr(z, mask, max_lag=5), wide.columns.tolist(), k=3)
+
+    best = edges.iloc[0]
+    assert (best["leader"], best["follower"], best["lag_days"]) == ("US", "FR", 2)
+    assert best["corr"] > 0.9
+    assert best["corr"] > best["corr_lag0"]
+
+
+def test_lagged_xcorr_matches_pandas_pairwise_correlation_with_gaps():
+    # Every pair and lag equals pandas' Pearson correlation of the shifted day-over-day changes,
+    # computed on that pair's overlap alone, even when the overlap is sparse.
+    rng = np.random.default_rng(1)
+    a, b, c = rng.normal(size=(3, 100)).cumsum(axis=1)
+    b[10:15] = np.nan
+    c[rng.random(100) < 0.4] = np.nan
+
+    wide = risk_matrix(panel({"A": a, "B": b, "C": c}), min_coverage=0.5)
+    z, mask = standardize(wide)
+    corr = lagged_xcorr(z, mask, max_lag=3)
+
+    diff = wide.diff().iloc[1:]
+    for lag in range(4):
+        for i, lead in enumerate(diff.columns):
+            for j, follow in enumerate(diff.columns):
+                pair = pd.concat([diff[lead], diff[follow].shift(-lag)], axis=1).dropna()
+                if len(pair) > 2:
+                    expected = pair.iloc[:, 0].corr(pair.iloc[:, 1])
+                    assert corr[lag, i, j] == pytest.approx(expected)
+                else:
+                    assert np.isnan(corr[lag, i, j])
+    assert np.nanmax(np.abs(corr)) <= 1.0
+
+
+def test_max_lag_below_one_is_rejected():
+    # Edges need a lead of at least one day; lag 0 alone is a usage error, not a crash.
+    from src import spillover_lead_lag
+
+    with pytest.raises(SystemExit):
+        spillover_lead_lag.main(["--max-lag", "0"])
+    with pytest.raises(ValueError, match="positive lag"):
+        top_edges(np.zeros((1, 2, 2)), ["A", "B"])